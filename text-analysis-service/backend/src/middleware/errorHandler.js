@@ -19,6 +19,15 @@ export function errorHandler(err, req, res, next) {
     });
   }
 
+  // Перегрузка NLP сервиса - клиент может повторить запрос позже
+  if (err.status === 429) {
+    res.set('Retry-After', String(err.retryAfter));
+    return res.status(429).json({
+      error: 'Too many requests',
+      message: 'NLP service is overloaded. Please retry later.'
+    });
+  }
+
   // Ошибка NLP сервиса
   if (err.message.includes('NLP service')) {
     return res.status(503).json({
@@ -2,6 +2,10 @@ import axios from 'axios';
 import { logger } from '../utils/logger.js';
 
 const NLP_SERVICE_URL = process.env.NLP_SERVICE_URL || 'http://localhost:8000';
+// Суммарное время ожидания повторов при перегрузке NLP сервиса (429)
+const NLP_SERVICE_MAX_RETRY_WAIT_MS = parseInt(process.env.NLP_SERVICE_MAX_RETRY_WAIT_MS || '20000', 10);
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
 
 /**
  * Клиент для взаимодействия с Python NLP сервисом
@@ -13,7 +17,9 @@ class NLPServiceClient {
       baseURL,
       timeout: 30000, // 30 секунд
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        // NLP сервис прекращает анализ, который backend уже не дождется
+        'X-Request-Timeout-Ms': '30000'
       }
     });
   }
@@ -22,39 +28,68 @@ class NLPServiceClient {
    * Анализ текста
    */
   async analyze(text, options = {}) {
-    try {
-      logger.info('Sending request to NLP service', { textLength: text.length });
-      
-      const response = await this.client.post('/analyze', {
-        text,
-        options
-      });
-      
-      logger.info('Received response from NLP service', { 
-        tokensCount: response.data.tokens?.length 
-      });
-      
-      return response.data;
-    } catch (error) {
-      logger.error('NLP service error', { 
-        error: error.message,
-        status: error.response?.status,
-        data: error.response?.data
-      });
-      
-      if (error.response) {
-        // Сервер вернул ошибку
-        throw new Error(`NLP service error: ${error.response.data.detail || error.message}`);
-      } else if (error.request) {
-        // Запрос был отправлен, но ответа не получено
-        throw new Error('NLP service unavailable');
-      } else {
-        // Ошибка при настройке запроса
-        throw new Error(`Request setup error: ${error.message}`);
+    let waitedMs = 0;
+
+    for (;;) {
+      try {
+        logger.info('Sending request to NLP service', { textLength: text.length });
+        
+        const response = await this.client.post('/analyze', {
+          text,
+          options
+        });
+        
+        logger.info('Received response from NLP service', { 
+          tokensCount: response.data.tokens?.length 
+        });
+        
+        return response.data;
+      } catch (error) {
+        // Перегрузка: ждем столько, сколько просит NLP сервис, в пределах бюджета
+        const retryAfterMs = this.getRetryAfterMs(error);
+        if (retryAfterMs !== null && waitedMs + retryAfterMs <= NLP_SERVICE_MAX_RETRY_WAIT_MS) {
+          logger.warn('NLP service overloaded, retrying', { retryAfterMs });
+          waitedMs += retryAfterMs;
+          await sleep(retryAfterMs);
+          continue;
+        }
+
+        logger.error('NLP service error', { 
+          error: error.message,
+          status: error.response?.status,
+          data: error.response?.data
+        });
+        
+        if (retryAfterMs !== null) {
+          const overloaded = new Error('NLP service overloaded');
+          overloaded.status = 429;
+          overloaded.retryAfter = Math.ceil(retryAfterMs / 1000);
+          throw overloaded;
+        } else if (error.response) {
+          // Сервер вернул ошибку
+          throw new Error(`NLP service error: ${error.response.data.detail || error.message}`);
+        } else if (error.request) {
+          // Запрос был отправлен, но ответа не получено
+          throw new Error('NLP service unavailable');
+        } else {
+          // Ошибка при настройке запроса
+          throw new Error(`Request setup error: ${error.message}`);
+        }
       }
     }
   }
 
+  /**
+   * Время ожидания из заголовка Retry-After ответа 429 (или null)
+   */
+  getRetryAfterMs(error) {
+    if (error.response?.status !== 429) {
+      return null;
+    }
+    const seconds = parseInt(error.response.headers?.['retry-after'], 10);
+    return (Number.isNaN(seconds) ? 1 : seconds) * 1000;
+  }
+
   /**
    * Health check
    */
@@ -1,12 +1,51 @@
 """
 FastAPI приложение для NLP сервиса
 """
-from fastapi import FastAPI, HTTPException
+import asyncio
+import codecs
+import json
+import time
+from contextlib import asynccontextmanager
+from fastapi import (
+    Depends, FastAPI, File, HTTPException, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.requests import HTTPConnection
+from pydantic import BaseModel, ValidationError
 import os
+import secrets
 import structlog
-from .schemas.models import AnalysisRequest, AnalysisResponse
-from .models.analyzer import TextAnalyzer
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple, Type, Union
+from .schemas.models import (
+    AnalysisOptions, AnalysisRequest, AnalysisResponse, BatchAnalysisRequest, BatchAnalysisResponse,
+    BatchItemResult, JobCreated, JobStatus, StageSwitches, ResultHandle, ResultPage, AnalysisDelta,
+    ColumnarAnalysisResponse
+)
+from .models.analyzer import (
+    AnalysisInterrupted, OPTIONAL_SECTIONS, RESPONSE_SECTIONS, SECTION_GROUPS, TOKEN_FIELDS,
+    select_fields, split_fields
+)
+from .services.worker_pool import AnalyzerPool, default_worker_count
+from .services.micro_batcher import MicroBatcher
+from .services.admission import AdmissionController, Overloaded
+from .services.fair_scheduler import FairScheduler, LANES, INTERACTIVE, BULK, interactive_reservation
+from .services.single_flight import SingleFlight
+from .services.result_store import ResultStore
+from .services.job_manager import JobManager, QueueFull, IdempotencyConflict
+from .services.degradation import Degradation
+from .services.edit_sessions import EditSession, EditSessions
+from .services.result_handles import ResultHandles, PAGED_SECTIONS
+from .services.result_deltas import ResultVersions, diff_results
+from .services.long_documents import split_text, merge_chunks
+from .services.language_filter import LanguageFilter
+from .services.columnar import to_columnar
+from .utils.sentence_guard import MAX_SENTENCE_TOKENS
+from .utils.parsed_input import PARSED_FORMATS, InvalidParsedInput
+from .utils.json_encoding import dumps, with_defaults
+from .utils.output_formats import ENCODERS, MEDIA_TYPES, negotiate_format, compress
+from .utils.markup import strip_markup
 
 # Настройка логирования
 structlog.configure(
@@ -16,13 +55,155 @@ structlog.configure(
 )
 logger = structlog.get_logger()
 
+# Пул рабочих процессов с анализаторами
+model_name = os.getenv("SPACY_MODEL", "en_core_web_sm")
+workers = int(os.getenv("NLP_WORKERS", default_worker_count()))
+# Предложения длиннее этого числа токенов делятся принудительно (0 - без ограничения)
+max_sentence_tokens = int(os.getenv("NLP_MAX_SENTENCE_TOKENS", MAX_SENTENCE_TOKENS))
+pool = AnalyzerPool(model_name, workers, max_sentence_tokens)
+
+# Параметры nlp.pipe для пакетного анализа
+pipe_batch_size = int(os.getenv("NLP_PIPE_BATCH_SIZE", 32))
+pipe_n_process = int(os.getenv("NLP_PIPE_N_PROCESS", 1))
+
+# Объединение коротких одновременных запросов в пакеты
+batcher = MicroBatcher(
+    pool,
+    max_wait_ms=float(os.getenv("NLP_MICROBATCH_MAX_WAIT_MS", 5)),
+    max_batch=int(os.getenv("NLP_MICROBATCH_MAX_SIZE", 16)),
+    max_chars=int(os.getenv("NLP_MICROBATCH_MAX_CHARS", 1000))
+)
+
+# Бюджет одновременно выполняемой работы (в символах)
+admission = AdmissionController(
+    max_cost=int(os.getenv("NLP_MAX_INFLIGHT_COST", 200000)),
+    max_retry_after=int(os.getenv("NLP_MAX_RETRY_AFTER", 60))
+)
+
+
+def _parse_weights(value: str) -> Dict[str, float]:
+    """
+    Разбор весов клиентов вида "tenant-a=2,tenant-b=0.5"
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        client_id, weight = item.split("=", 1)
+        weights[client_id.strip()] = float(weight)
+    return weights
+
+
+# Справедливая очередь между клиентами (учет по символам)
+# с резервом мощности для интерактивных запросов
+client_chars_per_second = float(os.getenv("NLP_CLIENT_CHARS_PER_SECOND", 0))
+scheduler_capacity = int(os.getenv("NLP_SCHEDULER_CONCURRENCY", max(1, workers) * 4))
+scheduler = FairScheduler(
+    capacity=scheduler_capacity,
+    client_concurrency=int(os.getenv("NLP_CLIENT_CONCURRENCY", max(1, workers))),
+    client_chars_per_second=client_chars_per_second or None,
+    weights=_parse_weights(os.getenv("NLP_CLIENT_WEIGHTS", "")),
+    interactive_reserved=int(os.getenv(
+        "NLP_INTERACTIVE_RESERVED",
+        interactive_reservation(scheduler_capacity, max(1, workers))
+    ))
+)
+
+# Запросы длиннее порога без заголовка X-Request-Lane считаются фоновыми
+bulk_threshold_chars = int(os.getenv("NLP_BULK_THRESHOLD_CHARS", 5000))
+
+# Пороги ожидания в очереди (мс), после которых этап пропускается
+degradation_thresholds = _parse_weights(os.getenv(
+    "NLP_DEGRADE_THRESHOLDS_MS",
+    "grammar_constructions=1000,nested_prepositional_phrases=2000,grammar_errors=4000,morphology=8000"
+))
+for section in degradation_thresholds:
+    if section not in OPTIONAL_SECTIONS:
+        raise ValueError(f"Unknown section in NLP_DEGRADE_THRESHOLDS_MS: {section}")
+degradation = Degradation({section: ms / 1000 for section, ms in degradation_thresholds.items()})
+
+# Токен для административных эндпоинтов; без него они закрыты
+admin_token = os.getenv("NLP_ADMIN_TOKEN")
+
+# Объединение одновременных запросов с одинаковым текстом и опциями
+flights = SingleFlight()
+
+# Период проверки отключения клиента во время анализа (секунды)
+DISCONNECT_POLL_INTERVAL = 0.5
+
+# Сессии инкрементального анализа (WebSocket)
+sessions = EditSessions(
+    max_bytes=int(os.getenv("NLP_SESSIONS_MAX_BYTES", 128 * 1024 * 1024)),
+    idle_timeout=float(os.getenv("NLP_SESSION_IDLE_TIMEOUT", 600))
+)
+# Максимальная длина текста сессии, как у POST /analyze
+MAX_SESSION_TEXT_LENGTH = 100000
+
+# Результаты, сохраненные на сервере (options.store_result)
+result_handles = ResultHandles(ResultStore(
+    ttl_seconds=float(os.getenv("NLP_RESULT_HANDLE_TTL", 600)),
+    max_bytes=int(os.getenv("NLP_RESULT_HANDLES_MAX_BYTES", 128 * 1024 * 1024))
+))
+
+# Версии результатов для ответов в виде разницы (options.versioned, options.base_version)
+result_versions = ResultVersions(ResultStore(
+    ttl_seconds=float(os.getenv("NLP_RESULT_VERSION_TTL", 600)),
+    max_bytes=int(os.getenv("NLP_RESULT_VERSIONS_MAX_BYTES", 128 * 1024 * 1024))
+))
+
+# Длинные документы (options.long_document): предельная длина текста
+# и размер частей, анализируемых параллельно (символы)
+long_document_max_chars = int(os.getenv("NLP_LONG_DOCUMENT_MAX_CHARS", 1000000))
+long_document_chunk_chars = int(os.getenv("NLP_LONG_DOCUMENT_CHUNK_CHARS", 10000))
+
+# Максимальный размер тела POST /analyze/parsed (байты)
+max_parsed_bytes = int(os.getenv("NLP_MAX_PARSED_BYTES", 10 * 1024 * 1024))
+
+# Проверка языка перед разбором: off, flag (пометка в ответе) или reject (422)
+# для текста с оценкой английского ниже порога
+language_filter = LanguageFilter(
+    mode=os.getenv("NLP_LANGUAGE_FILTER", "flag").strip().lower(),
+    threshold=float(os.getenv("NLP_LANGUAGE_THRESHOLD", 0.3))
+)
+
+# Проверка ответов анализа схемами pydantic (тесты, отладка); по умолчанию
+# результаты TextAnalyzer кодируются в JSON напрямую
+validate_responses = os.getenv("NLP_VALIDATE_RESPONSES", "false").strip().lower() in ("1", "true", "yes")
+
+# Сжатие gzip ответов анализа не меньше NLP_COMPRESSION_MIN_BYTES байт
+# (если клиент присылает Accept-Encoding: gzip) и уровень сжатия
+compression_min_bytes = int(os.getenv("NLP_COMPRESSION_MIN_BYTES", 16384))
+compression_level = int(os.getenv("NLP_COMPRESSION_LEVEL", 6))
+
+# Размер части тела запроса при чтении текста без JSON (байты)
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool.start()
+    try:
+        await pool.warm_up()
+        logger.info("Text analyzer pool initialized", model=model_name, workers=workers)
+    except Exception as e:
+        logger.error("Failed to initialize analyzer pool", error=str(e))
+    await asyncio.to_thread(language_filter.warm_up)
+    jobs.start()
+    yield
+    await jobs.stop()
+    pool.shutdown()
+
+
 # Инициализация FastAPI
 app = FastAPI(
     title="English Text Analysis Service",
     description="NLP service for English text analysis with POS tagging, dependency parsing, and grammar analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Схемы ответа анализа и форматы кроме JSON (заголовок Accept) для документации OpenAPI
+ANALYSIS_RESPONSE = Union[AnalysisResponse, ColumnarAnalysisResponse, AnalysisDelta, ResultHandle]
+OUTPUT_CONTENT_TYPES = {200: {"content": {"application/msgpack": {}, "text/x-conllu": {}}}}
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,50 +213,1010 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Инициализация анализатора
-model_name = os.getenv("SPACY_MODEL", "en_core_web_sm")
-try:
-    analyzer = TextAnalyzer(model_name)
-    logger.info("Text analyzer initialized", model=model_name)
-except Exception as e:
-    logger.error("Failed to initialize analyzer", error=str(e))
-    analyzer = None
+
+def _max_length(options: Dict[str, Any]) -> int:
+    """
+    Предельная длина анализируемого текста
+    """
+    if options.get("long_document"):
+        return long_document_max_chars
+    return options.get("max_length", 10000)
+
+
+def _analyzed_length(text: str, options: Dict[str, Any]) -> int:
+    """
+    Длина текста после обрезки
+    """
+    return min(len(text), _max_length(options))
+
+
+def _admit(text_lengths: List[int]):
+    """
+    Резервирует бюджет работы или отвечает 429 с Retry-After
+    """
+    cost = sum(admission.estimate_cost(length) for length in text_lengths)
+    try:
+        return admission.admit(cost)
+    except Overloaded as e:
+        logger.warning("Request rejected, service overloaded", cost=cost, retry_after=e.retry_after)
+        raise HTTPException(
+            status_code=429,
+            detail="NLP service overloaded",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def _client_id(connection: HTTPConnection) -> str:
+    """
+    Идентификатор клиента из заголовка X-Client-Id или адрес клиента
+    """
+    client_id = connection.headers.get("x-client-id")
+    if client_id:
+        return client_id
+    return connection.client.host if connection.client else "anonymous"
+
+
+def _lane(http_request: Request, text_length: int) -> str:
+    """
+    Полоса планировщика из заголовка X-Request-Lane или по объему текста
+    """
+    lane = http_request.headers.get("x-request-lane")
+    if lane:
+        lane = lane.strip().lower()
+        if lane not in LANES:
+            raise HTTPException(status_code=400, detail="Invalid X-Request-Lane header")
+        return lane
+    return BULK if text_length > bulk_threshold_chars else INTERACTIVE
+
+
+def _degrade(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Опции с необязательными этапами, пропускаемыми при текущей нагрузке
+    """
+    skipped = degradation.skipped_sections()
+    if not skipped:
+        return options
+    return {**options, "skip_sections": skipped}
+
+
+def _check_language(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Проверка языка до постановки в очередь; в режиме reject неанглийский
+    текст и мусор отклоняются с 422
+    """
+    check = language_filter.check(text)
+    if check is not None and not check["is_english"]:
+        logger.info("Non-English text detected", language=check["language"], english_score=check["english_score"])
+        if language_filter.rejects:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Text does not look like English (detected: {check['language'] or 'unknown'})"
+            )
+    return check
+
+
+def _check_fields(options: Dict[str, Any]) -> None:
+    """
+    Проверка имен разделов и полей токенов в options.sections и options.token_fields
+    """
+    allowed = RESPONSE_SECTIONS + tuple(SECTION_GROUPS)
+    unknown = sorted(set(split_fields(options.get("sections")) or ()) - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sections: {', '.join(unknown)}; allowed: {', '.join(allowed)}"
+        )
+    unknown = sorted(set(split_fields(options.get("token_fields")) or ()) - set(TOKEN_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown token fields: {', '.join(unknown)}; allowed: {', '.join(TOKEN_FIELDS)}"
+        )
+
+
+def _output_format(http_request: Request) -> str:
+    """
+    Формат ответа по заголовку Accept: JSON, MessagePack или CoNLL-U; иначе 406
+    """
+    output_format = negotiate_format(http_request.headers.get("accept"), tuple(ENCODERS) + ("conllu",))
+    if output_format is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Supported response types: {', '.join(MEDIA_TYPES[name] for name in (*ENCODERS, 'conllu'))}"
+        )
+    return output_format
+
+
+def _with_output(options: Dict[str, Any], output_format: str) -> Dict[str, Any]:
+    """
+    Для CoNLL-U анализатор только разбирает текст и записывает документ spaCy
+    """
+    if output_format != "conllu":
+        return options
+    return {**options, "output": "conllu"}
+
+
+async def _send(body: bytes, output_format: str, http_request: Request) -> Response:
+    """
+    Ответ в выбранном формате; крупные ответы сжимаются, если клиент принимает gzip
+    """
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if len(body) >= compression_min_bytes:
+        body, encoding = await asyncio.to_thread(
+            compress, body, http_request.headers.get("accept-encoding"), compression_min_bytes, compression_level
+        )
+        if encoding:
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=MEDIA_TYPES[output_format], headers=headers)
+
+
+async def _encoded_response(
+    model: Type[BaseModel],
+    payload: Dict[str, Any],
+    http_request: Request,
+    output_format: str = "json"
+) -> Response:
+    """
+    Ответ без повторной проверки и сериализации через response_model:
+    схема остается для документации OpenAPI и режима NLP_VALIDATE_RESPONSES
+    """
+    payload = with_defaults(model, payload)
+    if validate_responses:
+        try:
+            model(**payload)
+        except ValidationError as e:
+            logger.error("Response does not match schema", model=model.__name__, error=str(e))
+            raise
+    body = await asyncio.to_thread(ENCODERS[output_format], payload)
+    return await _send(body, output_format, http_request)
+
+
+def _check_admin(http_request: Request) -> None:
+    """
+    Проверка токена администратора; без NLP_ADMIN_TOKEN эндпоинты /admin/* закрыты
+    """
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: NLP_ADMIN_TOKEN is not set")
+    if not secrets.compare_digest(http_request.headers.get("x-admin-token", ""), admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _charset(content_type: Optional[str]) -> str:
+    """
+    Кодировка из заголовка Content-Type, по умолчанию UTF-8
+    """
+    for param in (content_type or "").split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"')
+    return "utf-8"
+
+
+async def _read_text(chunks: AsyncIterator[bytes], charset: str, max_length: int) -> str:
+    """
+    Чтение текста по частям: декодируется и хранится только анализируемая
+    часть (max_length символов), остаток тела не читается
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(charset)()
+    except LookupError:
+        raise HTTPException(status_code=415, detail=f"Unsupported charset: {charset}")
+    
+    parts = []
+    length = 0
+    try:
+        async for chunk in chunks:
+            part = decoder.decode(chunk)[:max_length - length]
+            parts.append(part)
+            length += len(part)
+            if length >= max_length:
+                break
+        else:
+            parts.append(decoder.decode(b"", final=True)[:max_length - length])
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"Body is not valid {charset} text")
+    
+    text = "".join(parts)
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is empty")
+    return text
+
+
+async def _read_body(chunks: AsyncIterator[bytes], max_bytes: int) -> bytes:
+    """
+    Чтение тела запроса не длиннее max_bytes байт
+    """
+    parts = []
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Body is larger than {max_bytes} bytes")
+        parts.append(chunk)
+    
+    body = b"".join(parts)
+    if not body:
+        raise HTTPException(status_code=400, detail="Body is empty")
+    return body
+
+
+async def _file_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _deadline(http_request: Request, options: Dict[str, Any]) -> Optional[float]:
+    """
+    Абсолютный дедлайн анализа (time.time()) из заголовка X-Request-Timeout-Ms
+    или options.deadline_ms; используется меньший из двух
+    """
+    timeouts = []
+    if options.get("deadline_ms"):
+        timeouts.append(options["deadline_ms"])
+    header = http_request.headers.get("x-request-timeout-ms")
+    if header:
+        try:
+            timeouts.append(int(header))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid X-Request-Timeout-Ms header")
+    if not timeouts:
+        return None
+    return time.time() + min(timeouts) / 1000
+
+
+async def _cancel_on_disconnect(http_request: Request, awaitable: Awaitable) -> Any:
+    """
+    Выполняет анализ и отменяет его, если клиент отключился
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected, cancelling analysis")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+async def _execute_analysis(
+    text: str,
+    options: Dict[str, Any],
+    client_id: str,
+    cost: int,
+    deadline: Optional[float],
+    lane: str
+) -> Dict[str, Any]:
+    """
+    Ожидание очереди клиента и анализ в пуле
+    """
+    if options.get("long_document"):
+        return await _execute_long_document(text, options, client_id, deadline, lane)
+    
+    timeout = None if deadline is None else max(0.0, deadline - time.time())
+    queued_at = time.monotonic()
+    async with scheduler.slot(client_id, cost, timeout, lane):
+        degradation.observe(time.monotonic() - queued_at)
+        options = _degrade(options)
+        # Запросы с коротким дедлайном батчер отправляет в пул сразу
+        return await batcher.analyze(text, options, deadline)
+
+
+async def _execute_long_document(
+    text: str,
+    options: Dict[str, Any],
+    client_id: str,
+    deadline: Optional[float],
+    lane: str
+) -> Dict[str, Any]:
+    """
+    Анализ длинного документа: части анализируются параллельно в рабочих
+    процессах, каждая занимает свое место в очереди клиента
+    """
+    text = text[:long_document_max_chars]
+    # Пропуск этапов под нагрузкой решается один раз, чтобы разделы всех частей совпадали
+    options = _degrade(options)
+    offsets = None
+    if options.get("markup"):
+        # Разметка удаляется из всего документа сразу: граница части не должна
+        # разрезать блок кода или тег
+        text, offsets = await asyncio.to_thread(strip_markup, text, options["markup"])
+    
+    async def analyze_chunk(chunk: str, start: int) -> Dict[str, Any]:
+        chunk_offsets = offsets.slice(start, start + len(chunk)) if offsets else None
+        timeout = None if deadline is None else max(0.0, deadline - time.time())
+        queued_at = time.monotonic()
+        async with scheduler.slot(client_id, admission.estimate_cost(len(chunk)), timeout, lane):
+            degradation.observe(time.monotonic() - queued_at)
+            return await pool.analyze_chunk(chunk, options, deadline, chunk_offsets)
+    
+    tasks = []
+    start = 0
+    for chunk in split_text(text, long_document_chunk_chars):
+        tasks.append(asyncio.ensure_future(analyze_chunk(chunk, start)))
+        start += len(chunk)
+    try:
+        outcomes = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    # Части анализируются полностью; лишние разделы и поля убираются после объединения
+    return select_fields(merge_chunks(outcomes), options)
+
+
+async def _execute_batch(
+    items: List[Tuple[str, Dict[str, Any]]],
+    lengths: List[int],
+    batch_size: int,
+    client_id: str,
+    lane: str
+) -> List[Dict[str, Any]]:
+    """
+    Пакетный анализ: части пакета выполняются в разных рабочих процессах,
+    каждая занимает свое место в очереди клиента
+    """
+    async def analyze_part(part: slice) -> List[Dict[str, Any]]:
+        cost = sum(admission.estimate_cost(length) for length in lengths[part])
+        queued_at = time.monotonic()
+        async with scheduler.slot(client_id, cost, lane=lane):
+            degradation.observe(time.monotonic() - queued_at)
+            return await pool.analyze_batch_chunk(items[part], batch_size, pipe_n_process)
+    
+    tasks = [asyncio.ensure_future(analyze_part(part)) for part in pool.batch_chunks(len(items), batch_size)]
+    try:
+        outcomes = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return [outcome for part_outcomes in outcomes for outcome in part_outcomes]
+
+
+async def _analyze_once(
+    text: str,
+    options: Dict[str, Any],
+    client_id: str,
+    deadline: Optional[float],
+    lane: str
+) -> Dict[str, Any]:
+    """
+    Анализ, общий для одновременных одинаковых запросов: бюджет работы
+    и очередь клиента занимает только первый из них
+    """
+    # Сохранение и формат результата не влияют на анализ, поэтому не входят
+    # в ключ. Общее вычисление идет без дедлайна, дедлайн каждого запроса
+    # соблюдается при ожидании результата. Частичный результат зависит от
+    # дедлайна, поэтому запросы с partial_results объединяются только с тем же дедлайном
+    key_options = {
+        name: value for name, value in options.items()
+        if name not in ("deadline_ms", "store_result", "versioned", "base_version", "format")
+    }
+    shared_deadline = deadline if options.get("partial_results") else None
+    if shared_deadline is not None:
+        key_options["deadline"] = shared_deadline
+    key = flights.make_key(model_name, text, key_options)
+    
+    async def compute() -> Dict[str, Any]:
+        with _admit([_analyzed_length(text, options)]) as ticket:
+            return await _execute_analysis(text, options, client_id, ticket.cost, shared_deadline, lane)
+    
+    return await flights.do(key, compute, deadline)
+
+
+async def _run_job(text: str, options: Dict[str, Any], client_id: str) -> Dict[str, Any]:
+    """
+    Выполнение асинхронной задачи: через фоновую очередь клиента, без бюджета синхронных запросов
+    """
+    deadline = time.time() + options["deadline_ms"] / 1000 if options.get("deadline_ms") else None
+    cost = admission.estimate_cost(_analyzed_length(text, options))
+    result = await _execute_analysis(text, options, client_id, cost, deadline, BULK)
+    if options.get("format") == "columnar":
+        return with_defaults(ColumnarAnalysisResponse, await asyncio.to_thread(to_columnar, result))
+    return with_defaults(AnalysisResponse, result)
+
+
+async def _edit_session(session: EditSession, message: Any, client_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Анализ правки в сессии: заново анализируются только измененные предложения
+    """
+    if not isinstance(message, dict) or not isinstance(message.get("text"), str):
+        raise HTTPException(status_code=400, detail="Message must contain text")
+    text = message["text"]
+    if len(text) > MAX_SESSION_TEXT_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Text is longer than {MAX_SESSION_TEXT_LENGTH} characters")
+    
+    if "options" in message:
+        try:
+            options = AnalysisOptions(**(message["options"] or {})).dict()
+        except (TypeError, ValidationError):
+            raise HTTPException(status_code=400, detail="Invalid options")
+        if options != session.options:
+            # Результаты с другими опциями не переиспользуются
+            session.options = options
+            session.reset()
+    
+    plan = session.plan(text)
+    if plan is None:
+        return None
+    first, last, fragment = plan
+    
+    with _admit([len(fragment)]) as ticket:
+        async with scheduler.slot(client_id, ticket.cost, lane=INTERACTIVE):
+            items = await pool.analyze_sentences(fragment, session.options)
+    
+    update = session.apply(first, last, items)
+    sessions.touch(session)
+    return update
+
+
+# Асинхронные задачи анализа
+jobs = JobManager(
+    _run_job,
+    ResultStore(
+        ttl_seconds=float(os.getenv("NLP_JOB_RESULT_TTL", 3600)),
+        max_bytes=int(os.getenv("NLP_JOB_RESULTS_MAX_BYTES", 256 * 1024 * 1024))
+    ),
+    concurrency=int(os.getenv("NLP_JOB_CONCURRENCY", max(1, workers))),
+    max_queued=int(os.getenv("NLP_JOB_QUEUE_SIZE", 1000))
+)
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    if analyzer is None:
+    if not pool.ready:
         raise HTTPException(status_code=503, detail="NLP model not loaded")
     return {
         "status": "healthy",
-        "model": model_name
+        "model": model_name,
+        "workers": workers
     }
 
 
-@app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_text(request: AnalysisRequest):
+@app.get("/stats")
+async def service_stats():
+    """Статистика работы сервиса"""
+    return {
+        "workers": workers,
+        "micro_batching": batcher.stats(),
+        "admission": admission.stats(),
+        "scheduler": scheduler.stats(),
+        "single_flight": flights.stats(),
+        "degradation": degradation.stats(),
+        "sessions": sessions.stats(),
+        "result_handles": result_handles.stats(),
+        "result_versions": result_versions.stats(),
+        "language_filter": language_filter.stats(),
+        "jobs": jobs.stats()
+    }
+
+
+@app.get("/admin/stages", response_model=StageSwitches)
+async def get_stage_switches(http_request: Request):
+    """
+    Необязательные этапы анализа, отключенные администратором
+    """
+    _check_admin(http_request)
+    return {"disabled": sorted(degradation.disabled)}
+
+
+@app.put("/admin/stages", response_model=StageSwitches)
+async def set_stage_switches(switches: StageSwitches, http_request: Request):
+    """
+    Аварийное отключение необязательных этапов анализа без перезапуска сервиса
+    """
+    _check_admin(http_request)
+    unknown = sorted(set(switches.disabled) - set(OPTIONAL_SECTIONS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown stages: {', '.join(unknown)}; allowed: {', '.join(OPTIONAL_SECTIONS)}"
+        )
+    
+    degradation.set_disabled(switches.disabled)
+    logger.warning("Analysis stages switched off by admin", disabled=sorted(degradation.disabled))
+    return {"disabled": sorted(degradation.disabled)}
+
+
+@app.post("/analyze", response_model=ANALYSIS_RESPONSE, responses=OUTPUT_CONTENT_TYPES)
+async def analyze_text(request: AnalysisRequest, http_request: Request):
     """
     Анализ английского текста
     """
-    if analyzer is None:
+    if not pool.ready:
+        raise HTTPException(status_code=503, detail="NLP service unavailable")
+    
+    options = request.options.dict() if request.options else {}
+    return await _analyze_response(request.text, options, http_request)
+
+
+async def _respond(
+    result: Dict[str, Any],
+    options: Dict[str, Any],
+    http_request: Request,
+    output_format: str,
+    language_check: Optional[Dict[str, Any]] = None
+) -> Response:
+    """
+    Ответ на анализ: полный результат (обычный или колоночный), разница
+    с предыдущей версией или ссылка на результат, сохраненный на сервере
+    """
+    if output_format == "conllu":
+        return await _send(result["conllu"].encode("utf-8"), output_format, http_request)
+    
+    version = None
+    base_version = options.get("base_version")
+    if options.get("versioned") or base_version:
+        base = result_versions.get(base_version) if base_version else None
+        size = await asyncio.to_thread(result_versions.size, result)
+        version, _ = result_versions.put(result, size)
+        
+        # Разница строится только между полными результатами; если базовая версия
+        # истекла или вытеснена, клиент получает полный результат с новой версией
+        if base is not None and not base.get("partial") and not result.get("partial"):
+            delta = await asyncio.to_thread(diff_results, base, result)
+            return await _encoded_response(AnalysisDelta, {
+                "version": version,
+                "base_version": base_version,
+                "skipped_sections": result.get("skipped_sections", []),
+                "forced_sentence_splits": result.get("forced_sentence_splits", 0),
+                "language_check": language_check,
+                **delta
+            }, http_request, output_format)
+    
+    if options.get("store_result"):
+        return await _encoded_response(
+            ResultHandle, await _store_result(result, language_check), http_request, output_format
+        )
+    if options.get("format") == "columnar":
+        columnar = await asyncio.to_thread(to_columnar, result)
+        return await _encoded_response(
+            ColumnarAnalysisResponse,
+            {**columnar, "version": version, "language_check": language_check},
+            http_request,
+            output_format
+        )
+    return await _encoded_response(
+        AnalysisResponse,
+        {**result, "version": version, "language_check": language_check},
+        http_request,
+        output_format
+    )
+
+
+async def _store_result(result: Dict[str, Any], language_check: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Сохраняет результат на сервере; в ответе остаются только небольшие разделы
+    """
+    sections, size = await asyncio.to_thread(result_handles.prepare, result)
+    result_id, expires_at = result_handles.put(sections, size)
+    return {
+        "result_id": result_id,
+        "expires_at": expires_at,
+        "totals": {section: len(items) for section, items in sections.items()},
+        "sentences": result.get("sentences"),
+        "statistics": result.get("statistics"),
+        "complexity_metrics": result.get("complexity_metrics"),
+        "partial": result.get("partial", False),
+        "skipped_sections": result.get("skipped_sections", []),
+        "forced_sentence_splits": result.get("forced_sentence_splits", 0),
+        "language_check": language_check
+    }
+
+
+@app.get("/results/{result_id}/{section}", response_model=ResultPage)
+async def get_result_page(
+    result_id: str,
+    section: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Часть раздела сохраненного результата: токены, деревья зависимостей
+    предложений, грамматические ошибки, конструкции или вложенные предложные фразы
+    """
+    if section not in PAGED_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown section; available: {', '.join(PAGED_SECTIONS)}")
+    
+    page = result_handles.page(result_id, section, offset, limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    return page
+
+
+@app.post("/analyze/text", response_model=ANALYSIS_RESPONSE, responses=OUTPUT_CONTENT_TYPES)
+async def analyze_plain_text(http_request: Request, options: AnalysisOptions = Depends()):
+    """
+    Анализ текста из тела запроса text/plain; опции передаются параметрами запроса
+    """
+    if not pool.ready:
+        raise HTTPException(status_code=503, detail="NLP service unavailable")
+    
+    content_type = http_request.headers.get("content-type")
+    if not (content_type or "").lower().startswith("text/plain"):
+        raise HTTPException(status_code=415, detail="Content-Type must be text/plain")
+    
+    text = await _read_text(http_request.stream(), _charset(content_type), _max_length(options.dict()))
+    return await _analyze_response(text, options.dict(), http_request)
+
+
+@app.post("/analyze/file", response_model=ANALYSIS_RESPONSE, responses=OUTPUT_CONTENT_TYPES)
+async def analyze_file(
+    http_request: Request,
+    file: UploadFile = File(...),
+    options: AnalysisOptions = Depends()
+):
+    """
+    Анализ загруженного текстового файла (multipart/form-data, поле file);
+    опции передаются параметрами запроса
+    """
+    if not pool.ready:
+        raise HTTPException(status_code=503, detail="NLP service unavailable")
+    
+    text = await _read_text(_file_chunks(file), _charset(file.content_type), _max_length(options.dict()))
+    return await _analyze_response(text, options.dict(), http_request)
+
+
+@app.post("/analyze/parsed", response_model=ANALYSIS_RESPONSE, responses=OUTPUT_CONTENT_TYPES)
+async def analyze_parsed(http_request: Request, options: AnalysisOptions = Depends()):
+    """
+    Анализ уже разобранного текста без повторного разбора spaCy: тело - DocBin
+    (application/x-spacy-docbin) или CoNLL-U (text/x-conllu); опции передаются
+    параметрами запроса
+    """
+    if not pool.ready:
         raise HTTPException(status_code=503, detail="NLP service unavailable")
     
+    content_type = http_request.headers.get("content-type")
+    input_format = PARSED_FORMATS.get((content_type or "").split(";")[0].strip().lower())
+    if input_format is None:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be one of: {', '.join(PARSED_FORMATS)}")
+    output_format = _output_format(http_request)
+    _check_fields(options.dict())
+    
+    data = await _read_body(http_request.stream(), max_parsed_bytes)
+    if input_format == "conllu":
+        charset = _charset(content_type)
+        try:
+            data = data.decode(charset)
+        except LookupError:
+            raise HTTPException(status_code=415, detail=f"Unsupported charset: {charset}")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail=f"Body is not valid {charset} text")
+    
+    options = options.dict()
+    client_id = _client_id(http_request)
+    deadline = _deadline(http_request, options)
+    # Размер тела - приближенная оценка объема работы
+    lane = _lane(http_request, len(data))
+    
     try:
-        logger.info("Analyzing text", text_length=len(request.text))
+        logger.info("Analyzing parsed input", input_format=input_format, size=len(data), client_id=client_id, lane=lane)
         
-        options = request.options.dict() if request.options else {}
-        result = analyzer.analyze(request.text, options)
+        with _admit([len(data)]) as ticket:
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            queued_at = time.monotonic()
+            async with scheduler.slot(client_id, ticket.cost, timeout, lane):
+                degradation.observe(time.monotonic() - queued_at)
+                result = await _cancel_on_disconnect(
+                    http_request,
+                    pool.analyze_parsed(data, input_format, _with_output(_degrade(options), output_format), deadline)
+                )
         
-        logger.info("Analysis completed", tokens_count=len(result["tokens"]))
+        logger.info("Parsed input analysis completed", tokens_count=len(result.get("tokens") or []))
         
-        return AnalysisResponse(**result)
+        return await _respond(result, options, http_request, output_format)
+    
+    except HTTPException:
+        raise
+    
+    except InvalidParsedInput as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except (asyncio.TimeoutError, AnalysisInterrupted):
+        logger.warning("Analysis deadline exceeded", client_id=client_id)
+        raise HTTPException(status_code=504, detail="Analysis deadline exceeded")
+    
+    except Exception as e:
+        logger.error("Parsed input analysis error", error=str(e))
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+async def _analyze_response(
+    text: str,
+    options: Dict[str, Any],
+    http_request: Request
+) -> Response:
+    """
+    Анализ текста запроса с учетом дедлайна, полосы планировщика и отключения клиента
+    """
+    output_format = _output_format(http_request)
+    _check_fields(options)
+    client_id = _client_id(http_request)
+    deadline = _deadline(http_request, options)
+    lane = _lane(http_request, _analyzed_length(text, options))
+    language_check = _check_language(text)
+    
+    try:
+        logger.info("Analyzing text", text_length=len(text), client_id=client_id, lane=lane)
+        
+        result = await _cancel_on_disconnect(
+            http_request,
+            _analyze_once(text, _with_output(options, output_format), client_id, deadline, lane)
+        )
+        
+        logger.info(
+            "Analysis completed",
+            tokens_count=len(result.get("tokens") or []),
+            partial=result.get("partial", False),
+            forced_sentence_splits=result.get("forced_sentence_splits", 0)
+        )
+        
+        return await _respond(result, options, http_request, output_format, language_check)
+    
+    except HTTPException:
+        raise
+    
+    except (asyncio.TimeoutError, AnalysisInterrupted):
+        logger.warning("Analysis deadline exceeded", client_id=client_id)
+        raise HTTPException(status_code=504, detail="Analysis deadline exceeded")
     
     except Exception as e:
         logger.error("Analysis error", error=str(e))
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@app.post("/analyze/stream")
+async def analyze_text_stream(request: AnalysisRequest, http_request: Request):
+    """
+    Потоковый анализ в формате NDJSON: запись для каждого предложения
+    и итоговая запись со статистикой и метриками сложности документа
+    """
+    if not pool.ready:
+        raise HTTPException(status_code=503, detail="NLP service unavailable")
+    
+    options = request.options.dict() if request.options else {}
+    client_id = _client_id(http_request)
+    deadline = _deadline(http_request, options)
+    lane = _lane(http_request, _analyzed_length(request.text, options))
+    language_check = _check_language(request.text)
+    ticket = _admit([_analyzed_length(request.text, options)])
+    
+    logger.info("Streaming analysis", text_length=len(request.text), client_id=client_id, lane=lane)
+    
+    async def records():
+        # Ответ уже начат, поэтому ошибка передается последней записью потока
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            queued_at = time.monotonic()
+            async with scheduler.slot(client_id, ticket.cost, timeout, lane):
+                degradation.observe(time.monotonic() - queued_at)
+                async for record in pool.analyze_stream(request.text, _degrade(options), deadline):
+                    if record["type"] == "summary" and language_check is not None:
+                        record["language_check"] = language_check
+                    yield dumps(record) + b"\n"
+        except (asyncio.TimeoutError, AnalysisInterrupted):
+            logger.warning("Analysis deadline exceeded", client_id=client_id)
+            yield dumps({"type": "error", "error": "Analysis deadline exceeded"}) + b"\n"
+        except Exception as e:
+            logger.error("Streaming analysis error", error=str(e))
+            yield dumps({"type": "error", "error": f"Analysis failed: {str(e)}"}) + b"\n"
+        finally:
+            ticket.release()
+    
+    # Бюджет освобождается и тогда, когда клиент отключился до начала потока
+    return StreamingResponse(
+        records(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(ticket.release)
+    )
+
+
+@app.websocket("/analyze/session")
+async def analyze_session(websocket: WebSocket):
+    """
+    Сессия редактирования: клиент присылает текст после каждой правки,
+    сервис анализирует только измененные предложения и присылает изменения
+    """
+    await websocket.accept()
+    client_id = _client_id(websocket)
+    session = sessions.open()
+    logger.info("Edit session opened", session_id=session.session_id, client_id=client_id)
+    
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            # Сообщения - JSON в текстовых кадрах; бинарный кадр не закрывает сессию
+            if frame.get("text") is None:
+                await websocket.send_json({"type": "error", "error": "Messages must be JSON in text frames"})
+                continue
+            try:
+                message = json.loads(frame["text"])
+            except ValueError:
+                await websocket.send_json({"type": "error", "error": "Invalid JSON"})
+                continue
+            
+            if not pool.ready:
+                await websocket.send_json({"type": "error", "error": "NLP service unavailable"})
+                continue
+            
+            try:
+                update = await _edit_session(session, message, client_id)
+            except HTTPException as e:
+                error = {"type": "error", "error": e.detail}
+                if e.headers and "Retry-After" in e.headers:
+                    error["retry_after"] = int(e.headers["Retry-After"])
+                await websocket.send_json(error)
+                continue
+            except Exception as e:
+                logger.error("Edit session analysis error", session_id=session.session_id, error=str(e))
+                await websocket.send_json({"type": "error", "error": f"Analysis failed: {str(e)}"})
+                continue
+            
+            if update is not None:
+                await websocket.send_json(update)
+    
+    except WebSocketDisconnect:
+        pass
+    
+    finally:
+        sessions.close(session)
+        logger.info("Edit session closed", session_id=session.session_id)
+
+
+@app.post("/analyze/batch", response_model=BatchAnalysisResponse, responses=OUTPUT_CONTENT_TYPES)
+async def analyze_batch(request: BatchAnalysisRequest, http_request: Request):
+    """
+    Пакетный анализ текстов через nlp.pipe
+    """
+    if not pool.ready:
+        raise HTTPException(status_code=503, detail="NLP service unavailable")
+    output_format = _output_format(http_request)
+    
+    results = [None] * len(request.items)
+    valid = []
+    for index, item in enumerate(request.items):
+        try:
+            validated = AnalysisRequest(text=item.text, options=item.options)
+        except ValidationError as e:
+            results[index] = {"index": index, "error": f"Invalid item: {e.errors()[0]['msg']}"}
+            continue
+        options = validated.options.dict() if validated.options else {}
+        try:
+            _check_fields(options)
+            language_check = _check_language(validated.text)
+        except HTTPException as e:
+            results[index] = {"index": index, "error": e.detail}
+            continue
+        valid.append((index, validated.text, options, language_check))
+    
+    client_id = _client_id(http_request)
+    lengths = [_analyzed_length(text, options) for _, text, options, _ in valid]
+    lane = _lane(http_request, sum(lengths))
+    
+    with _admit(lengths):
+        try:
+            logger.info("Analyzing batch", items_count=len(request.items), valid_count=len(valid), client_id=client_id, lane=lane)
+            
+            outcomes = await _execute_batch(
+                [(text, _with_output(_degrade(options), output_format)) for _, text, options, _ in valid],
+                lengths,
+                request.batch_size or pipe_batch_size,
+                client_id,
+                lane
+            )
+            for (index, _, options, language_check), outcome in zip(valid, outcomes):
+                result = outcome.get("result")
+                if result is not None and output_format != "conllu":
+                    model = AnalysisResponse
+                    if options.get("format") == "columnar":
+                        model, result = ColumnarAnalysisResponse, to_columnar(result)
+                    outcome = {**outcome, "result": with_defaults(model, {**result, "language_check": language_check})}
+                results[index] = {"index": index, **outcome}
+            
+            logger.info("Batch analysis completed", failed_count=sum(1 for r in results if r["error"]))
+            
+            if output_format == "conllu":
+                return await _send(_batch_conllu(results).encode("utf-8"), output_format, http_request)
+            return await _encoded_response(
+                BatchAnalysisResponse,
+                {"results": [with_defaults(BatchItemResult, item) for item in results]},
+                http_request,
+                output_format
+            )
+        
+        except Exception as e:
+            logger.error("Batch analysis error", error=str(e))
+            raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+
+
+def _batch_conllu(results: List[Dict[str, Any]]) -> str:
+    """
+    Документы пакета в одном файле CoNLL-U; ошибка документа - комментарий error
+    """
+    parts = []
+    for item in results:
+        parts.append(f"# newdoc id = {item['index']}\n")
+        if item.get("error"):
+            parts.append("# error = " + " ".join(str(item["error"]).split()) + "\n\n")
+        else:
+            parts.append(item["result"]["conllu"])
+    return "".join(parts)
+
+
+@app.post("/analyze/async", response_model=JobCreated, status_code=202)
+async def analyze_text_async(request: AnalysisRequest, http_request: Request):
+    """
+    Постановка анализа в очередь; результат доступен через GET /jobs/{job_id}
+    """
+    if not pool.ready:
+        raise HTTPException(status_code=503, detail="NLP service unavailable")
+    
+    options = request.options.dict() if request.options else {}
+    _check_fields(options)
+    client_id = _client_id(http_request)
+    language_check = _check_language(request.text)
+    
+    try:
+        job, created = jobs.submit(
+            request.text,
+            options,
+            client_id,
+            http_request.headers.get("idempotency-key")
+        )
+    except IdempotencyConflict:
+        raise HTTPException(status_code=409, detail="Idempotency-Key was already used for a different request")
+    except QueueFull:
+        retry_after = admission.retry_after(jobs.queued_chars)
+        logger.warning("Job rejected, queue is full", client_id=client_id, retry_after=retry_after)
+        raise HTTPException(
+            status_code=429,
+            detail="Job queue is full",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    if created:
+        logger.info("Analysis job queued", job_id=job.job_id, text_length=len(request.text), client_id=client_id)
+    
+    return {"job_id": job.job_id, "status": job.status, "language_check": language_check}
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Статус и результат асинхронной задачи
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # Результат читается до формирования статуса: после jobs.get он мог истечь по TTL
+    result = jobs.result(job_id) if job.status == "completed" else None
+    
+    status = {
+        "job_id": job.job_id,
+        "status": job.status,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "error": job.error
+    }
+    if result is None:
+        return status
+    
+    # Результат хранится сериализованным и вставляется в ответ без повторного разбора
+    head = dumps(status)[:-1]
+    return Response(content=head + b', "result": ' + result + b"}", media_type="application/json")
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
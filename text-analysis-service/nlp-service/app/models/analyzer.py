@@ -3,7 +3,8 @@
 """
 import spacy
 import os
-from typing import List, Dict, Any
+from spacy.tokens import Doc
+from typing import List, Dict, Any, Tuple, Callable, Optional, Union
 from ..schemas.models import (
     Token, Sentence, DependencyTree, DependencyNode, DependencyEdge
 )
@@ -15,13 +16,164 @@ from ..utils.grammar_checker import check_grammar
 from ..utils.adjective_analyzer import analyze_adjective
 from ..utils.grammar_constructions import analyze_grammar_constructions
 from ..utils.preposition_analyzer import analyze_preposition, find_nested_prepositional_phrases
-from ..utils.complexity_analyzer import calculate_complexity_metrics
+from ..utils.sentence_guard import MAX_SENTENCE_TOKENS
+from ..utils.parsed_input import doc_from_docbin, doc_from_conllu, doc_to_conllu
+from ..utils.markup import strip_markup, OffsetMap
+from ..utils.complexity_analyzer import (
+    calculate_complexity_metrics, summarize_complexity, merge_complexity_summaries,
+    complexity_metrics_from_summary
+)
+
+
+class AnalysisInterrupted(Exception):
+    """
+    Анализ прерван между этапами: истек дедлайн (deadline) или запрос отменен (cancelled)
+    """
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+# Необязательные этапы, которые можно пропустить (options["skip_sections"]);
+# morphology - морфология в токенах, остальные - разделы ответа
+OPTIONAL_SECTIONS = (
+    "grammar_constructions",
+    "nested_prepositional_phrases",
+    "grammar_errors",
+    "complexity_metrics",
+    "morphology"
+)
+
+# Разделы, которые вычисляются для каждого предложения отдельно
+SENTENCE_SECTIONS = (
+    "tokens",
+    "dependency_tree",
+    "grammar_errors",
+    "grammar_constructions",
+    "nested_prepositional_phrases"
+)
+
+
+# Разделы ответа в порядке вычисления
+RESPONSE_SECTIONS = (
+    "tokens",
+    "sentences",
+    "dependency_tree",
+    "statistics",
+    "grammar_errors",
+    "grammar_constructions",
+    "nested_prepositional_phrases",
+    "complexity_metrics"
+)
+
+# Наборы разделов для options["sections"]
+SECTION_GROUPS = {
+    "summary": ("statistics", "complexity_metrics")
+}
+
+# Поля токена; id есть в ответе всегда
+TOKEN_FIELDS = (
+    "id", "text", "lemma", "pos", "tag", "morphology", "dependency", "grammar", "verb_type",
+    "participle", "adverb_classification", "adjective_analysis", "preposition_analysis"
+)
+
+# Разделы, вычисляемые по списку tokens, и поля токенов, которые им нужны
+SECTION_TOKEN_FIELDS = {
+    "statistics": (
+        "pos", "participle", "verb_type", "adverb_classification", "adjective_analysis", "preposition_analysis"
+    ),
+    "grammar_errors": ("grammar",),
+    "grammar_constructions": ("grammar",),
+    "nested_prepositional_phrases": (),
+    "complexity_metrics": ("pos", "lemma")
+}
+
+# Разделы, элементы которых в нормализованном ответе (options["normalized"])
+# ссылаются на предложения номером в разделе sentences
+SENTENCE_REFERENCE_SECTIONS = ("grammar_errors", "grammar_constructions", "nested_prepositional_phrases")
+
+
+def split_fields(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Список имен из строки через запятую; None - ограничение не задано
+    """
+    if not value:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def requested_sections(options: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+    """
+    Разделы из options["sections"] с раскрытыми наборами; None - все разделы.
+    В нормализованном ответе к разделам со ссылками на предложения добавляется sentences.
+    """
+    names = split_fields(options.get("sections"))
+    if names is None:
+        return None
+    sections = set()
+    for name in names:
+        sections.update(SECTION_GROUPS.get(name, (name,)))
+    if options.get("normalized") and sections.intersection(SENTENCE_REFERENCE_SECTIONS):
+        sections.add("sentences")
+    return tuple(section for section in RESPONSE_SECTIONS if section in sections)
+
+
+def token_fields(options: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+    """
+    Поля токенов, которые нужно вычислить: запрошенные в options["token_fields"]
+    и нужные запрошенным разделам; None - все поля
+    """
+    sections = requested_sections(options)
+    fields = split_fields(options.get("token_fields"))
+    if sections is None and fields is None:
+        return None
+
+    needed = {"id"}
+    if sections is None or "tokens" in sections:
+        needed.update(fields or TOKEN_FIELDS)
+    for section in (SECTION_TOKEN_FIELDS if sections is None else sections):
+        needed.update(SECTION_TOKEN_FIELDS.get(section, ()))
+    return tuple(field for field in TOKEN_FIELDS if field in needed)
+
+
+def select_fields(result: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Оставляет в результате только запрошенные разделы и поля токенов
+    (options["sections"], options["token_fields"])
+    """
+    sections = requested_sections(options)
+    fields = split_fields(options.get("token_fields"))
+    if sections is not None:
+        for section in RESPONSE_SECTIONS:
+            if section not in sections:
+                result.pop(section, None)
+    if fields is not None and result.get("tokens"):
+        keep = [field for field in TOKEN_FIELDS if field == "id" or field in fields]
+        keep += [field for field in ("start_char", "end_char") if field in result["tokens"][0]]
+        result["tokens"] = [{field: token[field] for field in keep if field in token} for token in result["tokens"]]
+    return result
+
+
+def merge_statistics(first: Optional[Dict[str, Any]], second: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Сумма вложенных словарей счетчиков (статистика частей текста)
+    """
+    if first is None:
+        return second
+    merged = dict(first)
+    for key, value in second.items():
+        if isinstance(value, dict):
+            merged[key] = merge_statistics(first.get(key), value)
+        else:
+            merged[key] = first.get(key, 0) + value
+    return merged
 
 
 class TextAnalyzer:
-    def __init__(self, model_name: str = "en_core_web_sm"):
+    def __init__(self, model_name: str = "en_core_web_sm", max_sentence_tokens: int = MAX_SENTENCE_TOKENS):
         """
-        Инициализация анализатора с загрузкой spaCy модели
+        Инициализация анализатора с загрузкой spaCy модели.
+        Предложения длиннее max_sentence_tokens токенов делятся принудительно (0 - без ограничения).
         """
         self.model_name = model_name
         try:
@@ -31,62 +183,366 @@ class TextAnalyzer:
             print(f"Model {model_name} not found. Please install it with:")
             print(f"python -m spacy download {model_name}")
             raise
+        
+        if max_sentence_tokens > 0:
+            self._add_sentence_guard(max_sentence_tokens)
     
-    def analyze(self, text: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    def _add_sentence_guard(self, max_tokens: int) -> None:
         """
-        Основной метод анализа текста
+        Ограничение длины предложений ставится перед парсером,
+        а без парсера - после компонента, делящего текст на предложения
         """
-        # Ограничение длины текста
-        max_length = options.get("max_length", 10000)
-        if len(text) > max_length:
-            text = text[:max_length]
+        position = {"last": True}
+        if "parser" in self.nlp.pipe_names:
+            position = {"before": "parser"}
+        else:
+            for name in ("senter", "sentencizer"):
+                if name in self.nlp.pipe_names:
+                    position = {"after": name}
+        self.nlp.add_pipe("sentence_guard", config={"max_tokens": max_tokens}, **position)
+    
+    def analyze(
+        self,
+        text: str,
+        options: Dict[str, Any],
+        checkpoint: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Основной метод анализа текста.
+        checkpoint вызывается перед каждым этапом с именем этапа и может
+        прервать анализ, выбросив AnalysisInterrupted.
+        """
+        text, offsets = self._preprocess(text, options)
         
         # Обработка текста через spaCy
+        if checkpoint:
+            checkpoint("parse")
         doc = self.nlp(text)
         
-        # Извлечение токенов
-        tokens = self._extract_tokens(doc, options)
+        result = self._analyze_doc(doc, options, checkpoint)
+        self._map_offsets(result.get("tokens"), doc, offsets)
+        return select_fields(result, options)
+    
+    def analyze_parsed(
+        self,
+        data: Union[bytes, str],
+        input_format: str,
+        options: Dict[str, Any],
+        checkpoint: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Анализ уже разобранного текста (DocBin или CoNLL-U) без разбора spaCy:
+        выполняются только этапы после разбора
+        """
+        if input_format == "docbin":
+            doc = doc_from_docbin(self.nlp.vocab, data)
+        else:
+            doc = doc_from_conllu(self.nlp.vocab, data)
         
-        # Извлечение предложений
-        sentences = self._extract_sentences(doc)
+        return select_fields(self._analyze_doc(doc, options, checkpoint), options)
+    
+    def analyze_chunk(
+        self,
+        text: str,
+        options: Dict[str, Any],
+        checkpoint: Optional[Callable[[str], None]] = None,
+        offsets: Optional[OffsetMap] = None
+    ) -> Dict[str, Any]:
+        """
+        Анализ части длинного документа без обрезки по max_length.
+        Вместо метрик сложности возвращается их сводка (complexity), чтобы
+        метрики документа можно было вычислить после объединения частей.
+        Разметка удаляется до разбиения документа на части; offsets -
+        соответствие позиций части позициям исходного документа.
+        """
+        if checkpoint:
+            checkpoint("parse")
+        doc = self.nlp(text)
         
-        # Построение дерева зависимостей
-        dependency_tree = self._build_dependency_tree(doc)
+        sections = tuple(section for section, _ in self._pipeline() if section != "complexity_metrics")
+        result = self._analyze_doc(doc, options, checkpoint, sections=sections)
+        self._map_offsets(result.get("tokens"), doc, offsets)
         
-        # Дополнительная статистика для версии 1.1.0
-        statistics = self._calculate_statistics(doc, tokens)
+        complexity = None
+        if "complexity_metrics" in (options.get("skip_sections") or ()):
+            result.setdefault("skipped_sections", []).append("complexity_metrics")
+        elif "tokens" in result:
+            # Номера токенов части совпадают с позициями в списке tokens
+            for sent in doc.sents:
+                complexity = merge_complexity_summaries(
+                    complexity, summarize_complexity(sent, result["tokens"][sent.start:sent.end])
+                )
+        # Пробелы в начале части относятся к последнему токену предыдущей части
+        leading_spaces = text[:len(text) - len(text.lstrip())]
+        return {"result": result, "complexity": complexity, "leading_spaces": leading_spaces}
+    
+    def analyze_batch(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]],
+        batch_size: int = 32,
+        n_process: int = 1,
+        checkpoints: Optional[List[Optional[Callable[[str], None]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Пакетный анализ текстов через nlp.pipe.
+        Результаты возвращаются в порядке входных текстов, ошибка одного
+        документа попадает в его поле error и не прерывает весь пакет.
+        checkpoints - проверки дедлайна каждого документа; если анализ
+        документа прерван, в его результате есть поле interrupted с причиной.
+        """
+        checkpoints = checkpoints or [None] * len(items)
+        prepared = [self._preprocess(text, options) for text, options in items]
+        texts = [text for text, _ in prepared]
         
-        # Проверка грамматики
-        grammar_errors = check_grammar(doc, tokens)
+        try:
+            docs = list(self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process))
+        except Exception:
+            # Если пакетная обработка упала, разбираем документы по одному
+            docs = []
+            for text in texts:
+                try:
+                    docs.append(self.nlp(text))
+                except Exception as e:
+                    docs.append(e)
         
-        # Анализ грамматических конструкций
-        grammar_constructions = analyze_grammar_constructions(doc, tokens)
+        outcomes = []
+        for doc, (_, options), (_, offsets), checkpoint in zip(docs, items, prepared, checkpoints):
+            if isinstance(doc, Exception):
+                outcomes.append({"result": None, "error": str(doc)})
+                continue
+            try:
+                result = self._analyze_doc(doc, options, checkpoint)
+                self._map_offsets(result.get("tokens"), doc, offsets)
+                outcomes.append({"result": select_fields(result, options), "error": None})
+            except AnalysisInterrupted as e:
+                outcomes.append({"result": None, "error": str(e), "interrupted": e.reason})
+            except Exception as e:
+                outcomes.append({"result": None, "error": str(e)})
         
-        # Анализ вложенных предложных фраз
-        nested_prepositional_phrases = find_nested_prepositional_phrases(doc, tokens)
+        return outcomes
+    
+    def analyze_sentences(self, text: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Анализ фрагмента текста по предложениям, каждое - как отдельный документ:
+        идентификаторы токенов отсчитываются от начала предложения и не зависят
+        от правок в остальном тексте. Склейка полей text всех предложений
+        совпадает с фрагментом.
+        """
+        doc = self.nlp(text)
+        
+        items = []
+        for sent in doc.sents:
+            sent_doc = sent.as_doc()
+            record = {"text": sent.text}
+            record.update(self._analyze_doc(sent_doc, options, sections=SENTENCE_SECTIONS))
+            items.append({
+                "text": sent.text_with_ws,
+                "record": record,
+                "statistics": self._calculate_statistics(sent_doc, record["tokens"]),
+                "complexity": summarize_complexity(sent_doc, record["tokens"])
+            })
+        return items
+    
+    def analyze_stream(
+        self,
+        text: str,
+        options: Dict[str, Any],
+        emit: Callable[[Dict[str, Any]], None],
+        checkpoint: Optional[Callable[[str], None]] = None
+    ) -> None:
+        """
+        Анализ по предложениям: emit получает запись каждого предложения
+        (type=sentence), затем итоговую запись с показателями документа
+        (type=summary). Кроме документа spaCy в памяти держатся только
+        текущее предложение и агрегаты.
+        """
+        text, offsets = self._preprocess(text, options)
         
-        # Метрики синтаксической сложности
-        complexity_metrics = calculate_complexity_metrics(doc, tokens, dependency_tree)
+        if checkpoint:
+            checkpoint("parse")
+        doc = self.nlp(text)
         
-        return {
-            "tokens": tokens,
-            "sentences": sentences,
-            "dependency_tree": dependency_tree,
-            "statistics": statistics,
-            "grammar_errors": grammar_errors,
-            "grammar_constructions": grammar_constructions,
-            "nested_prepositional_phrases": nested_prepositional_phrases,
-            "complexity_metrics": complexity_metrics
+        skip = set(options.get("skip_sections") or ())
+        statistics = None
+        complexity = None
+        skipped = []
+        sentence_count = 0
+        
+        for index, sent in enumerate(doc.sents):
+            if checkpoint:
+                checkpoint("sentence")
+            record = self._analyze_sentence(sent, options)
+            skipped = record.pop("skipped_sections", skipped)
+            self._map_offsets(record.get("tokens"), doc, offsets)
+            
+            statistics = merge_statistics(statistics, self._calculate_statistics(sent, record["tokens"]))
+            if "complexity_metrics" not in skip:
+                complexity = merge_complexity_summaries(complexity, summarize_complexity(sent, record["tokens"]))
+            
+            emit({"type": "sentence", "index": index, **record})
+            sentence_count += 1
+        
+        summary = {
+            "type": "summary",
+            "sentence_count": sentence_count,
+            "statistics": statistics or self._calculate_statistics(doc, [])
+        }
+        if "complexity_metrics" in skip:
+            skipped.append("complexity_metrics")
+        else:
+            summary["complexity_metrics"] = complexity_metrics_from_summary(complexity)
+        if skipped:
+            summary["skipped_sections"] = skipped
+        if doc._.forced_sentence_splits:
+            summary["forced_sentence_splits"] = doc._.forced_sentence_splits
+        emit(summary)
+    
+    def _analyze_sentence(self, sent, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Разделы одного предложения; идентификаторы токенов - позиции в документе
+        """
+        record = {
+            "start": sent.start,
+            "end": sent.end,
+            "text": sent.text
         }
+        record.update(self._analyze_doc(sent, options, sections=SENTENCE_SECTIONS))
+        return record
+    
+    def _preprocess(self, text: str, options: Dict[str, Any]) -> Tuple[str, Optional[OffsetMap]]:
+        """
+        Ограничение длины и очистка разметки (options["markup"]): возвращает
+        текст для разбора и соответствие его позиций исходному тексту
+        """
+        text = self._prepare_text(text, options)
+        if not options.get("markup"):
+            return text, None
+        return strip_markup(text, options["markup"])
+    
+    def _map_offsets(self, tokens: Optional[List[Dict[str, Any]]], doc, offsets: Optional[OffsetMap]) -> None:
+        """
+        Позиции токенов в исходном тексте с разметкой (start_char, end_char)
+        """
+        if offsets is None or not tokens:
+            return
+        for token_data in tokens:
+            token = doc[token_data["id"]]
+            token_data["start_char"] = offsets.start(token.idx)
+            token_data["end_char"] = offsets.end(token.idx + len(token))
+    
+    def _prepare_text(self, text: str, options: Dict[str, Any]) -> str:
+        """
+        Ограничение длины текста
+        """
+        max_length = options.get("max_length", 10000)
+        if len(text) > max_length:
+            text = text[:max_length]
+        return text
+    
+    def _analyze_doc(
+        self,
+        doc,
+        options: Dict[str, Any],
+        checkpoint: Optional[Callable[[str], None]] = None,
+        sections: Optional[Tuple[str, ...]] = None
+    ) -> Dict[str, Any]:
+        """
+        Анализ уже разобранного spaCy документа или его части (Span).
+        sections ограничивает вычисляемые разделы; если он не задан, вычисляются
+        разделы из options["sections"] и те, от которых они зависят.
+        Если анализ прерван по дедлайну и задан options["partial_results"],
+        возвращаются уже вычисленные разделы с флагом partial.
+        Разделы из options["skip_sections"] не вычисляются и перечисляются
+        в skipped_sections. При options["output"] == "conllu" этапы анализа
+        не выполняются: результат - разбор документа в CoNLL-U.
+        """
+        if options.get("output") == "conllu":
+            return {"conllu": doc_to_conllu(doc)}
+        
+        if sections is None:
+            requested = requested_sections(options)
+            if requested is not None and any(section in SECTION_TOKEN_FIELDS for section in requested):
+                requested += ("tokens",)
+            sections = requested
+            fields = token_fields(options)
+            if fields is not None:
+                options = {**options, "compute_token_fields": fields}
+        
+        skip = set(options.get("skip_sections") or ())
+        skipped = []
+        if "morphology" in skip and options.get("include_morphology", True):
+            skipped.append("morphology")
+        
+        result = {}
+        try:
+            for section, stage in self._pipeline():
+                if sections is not None and section not in sections:
+                    continue
+                if section in skip and section in OPTIONAL_SECTIONS:
+                    skipped.append(section)
+                    continue
+                if checkpoint:
+                    checkpoint(section)
+                result[section] = stage(doc, options, result)
+        except AnalysisInterrupted as e:
+            if e.reason != "deadline" or not options.get("partial_results") or not result:
+                raise
+            result["partial"] = True
+        
+        if skipped:
+            result["skipped_sections"] = skipped
+        if isinstance(doc, Doc) and doc._.forced_sentence_splits:
+            result["forced_sentence_splits"] = doc._.forced_sentence_splits
+        
+        return result
+    
+    def _pipeline(self) -> List[Tuple[str, Callable]]:
+        """
+        Этапы анализа после разбора: раздел ответа и функция, вычисляющая его
+        по документу, опциям и уже вычисленным разделам
+        """
+        return [
+            # Извлечение токенов
+            ("tokens", lambda doc, options, result: self._extract_tokens(doc, options)),
+            # Извлечение предложений
+            ("sentences", lambda doc, options, result: self._extract_sentences(doc)),
+            # Построение дерева зависимостей
+            ("dependency_tree", lambda doc, options, result: self._build_dependency_tree(doc)),
+            # Дополнительная статистика для версии 1.1.0
+            ("statistics", lambda doc, options, result: self._calculate_statistics(doc, result["tokens"])),
+            # Проверка грамматики
+            ("grammar_errors", lambda doc, options, result: check_grammar(doc, result["tokens"], self._normalized(options, result))),
+            # Анализ грамматических конструкций
+            ("grammar_constructions", lambda doc, options, result: analyze_grammar_constructions(doc, result["tokens"], self._normalized(options, result))),
+            # Анализ вложенных предложных фраз
+            ("nested_prepositional_phrases", lambda doc, options, result: find_nested_prepositional_phrases(doc, result["tokens"], self._normalized(options, result))),
+            # Метрики синтаксической сложности
+            ("complexity_metrics", lambda doc, options, result: calculate_complexity_metrics(doc, result["tokens"], result.get("dependency_tree")))
+        ]
+    
+    def _normalized(self, options: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        """
+        Ссылаться на предложения номерами (options["normalized"]); только если
+        в результате есть раздел sentences, поэтому записи предложений потока
+        и сессий правки сохраняют текст
+        """
+        return bool(options.get("normalized")) and "sentences" in result
     
     def _extract_tokens(self, doc, options: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        Извлечение токенов с POS-тегами и зависимостями
+        Извлечение токенов с POS-тегами и зависимостями.
+        doc может быть частью документа; анализаторы токенов получают весь документ.
+        Если задан options["compute_token_fields"], вычисляются только эти поля.
         """
         tokens = []
-        include_morphology = options.get("include_morphology", True)
+        fields = set(options.get("compute_token_fields") or TOKEN_FIELDS)
+        include_morphology = (
+            options.get("include_morphology", True)
+            and "morphology" not in (options.get("skip_sections") or ())
+            and "morphology" in fields
+        )
         
-        for i, token in enumerate(doc):
+        for token in doc:
             # Морфология
             morphology = None
             if include_morphology and token.morph:
@@ -105,35 +561,37 @@ class TextAnalyzer:
             }
             
             # Грамматические характеристики (для глаголов)
-            grammar = analyze_grammar(token, doc)
+            grammar = None
+            if "grammar" in fields:
+                grammar = analyze_grammar(token, token.doc)
             
             # Расширенный анализ глаголов
             verb_type = None
-            if token.pos_ == "VERB":
-                verb_type = analyze_verb_type(token, doc)
+            if token.pos_ == "VERB" and "verb_type" in fields:
+                verb_type = analyze_verb_type(token, token.doc)
             
             # Анализ причастий
             participle = None
-            if token.tag_ in ["VBG", "VBN"]:
-                participle = analyze_participle(token, doc)
+            if token.tag_ in ["VBG", "VBN"] and "participle" in fields:
+                participle = analyze_participle(token, token.doc)
             
             # Классификация наречий
             adverb_classification = None
-            if token.pos_ == "ADV":
-                adverb_classification = classify_adverb(token, doc)
+            if token.pos_ == "ADV" and "adverb_classification" in fields:
+                adverb_classification = classify_adverb(token, token.doc)
             
             # Анализ прилагательных
             adjective_analysis = None
-            if token.pos_ == "ADJ":
-                adjective_analysis = analyze_adjective(token, doc)
+            if token.pos_ == "ADJ" and "adjective_analysis" in fields:
+                adjective_analysis = analyze_adjective(token, token.doc)
             
             # Анализ предлогов
             preposition_analysis = None
-            if token.pos_ == "ADP":
-                preposition_analysis = analyze_preposition(token, doc)
+            if token.pos_ == "ADP" and "preposition_analysis" in fields:
+                preposition_analysis = analyze_preposition(token, token.doc)
             
             token_data = {
-                "id": i,
+                "id": token.i,
                 "text": token.text,
                 "lemma": token.lemma_,
                 "pos": token.pos_,
@@ -147,6 +605,8 @@ class TextAnalyzer:
                 "adjective_analysis": adjective_analysis,
                 "preposition_analysis": preposition_analysis
             }
+            if len(fields) < len(TOKEN_FIELDS):
+                token_data = {field: value for field, value in token_data.items() if field in fields}
             
             tokens.append(token_data)
         
@@ -1,11 +1,34 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, ClassVar, Literal, Union
 
 
 class AnalysisOptions(BaseModel):
     include_morphology: bool = True
     include_entities: bool = False
     max_length: int = 10000
+    # Время на анализ в миллисекундах; анализ останавливается между этапами
+    deadline_ms: Optional[int] = Field(None, gt=0)
+    # Вернуть уже вычисленные разделы (partial=true), если дедлайн истек
+    partial_results: bool = False
+    # Длинный документ: текст не обрезается по max_length, части анализируются параллельно
+    long_document: bool = False
+    # Разметка текста: перед разбором удаляется, позиции токенов указываются в исходном тексте
+    markup: Optional[Literal["html", "markdown"]] = None
+    # Сохранить результат на сервере и вернуть ResultHandle вместо полного ответа
+    store_result: bool = False
+    # Сохранить результат как версию; в ответе появляется поле version
+    versioned: bool = False
+    # Версия предыдущего результата: ответ содержит только разницу с ней (AnalysisDelta)
+    base_version: Optional[str] = None
+    # Формат полного ответа: columnar - токены параллельными массивами (ColumnarAnalysisResponse)
+    format: Literal["objects", "columnar"] = "objects"
+    # Разделы ответа через запятую (summary - statistics и complexity_metrics); по умолчанию все
+    sections: Optional[str] = None
+    # Поля токенов через запятую (id есть всегда); по умолчанию все
+    token_fields: Optional[str] = None
+    # Конструкции, ошибки и предложные фразы ссылаются на предложение номером
+    # в sentences (sentence_index) вместо текста
+    normalized: bool = False
 
 
 class AnalysisRequest(BaseModel):
@@ -78,19 +101,24 @@ class PrepositionAnalysis(BaseModel):
 
 
 class Token(BaseModel):
+    # Кроме id, поля могут отсутствовать, если заданы options.token_fields
+    sparse_fields: ClassVar[bool] = True
     id: int
-    text: str
-    lemma: str
-    pos: str
-    tag: str
+    text: Optional[str] = None
+    lemma: Optional[str] = None
+    pos: Optional[str] = None
+    tag: Optional[str] = None
     morphology: Optional[Dict[str, Any]] = None
-    dependency: Dependency
+    dependency: Optional[Dependency] = None
     grammar: Optional[Grammar] = None
     verb_type: Optional[VerbType] = None
     participle: Optional[Participle] = None
     adverb_classification: Optional[AdverbClassification] = None
     adjective_analysis: Optional[AdjectiveAnalysis] = None
     preposition_analysis: Optional[PrepositionAnalysis] = None
+    # Позиции токена в исходном тексте, если задана options.markup
+    start_char: Optional[int] = None
+    end_char: Optional[int] = None
 
 
 class Sentence(BaseModel):
@@ -125,6 +153,7 @@ class GrammarError(BaseModel):
     token_id: Optional[int] = None
     subject_id: Optional[int] = None
     sentence: Optional[str] = None
+    sentence_index: Optional[int] = None
     suggestion: Optional[str] = None
 
 
@@ -147,7 +176,8 @@ class GrammarConstruction(BaseModel):
     reporting_verb: Optional[str] = None
     verb: Optional[str] = None
     verb_id: Optional[int] = None
-    sentence: str
+    sentence: Optional[str] = None
+    sentence_index: Optional[int] = None
     sentence_start: int
     sentence_end: int
 
@@ -157,7 +187,8 @@ class NestedPrepositionalPhrase(BaseModel):
     outer_object: str
     inner_preposition: str
     inner_object: Optional[str] = None
-    sentence: str
+    sentence: Optional[str] = None
+    sentence_index: Optional[int] = None
 
 
 class ComplexityMetrics(BaseModel):
@@ -173,13 +204,175 @@ class ComplexityMetrics(BaseModel):
     character_count: int
 
 
+class LanguageCheck(BaseModel):
+    # Оценка того, что текст английский (0..1), и предполагаемый язык:
+    # код языка, non_latin или garbage; None - текста мало для решения
+    english_score: float
+    language: Optional[str] = None
+    is_english: bool
+
+
 class AnalysisResponse(BaseModel):
-    tokens: List[Token]
-    sentences: List[Sentence]
-    dependency_tree: DependencyTree
+    # Разделы могут отсутствовать только в частичном результате (partial=true)
+    tokens: Optional[List[Token]] = None
+    sentences: Optional[List[Sentence]] = None
+    dependency_tree: Optional[DependencyTree] = None
     statistics: Optional[Statistics] = None
     grammar_errors: Optional[List[GrammarError]] = None
     grammar_constructions: Optional[List[GrammarConstruction]] = None
     nested_prepositional_phrases: Optional[List[NestedPrepositionalPhrase]] = None
     complexity_metrics: Optional[ComplexityMetrics] = None
+    partial: bool = False
+    # Необязательные этапы, пропущенные из-за нагрузки или отключенные администратором
+    skipped_sections: List[str] = []
+    # Количество границ предложений, добавленных в сегментах длиннее NLP_MAX_SENTENCE_TOKENS токенов
+    forced_sentence_splits: int = 0
+    # Версия результата (options.versioned или options.base_version)
+    version: Optional[str] = None
+    # Проверка языка текста перед анализом (NLP_LANGUAGE_FILTER)
+    language_check: Optional[LanguageCheck] = None
+
+
+class ColumnarTokens(BaseModel):
+    # Массивы полей, не выбранных в options.token_fields, отсутствуют
+    sparse_fields: ClassVar[bool] = True
+    count: int
+    text: Optional[List[str]] = None
+    lemma: Optional[List[str]] = None
+    # Номера строк в ColumnarAnalysisResponse.labels
+    pos: Optional[List[int]] = None
+    tag: Optional[List[int]] = None
+    dep: Optional[List[int]] = None
+    # Номер вершины зависимости; -1 у корня предложения
+    head: Optional[List[int]] = None
+    # Анализы по номеру токена, только для токенов, у которых они есть
+    morphology: Optional[Dict[int, Dict[str, Any]]] = None
+    grammar: Optional[Dict[int, Grammar]] = None
+    verb_type: Optional[Dict[int, VerbType]] = None
+    participle: Optional[Dict[int, Participle]] = None
+    adverb_classification: Optional[Dict[int, AdverbClassification]] = None
+    adjective_analysis: Optional[Dict[int, AdjectiveAnalysis]] = None
+    preposition_analysis: Optional[Dict[int, PrepositionAnalysis]] = None
+    start_char: Optional[List[int]] = None
+    end_char: Optional[List[int]] = None
+
+
+class ColumnarDependencyTree(BaseModel):
+    # Вершины и ребра задаются массивами head и dep токенов, а если они
+    # не выбраны в options.token_fields - списками nodes и edges
+    root: int
+    nodes: Optional[List[DependencyNode]] = None
+    edges: Optional[List[DependencyEdge]] = None
+
+
+class ColumnarAnalysisResponse(BaseModel):
+    format: Literal["columnar"] = "columnar"
+    # Таблица меток POS, тегов и зависимостей
+    labels: List[str] = []
+    tokens: Optional[ColumnarTokens] = None
+    sentences: Optional[List[Sentence]] = None
+    dependency_tree: Optional[ColumnarDependencyTree] = None
+    statistics: Optional[Statistics] = None
+    grammar_errors: Optional[List[GrammarError]] = None
+    grammar_constructions: Optional[List[GrammarConstruction]] = None
+    nested_prepositional_phrases: Optional[List[NestedPrepositionalPhrase]] = None
+    complexity_metrics: Optional[ComplexityMetrics] = None
+    partial: bool = False
+    skipped_sections: List[str] = []
+    forced_sentence_splits: int = 0
+    version: Optional[str] = None
+    language_check: Optional[LanguageCheck] = None
+
+
+class ListPatch(BaseModel):
+    # Элементы [start, start + deleted) заменяются на items
+    start: int
+    deleted: int
+    items: List[Dict[str, Any]]
+
+
+class AnalysisDelta(BaseModel):
+    version: str
+    base_version: str
+    # Сдвиг номеров токенов в элементах после замененного участка
+    shift: int
+    tokens: Optional[ListPatch] = None
+    sentences: Optional[ListPatch] = None
+    dependency_nodes: Optional[ListPatch] = None
+    dependency_edges: Optional[ListPatch] = None
+    dependency_root: Optional[int] = None
+    grammar_errors: Optional[ListPatch] = None
+    grammar_constructions: Optional[ListPatch] = None
+    nested_prepositional_phrases: Optional[ListPatch] = None
+    # Присутствуют, только если изменились
+    statistics: Optional[Statistics] = None
+    complexity_metrics: Optional[ComplexityMetrics] = None
+    partial: bool = False
+    skipped_sections: List[str] = []
+    forced_sentence_splits: int = 0
+    language_check: Optional[LanguageCheck] = None
+
+
+class ResultHandle(BaseModel):
+    result_id: str
+    expires_at: float
+    # Количество элементов разделов, доступных через GET /results/{result_id}/{section}
+    totals: Dict[str, int]
+    sentences: Optional[List[Sentence]] = None
+    statistics: Optional[Statistics] = None
+    complexity_metrics: Optional[ComplexityMetrics] = None
+    partial: bool = False
+    skipped_sections: List[str] = []
+    forced_sentence_splits: int = 0
+    language_check: Optional[LanguageCheck] = None
+
+
+class ResultPage(BaseModel):
+    result_id: str
+    section: str
+    offset: int
+    limit: int
+    total: int
+    items: List[Dict[str, Any]]
+
+
+class BatchAnalysisItem(BaseModel):
+    # Ограничения AnalysisRequest проверяются для каждого элемента отдельно,
+    # чтобы один некорректный документ не отклонял весь пакет
+    text: str
+    options: Optional[AnalysisOptions] = AnalysisOptions()
+
+
+class BatchAnalysisRequest(BaseModel):
+    items: List[BatchAnalysisItem] = Field(..., min_length=1, max_length=1000)
+    batch_size: Optional[int] = Field(None, ge=1, le=1000)
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[Union[AnalysisResponse, ColumnarAnalysisResponse]] = None
+    error: Optional[str] = None
+
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[BatchItemResult]
+
+
+class JobCreated(BaseModel):
+    job_id: str
+    status: str
+    language_check: Optional[LanguageCheck] = None
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed, expired
+    created_at: float
+    finished_at: Optional[float] = None
+    result: Optional[Union[AnalysisResponse, ColumnarAnalysisResponse]] = None
+    error: Optional[str] = None
+
 
+class StageSwitches(BaseModel):
+    # Необязательные этапы, отключенные администратором
+    disabled: List[str]
@@ -0,0 +1,120 @@
+"""
+Контроль допуска запросов по оценке стоимости выполняемой работы
+"""
+import math
+import time
+from collections import deque
+from typing import Any, Dict
+
+
+class Overloaded(Exception):
+    """
+    Бюджет выполняемой работы исчерпан
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Service overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    """
+    Допущенная работа; освобождает бюджет при выходе из контекста
+    """
+
+    def __init__(self, controller: "AdmissionController", cost: int):
+        self._controller = controller
+        self.cost = cost
+        self._released = False
+
+    def __enter__(self) -> "_Ticket":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """
+        Освобождает бюджет; для работы, которая продолжается после выхода из обработчика
+        """
+        if not self._released:
+            self._released = True
+            self._controller._release(self.cost)
+
+
+class AdmissionController:
+    """
+    Ограничивает суммарную стоимость одновременно выполняемой работы.
+    Стоимость запроса - количество анализируемых символов плюс фиксированные
+    накладные расходы. Когда бюджет исчерпан, новый запрос сразу отклоняется
+    с оценкой времени, за которое очередь освободит нужный объем.
+    """
+
+    def __init__(
+        self,
+        max_cost: int,
+        request_overhead: int = 200,
+        default_drain_rate: float = 20000.0,
+        max_retry_after: int = 60,
+        window_seconds: float = 30.0
+    ):
+        self.max_cost = max_cost
+        self.request_overhead = request_overhead
+        self.default_drain_rate = default_drain_rate
+        self.max_retry_after = max_retry_after
+        self.window_seconds = window_seconds
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        # (время завершения, стоимость) для оценки скорости разгрузки
+        self._completed = deque()
+
+    def estimate_cost(self, text_length: int) -> int:
+        return text_length + self.request_overhead
+
+    def admit(self, cost: int) -> _Ticket:
+        """
+        Резервирует бюджет под работу или выбрасывает Overloaded
+        """
+        # Работа дороже всего бюджета допускается только на пустой сервис,
+        # иначе она никогда не будет выполнена
+        if self.in_flight and self.in_flight + cost > self.max_cost:
+            self.rejected += 1
+            raise Overloaded(self.retry_after(self.in_flight + cost - self.max_cost))
+
+        self.in_flight += cost
+        self.admitted += 1
+        return _Ticket(self, cost)
+
+    def _release(self, cost: int) -> None:
+        self.in_flight -= cost
+        self._completed.append((time.monotonic(), cost))
+
+    def drain_rate(self) -> float:
+        """
+        Скорость разгрузки (стоимость в секунду) за последнее окно
+        """
+        now = time.monotonic()
+        while self._completed and now - self._completed[0][0] > self.window_seconds:
+            self._completed.popleft()
+        if len(self._completed) < 2:
+            return self.default_drain_rate
+
+        elapsed = max(now - self._completed[0][0], 1.0)
+        return sum(cost for _, cost in self._completed) / elapsed
+
+    def retry_after(self, excess_cost: int) -> int:
+        """
+        Время (секунды), за которое при текущей скорости разгрузится excess_cost
+        """
+        seconds = math.ceil(excess_cost / self.drain_rate())
+        return max(1, min(self.max_retry_after, seconds))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_cost": self.max_cost,
+            "in_flight_cost": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "drain_rate": round(self.drain_rate(), 1)
+        }
@@ -0,0 +1,111 @@
+"""
+Колоночный формат ответа (options.format=columnar): токены - параллельные
+массивы, метки POS, тегов и зависимостей - номера в общей таблице строк
+"""
+from typing import Any, Dict, List
+
+# Анализы отдельных токенов; в колоночном формате хранятся только заданные,
+# по номеру токена
+TOKEN_ANALYSES = (
+    "morphology", "grammar", "verb_type", "participle",
+    "adverb_classification", "adjective_analysis", "preposition_analysis"
+)
+
+
+def to_columnar(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Результат анализа в колоночном формате. Дерево зависимостей не повторяет
+    токены: в нем остается только корень, вершины и ребра задаются
+    массивами head и dep (head корня предложения равен -1). Если поле
+    dependency не выбрано в options.token_fields, дерево остается полным.
+    """
+    tokens = result.get("tokens")
+    if tokens is None:
+        return result
+
+    labels: List[str] = []
+    numbers: Dict[str, int] = {}
+
+    def intern(label: str) -> int:
+        number = numbers.get(label)
+        if number is None:
+            number = numbers[label] = len(labels)
+            labels.append(label)
+        return number
+
+    # Поля, выбранные options.token_fields, одинаковы у всех токенов
+    present = tokens[0].keys() if tokens else ()
+    columns: Dict[str, Any] = {"count": len(tokens)}
+    for name in ("text", "lemma", "start_char", "end_char"):
+        if name in present:
+            columns[name] = [token[name] for token in tokens]
+    for name in ("pos", "tag"):
+        if name in present:
+            columns[name] = [intern(token[name]) for token in tokens]
+    if "dependency" in present:
+        columns["dep"] = [intern(token["dependency"]["dep"]) for token in tokens]
+        columns["head"] = [
+            -1 if token["dependency"]["head"] is None else token["dependency"]["head"]
+            for token in tokens
+        ]
+    for name in TOKEN_ANALYSES:
+        if name in present:
+            columns[name] = {index: token[name] for index, token in enumerate(tokens) if token[name] is not None}
+
+    columnar = {**result, "format": "columnar", "labels": labels, "tokens": columns}
+    if result.get("dependency_tree") is not None and "head" in columns:
+        columnar["dependency_tree"] = {"root": result["dependency_tree"]["root"]}
+    return columnar
+
+
+def from_columnar(columnar: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Обратное преобразование в обычный формат (для клиентов на Python и тестов)
+    """
+    columns = columnar.get("tokens")
+    if columns is None:
+        return columnar
+
+    labels = columnar["labels"]
+    tokens = []
+    for index in range(columns["count"]):
+        token: Dict[str, Any] = {"id": index}
+        for name in ("text", "lemma"):
+            if columns.get(name) is not None:
+                token[name] = columns[name][index]
+        for name in ("pos", "tag"):
+            if columns.get(name) is not None:
+                token[name] = labels[columns[name][index]]
+        if columns.get("head") is not None:
+            head = columns["head"][index]
+            token["dependency"] = {
+                "dep": labels[columns["dep"][index]],
+                "head": None if head < 0 else head,
+                "head_text": None if head < 0 or columns.get("text") is None else columns["text"][head]
+            }
+        for name in TOKEN_ANALYSES:
+            if columns.get(name) is not None:
+                # После JSON номера токенов в ключах становятся строками
+                analyses = columns[name]
+                token[name] = analyses.get(index, analyses.get(str(index)))
+        for name in ("start_char", "end_char"):
+            if columns.get(name) is not None:
+                token[name] = columns[name][index]
+        tokens.append(token)
+
+    result = {name: value for name, value in columnar.items() if name not in ("format", "labels")}
+    result["tokens"] = tokens
+    tree = columnar.get("dependency_tree")
+    if tree is not None and tree.get("nodes") is None and columns.get("head") is not None:
+        result["dependency_tree"] = {
+            "root": columnar["dependency_tree"]["root"],
+            "nodes": [
+                {"id": token["id"], "text": token["text"], "pos": token["pos"], "dep": token["dependency"]["dep"]}
+                for token in tokens
+            ],
+            "edges": [
+                {"source": token["id"], "target": token["dependency"]["head"], "relation": token["dependency"]["dep"]}
+                for token in tokens if token["dependency"]["head"] is not None
+            ]
+        }
+    return result
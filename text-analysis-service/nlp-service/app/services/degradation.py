@@ -0,0 +1,64 @@
+"""
+Облегченный анализ под нагрузкой и аварийное отключение этапов
+"""
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Set
+
+
+class Degradation:
+    """
+    Определяет необязательные этапы анализа, которые нужно пропустить.
+    Этап пропускается, если он отключен вручную или если время ожидания
+    в очереди (перцентиль за последнее окно) превышает его порог.
+    """
+
+    def __init__(
+        self,
+        thresholds: Dict[str, float],
+        window_seconds: float = 10.0,
+        percentile: float = 0.9
+    ):
+        # Порог ожидания в секундах для каждого этапа
+        self.thresholds = thresholds
+        self.window_seconds = window_seconds
+        self.percentile = percentile
+        self.disabled: Set[str] = set()
+        self.degraded_requests = 0
+        # (время наблюдения, ожидание в очереди)
+        self._waits = deque()
+
+    def observe(self, wait: float) -> None:
+        """
+        Учитывает время ожидания запроса в очереди (секунды)
+        """
+        self._waits.append((time.monotonic(), wait))
+
+    def queue_wait(self) -> float:
+        now = time.monotonic()
+        while self._waits and now - self._waits[0][0] > self.window_seconds:
+            self._waits.popleft()
+        if not self._waits:
+            return 0.0
+
+        waits = sorted(wait for _, wait in self._waits)
+        return waits[min(len(waits) - 1, int(len(waits) * self.percentile))]
+
+    def skipped_sections(self) -> List[str]:
+        wait = self.queue_wait()
+        degraded = {section for section, threshold in self.thresholds.items() if wait > threshold}
+        if degraded - self.disabled:
+            self.degraded_requests += 1
+        return sorted(degraded | self.disabled)
+
+    def set_disabled(self, sections: Iterable[str]) -> None:
+        self.disabled = set(sections)
+
+    def stats(self) -> Dict[str, Any]:
+        wait = self.queue_wait()
+        return {
+            "queue_wait_ms": round(wait * 1000, 1),
+            "disabled": sorted(self.disabled),
+            "degraded": sorted(section for section, threshold in self.thresholds.items() if wait > threshold),
+            "degraded_requests": self.degraded_requests
+        }
@@ -0,0 +1,172 @@
+"""
+Сессии инкрементального анализа редактируемого текста
+"""
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.analyzer import merge_statistics
+from ..utils.complexity_analyzer import merge_complexity_summaries, complexity_metrics_from_summary
+
+
+class _Sentence:
+    def __init__(self, item: Dict[str, Any]):
+        self.text = item["text"]
+        self.record = item["record"]
+        self.statistics = item["statistics"]
+        self.complexity = item["complexity"]
+        self.size = len(self.text) + len(json.dumps(self.record))
+
+
+class EditSession:
+    """
+    Состояние анализа одного редактируемого текста: предложения с результатами
+    анализа и их вклад в показатели документа. Правка заменяет только
+    измененные предложения, показатели документа собираются из сохраненных
+    вкладов предложений без повторного анализа.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.options: Dict[str, Any] = {}
+        self.version = 0
+        self.last_used = time.monotonic()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Сбрасывает результаты анализа; следующая правка анализирует весь текст
+        """
+        self.sentences: List[_Sentence] = []
+        self.size = 0
+        self._reset = True
+        self._statistics = None
+        self._complexity_metrics = None
+
+    def plan(self, text: str) -> Optional[Tuple[int, int, str]]:
+        """
+        Предложения [first, last), которые нужно заменить анализом фрагмента text.
+        Возвращает None, если текст не изменился.
+        """
+        old = [sentence.text for sentence in self.sentences]
+        if not self._reset and "".join(old) == text:
+            return None
+
+        # Общие начальные и конечные предложения
+        first, start = 0, 0
+        while first < len(old) and text.startswith(old[first], start):
+            start += len(old[first])
+            first += 1
+        last, end = len(old), len(text)
+        while last > first and end - len(old[last - 1]) >= start and text.endswith(old[last - 1], start, end):
+            end -= len(old[last - 1])
+            last -= 1
+
+        # Правка на границе может объединить или разделить соседние предложения,
+        # поэтому соседи анализируются заново вместе с измененным фрагментом
+        if first > 0:
+            first -= 1
+            start -= len(old[first])
+        if last < len(old):
+            end += len(old[last])
+            last += 1
+
+        return first, last, text[start:end]
+
+    def apply(self, first: int, last: int, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Заменяет предложения [first, last) результатами анализа фрагмента
+        и возвращает сообщение с изменениями для клиента
+        """
+        inserted = [_Sentence(item) for item in items]
+        self.sentences[first:last] = inserted
+        self.size = sum(sentence.size for sentence in self.sentences)
+        self.version += 1
+
+        update = {
+            "type": "update",
+            "version": self.version,
+            "start": first,
+            "deleted": last - first,
+            "sentences": [sentence.record for sentence in inserted],
+            "sentence_count": len(self.sentences)
+        }
+        if self._reset:
+            # Клиент заменяет все ранее полученные предложения
+            update["reset"] = True
+            self._reset = False
+
+        statistics, complexity_metrics = self._aggregate()
+        if statistics != self._statistics:
+            update["statistics"] = self._statistics = statistics
+        if complexity_metrics != self._complexity_metrics:
+            update["complexity_metrics"] = self._complexity_metrics = complexity_metrics
+
+        return update
+
+    def _aggregate(self) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        statistics = None
+        complexity = None
+        for sentence in self.sentences:
+            statistics = merge_statistics(statistics, sentence.statistics)
+            complexity = merge_complexity_summaries(complexity, sentence.complexity)
+        return statistics, complexity_metrics_from_summary(complexity)
+
+
+class EditSessions:
+    """
+    Открытые сессии редактирования. Когда результаты анализа всех сессий
+    превышают max_bytes, или сессия простаивает дольше idle_timeout секунд,
+    ее результаты удаляются: соединение остается открытым, а следующая
+    правка анализирует текст заново.
+    """
+
+    def __init__(self, max_bytes: int, idle_timeout: float):
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.evicted = 0
+        # Сессии в порядке последнего использования
+        self._sessions: "OrderedDict[str, EditSession]" = OrderedDict()
+
+    def open(self) -> EditSession:
+        session = EditSession(uuid.uuid4().hex)
+        self._sessions[session.session_id] = session
+        return session
+
+    def close(self, session: EditSession) -> None:
+        self._sessions.pop(session.session_id, None)
+
+    def touch(self, session: EditSession) -> None:
+        """
+        Отмечает использование сессии и освобождает память простаивающих сессий
+        """
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session.session_id)
+
+        for other in list(self._sessions.values()):
+            if other is not session and other.sentences and session.last_used - other.last_used > self.idle_timeout:
+                self._evict(other)
+
+        for other in list(self._sessions.values()):
+            if self.size <= self.max_bytes:
+                break
+            if other is not session and other.sentences:
+                self._evict(other)
+
+    def _evict(self, session: EditSession) -> None:
+        session.reset()
+        self.evicted += 1
+
+    @property
+    def size(self) -> int:
+        return sum(session.size for session in self._sessions.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evicted": self.evicted
+        }
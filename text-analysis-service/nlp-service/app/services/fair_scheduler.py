@@ -0,0 +1,278 @@
+"""
+Справедливое распределение мощности сервиса между клиентами
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+
+def interactive_reservation(capacity: int, workers: int) -> int:
+    """
+    Слоты, недоступные фоновой полосе: фоновые запросы занимают не больше
+    рабочих процессов, чем их есть, без четверти (но хотя бы один). Иначе они
+    ждут в очереди пула процессов впереди пришедших позже интерактивных.
+    С одним рабочим процессом фоновой полосе остается этот процесс: запущенный
+    фоновый анализ не вытесняется, интерактивный запрос ждет его завершения.
+    """
+    bulk_workers = max(1, workers - max(1, workers // 4))
+    return max(0, capacity - bulk_workers)
+
+
+class _ClientState:
+    def __init__(self, weight: float, chars_per_second: Optional[float]):
+        self.weight = weight
+        self.last_finish = 0.0
+        self.running = 0
+        self.queued = 0
+        self.served_chars = 0
+        self.chars_per_second = chars_per_second
+        # Token bucket для ограничения пропускной способности клиента
+        self.tokens = chars_per_second or 0.0
+        self.refilled_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if self.chars_per_second:
+            elapsed = now - self.refilled_at
+            self.tokens = min(self.chars_per_second, self.tokens + elapsed * self.chars_per_second)
+        self.refilled_at = now
+
+
+class _LaneState:
+    def __init__(self):
+        self.running = 0
+        self.queued = 0
+        self.dispatched = 0
+        # Время ожидания последних запросов (секунды)
+        self.waits = deque(maxlen=1000)
+
+    def wait_percentile(self, percentile: float) -> float:
+        if not self.waits:
+            return 0.0
+        waits = sorted(self.waits)
+        return waits[min(len(waits) - 1, int(len(waits) * percentile))]
+
+
+class _Entry:
+    def __init__(self, client_id: str, cost: int, lane: str, start_tag: float, seq: int, future: asyncio.Future):
+        self.client_id = client_id
+        self.cost = cost
+        self.lane = lane
+        self.start_tag = start_tag
+        self.seq = seq
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class FairScheduler:
+    """
+    Взвешенная справедливая очередь (start-time fair queuing).
+    Клиенты учитываются по количеству обработанных символов, а не запросов:
+    каждый запрос получает метку start = max(V, finish клиента), finish
+    клиента сдвигается на cost / weight, и следующим выполняется запрос
+    с наименьшей меткой start. Поэтому клиент с длинными текстами
+    не вытесняет клиентов с короткими.
+    
+    Запросы делятся на две полосы: interactive выбирается первой, а bulk
+    занимает не больше capacity - interactive_reserved слотов, поэтому
+    фоновая нагрузка использует только простаивающую мощность.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        client_concurrency: Optional[int] = None,
+        client_chars_per_second: Optional[float] = None,
+        weights: Optional[Dict[str, float]] = None,
+        interactive_reserved: int = 0
+    ):
+        self.capacity = capacity
+        # Хотя бы один слот остается для bulk, иначе полоса никогда не выполнится
+        self.interactive_reserved = max(0, min(interactive_reserved, capacity - 1))
+        self.client_concurrency = client_concurrency
+        self.client_chars_per_second = client_chars_per_second
+        self.weights = weights or {}
+        self.running = 0
+        self.virtual_time = 0.0
+        self._clients: Dict[str, _ClientState] = {}
+        self._lanes: Dict[str, _LaneState] = {lane: _LaneState() for lane in LANES}
+        self._queue: List[_Entry] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @asynccontextmanager
+    async def slot(self, client_id: str, cost: int, timeout: Optional[float] = None, lane: str = INTERACTIVE):
+        """
+        Ожидает очереди клиента в полосе lane (не дольше timeout секунд) и удерживает слот выполнения
+        """
+        entry = self._enqueue(client_id, cost, lane)
+        try:
+            await asyncio.wait_for(entry.future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if entry in self._queue:
+                self._withdraw(entry)
+            elif entry.future.done() and not entry.future.cancelled():
+                # Слот уже был выдан, но клиент отключился
+                self._release(entry)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(entry)
+
+    def _client(self, client_id: str) -> _ClientState:
+        state = self._clients.get(client_id)
+        if state is None:
+            state = _ClientState(self.weights.get(client_id, 1.0), self.client_chars_per_second)
+            self._clients[client_id] = state
+        return state
+
+    def _enqueue(self, client_id: str, cost: int, lane: str) -> _Entry:
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown lane: {lane}")
+        state = self._client(client_id)
+        start_tag = max(self.virtual_time, state.last_finish)
+        state.last_finish = start_tag + cost / state.weight
+        state.queued += 1
+        self._lanes[lane].queued += 1
+
+        entry = _Entry(client_id, cost, lane, start_tag, next(self._seq), asyncio.get_running_loop().create_future())
+        self._queue.append(entry)
+        self._dispatch()
+        return entry
+
+    def _withdraw(self, entry: _Entry) -> None:
+        """
+        Удаляет запрос, не дождавшийся слота (таймаут или отключение клиента),
+        и снимает начисленную ему стоимость: клиент не платит за невыполненную работу
+        """
+        self._queue.remove(entry)
+        state = self._clients[entry.client_id]
+        state.queued -= 1
+        self._lanes[entry.lane].queued -= 1
+        charge = entry.cost / state.weight
+        # Следующие запросы клиента получили метки с учетом удаленного
+        for other in self._queue:
+            if other.client_id == entry.client_id and other.start_tag > entry.start_tag:
+                other.start_tag = max(self.virtual_time, other.start_tag - charge)
+        state.last_finish -= charge
+        self._forget_idle_clients()
+
+    def _eligible(self, entry: _Entry, now: float) -> bool:
+        if entry.lane == BULK and self._lanes[BULK].running >= self.capacity - self.interactive_reserved:
+            return False
+        state = self._clients[entry.client_id]
+        if self.client_concurrency and state.running >= self.client_concurrency:
+            return False
+        if state.chars_per_second:
+            state.refill(now)
+            # Запрос дороже всего bucket допускается при полном bucket
+            if state.tokens < min(entry.cost, state.chars_per_second):
+                return False
+        return True
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self.running < self.capacity and self._queue:
+            # Ожидание, прерванное по таймауту, удаляется из очереди самим ожидающим
+            candidates = [
+                entry for entry in self._queue
+                if not entry.future.done() and self._eligible(entry, now)
+            ]
+            if not candidates:
+                self._schedule_refill_check()
+                return
+
+            # Внутри полосы порядок справедливый, interactive всегда впереди bulk
+            entry = min(candidates, key=lambda e: (e.lane != INTERACTIVE, e.start_tag, e.seq))
+            self._queue.remove(entry)
+            state = self._clients[entry.client_id]
+            state.queued -= 1
+            state.running += 1
+            lane = self._lanes[entry.lane]
+            lane.queued -= 1
+            lane.running += 1
+            lane.dispatched += 1
+            lane.waits.append(now - entry.enqueued_at)
+            if state.chars_per_second:
+                state.tokens -= entry.cost
+            self.running += 1
+            self.virtual_time = max(self.virtual_time, entry.start_tag)
+            entry.future.set_result(None)
+
+    def _schedule_refill_check(self) -> None:
+        """
+        Повторная попытка, когда клиенты упираются только в лимит пропускной способности
+        """
+        if self._timer is not None:
+            return
+        waits = []
+        for entry in self._queue:
+            state = self._clients[entry.client_id]
+            if entry.lane == BULK and self._lanes[BULK].running >= self.capacity - self.interactive_reserved:
+                continue
+            if state.chars_per_second and not (
+                self.client_concurrency and state.running >= self.client_concurrency
+            ):
+                missing = min(entry.cost, state.chars_per_second) - state.tokens
+                waits.append(max(missing, 0) / state.chars_per_second)
+        if waits:
+            self._timer = asyncio.get_running_loop().call_later(min(waits), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _release(self, entry: _Entry) -> None:
+        state = self._clients[entry.client_id]
+        state.running -= 1
+        state.served_chars += entry.cost
+        self._lanes[entry.lane].running -= 1
+        self.running -= 1
+        self._forget_idle_clients()
+        self._dispatch()
+
+    def _forget_idle_clients(self) -> None:
+        """
+        Удаляет состояние клиентов без работы и без накопленного отставания
+        """
+        for client_id in [
+            client_id for client_id, state in self._clients.items()
+            if not state.running and not state.queued
+            and state.last_finish <= self.virtual_time
+            and (not state.chars_per_second or state.tokens >= state.chars_per_second)
+        ]:
+            del self._clients[client_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "running": self.running,
+            "queued": len(self._queue),
+            "interactive_reserved": self.interactive_reserved,
+            "lanes": {
+                name: {
+                    "running": lane.running,
+                    "queued": lane.queued,
+                    "dispatched": lane.dispatched,
+                    "wait_p50_ms": round(lane.wait_percentile(0.5) * 1000, 1),
+                    "wait_p99_ms": round(lane.wait_percentile(0.99) * 1000, 1)
+                }
+                for name, lane in self._lanes.items()
+            },
+            "clients": {
+                client_id: {
+                    "running": state.running,
+                    "queued": state.queued,
+                    "served_chars": state.served_chars
+                }
+                for client_id, state in self._clients.items()
+            }
+        }
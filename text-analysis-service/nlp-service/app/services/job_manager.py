@@ -0,0 +1,180 @@
+"""
+Асинхронные задачи анализа: очередь, идемпотентность и хранение результатов
+"""
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from ..utils.json_encoding import dumps
+from .result_store import ResultStore
+
+logger = structlog.get_logger()
+
+
+class QueueFull(Exception):
+    """
+    Очередь задач заполнена
+    """
+
+
+class IdempotencyConflict(Exception):
+    """
+    Ключ идемпотентности уже использован для другого запроса
+    """
+
+
+class _Job:
+    def __init__(self, job_id: str, text: str, options: Dict[str, Any], client_id: str, fingerprint: str):
+        self.job_id = job_id
+        self.text = text
+        self.options = options
+        self.client_id = client_id
+        self.fingerprint = fingerprint
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.idempotency_key: Optional[Tuple[str, str]] = None
+
+
+class JobManager:
+    """
+    Ограниченная очередь задач анализа. Задачи выполняют concurrency
+    корутин-обработчиков; результаты хранятся в ResultStore (TTL и лимит
+    памяти), метаданные задачи удаляются по тому же TTL.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[str, Dict[str, Any], str], Awaitable[Dict[str, Any]]],
+        store: ResultStore,
+        concurrency: int,
+        max_queued: int
+    ):
+        self.runner = runner
+        self.store = store
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.queued_chars = 0
+        self.completed = 0
+        self.failed = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._jobs: Dict[str, _Job] = {}
+        self._idempotency: Dict[Tuple[str, str], str] = {}
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(
+        self,
+        text: str,
+        options: Dict[str, Any],
+        client_id: str,
+        idempotency_key: Optional[str] = None
+    ) -> Tuple[_Job, bool]:
+        """
+        Ставит задачу в очередь. Возвращает задачу и признак того, что она новая:
+        повторный запрос с тем же ключом идемпотентности получает прежнюю задачу
+        """
+        self._expire_jobs()
+        fingerprint = hashlib.sha256(
+            json.dumps([text, options], sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+        if idempotency_key:
+            existing = self._jobs.get(self._idempotency.get((client_id, idempotency_key)))
+            if existing is not None:
+                if existing.fingerprint != fingerprint:
+                    raise IdempotencyConflict(idempotency_key)
+                return existing, False
+
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFull()
+
+        job = _Job(uuid.uuid4().hex, text, options, client_id, fingerprint)
+        self._jobs[job.job_id] = job
+        if idempotency_key:
+            job.idempotency_key = (client_id, idempotency_key)
+            self._idempotency[job.idempotency_key] = job.job_id
+
+        self.queued_chars += len(text)
+        self._queue.put_nowait(job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[_Job]:
+        self._expire_jobs()
+        job = self._jobs.get(job_id)
+        if job is not None and job.status == "completed" and self.store.get(job_id) is None:
+            # Результат вытеснен из памяти раньше TTL
+            job.status = "expired"
+        return job
+
+    def result(self, job_id: str) -> Optional[bytes]:
+        """
+        Сериализованный результат; если он уже истек или вытеснен, задача
+        помечается expired
+        """
+        body = self.store.get(job_id)
+        job = self._jobs.get(job_id)
+        if body is None and job is not None and job.status == "completed":
+            job.status = "expired"
+        return body
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self.queued_chars -= len(job.text)
+            job.status = "running"
+            try:
+                result = await self.runner(job.text, job.options, job.client_id)
+                # Результат хранится сериализованным: размер известен точно
+                body = await asyncio.to_thread(dumps, result)
+                self.store.put(job.job_id, body, len(body))
+                job.status = "completed"
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Analysis job failed", job_id=job.job_id, error=str(e))
+                job.status = "failed"
+                job.error = str(e)
+                self.failed += 1
+            finally:
+                job.finished_at = time.time()
+                # Текст больше не нужен, освобождаем память
+                job.text = ""
+
+    def _expire_jobs(self) -> None:
+        now = time.time()
+        expired = [
+            job for job in self._jobs.values()
+            if job.finished_at is not None and now - job.finished_at > self.store.ttl_seconds
+        ]
+        for job in expired:
+            del self._jobs[job.job_id]
+            self.store.discard(job.job_id)
+            if job.idempotency_key:
+                self._idempotency.pop(job.idempotency_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire_jobs()
+        return {
+            "queued": self._queue.qsize(),
+            "queued_chars": self.queued_chars,
+            "jobs": len(self._jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "results": self.store.stats()
+        }
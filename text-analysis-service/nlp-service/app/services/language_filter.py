@@ -0,0 +1,70 @@
+"""
+Отсев неанглийского текста и мусора до разбора
+"""
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from ..utils.language_detector import detect_language, load_language_profiles
+
+LANGUAGE_FILTER_MODES = ("off", "flag", "reject")
+
+
+class LanguageFilter:
+    """
+    Проверяет язык текста перед анализом. В режиме flag результат проверки
+    добавляется к ответу, в режиме reject текст с оценкой ниже порога
+    не анализируется, в режиме off проверка не выполняется.
+    """
+
+    def __init__(self, mode: str = "flag", threshold: float = 0.3, window: int = 1000):
+        if mode not in LANGUAGE_FILTER_MODES:
+            raise ValueError(f"Unknown language filter mode: {mode}")
+        self.mode = mode
+        self.threshold = threshold
+        self.checked = 0
+        self.flagged = 0
+        self.rejected = 0
+        # Время последних проверок (секунды)
+        self._durations = deque(maxlen=window)
+
+    def warm_up(self) -> None:
+        if self.mode != "off":
+            load_language_profiles()
+
+    def check(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Результат проверки: english_score, language и is_english (оценка не ниже
+        порога). None, если проверка выключена.
+        """
+        if self.mode == "off":
+            return None
+
+        started = time.perf_counter()
+        detection = detect_language(text)
+        self._durations.append(time.perf_counter() - started)
+
+        self.checked += 1
+        is_english = detection["english_score"] >= self.threshold
+        if not is_english:
+            if self.rejects:
+                self.rejected += 1
+            else:
+                self.flagged += 1
+        return {**detection, "is_english": is_english}
+
+    @property
+    def rejects(self) -> bool:
+        return self.mode == "reject"
+
+    def stats(self) -> Dict[str, Any]:
+        durations = sorted(self._durations)
+        return {
+            "mode": self.mode,
+            "threshold": self.threshold,
+            "checked": self.checked,
+            "flagged": self.flagged,
+            "rejected": self.rejected,
+            "detect_ms_avg": round(sum(durations) / len(durations) * 1000, 3) if durations else 0.0,
+            "detect_ms_p99": round(durations[min(len(durations) - 1, int(len(durations) * 0.99))] * 1000, 3) if durations else 0.0
+        }
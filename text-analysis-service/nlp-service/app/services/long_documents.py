@@ -0,0 +1,148 @@
+"""
+Анализ длинных документов по частям: разбиение текста и объединение результатов
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from ..models.analyzer import merge_statistics
+from ..utils.complexity_analyzer import merge_complexity_summaries, complexity_metrics_from_summary
+from ..utils.grammar_checker import GRAMMAR_ERROR_TYPES
+from ..utils.grammar_constructions import CONSTRUCTION_TYPES
+from ..utils.parsed_input import append_conllu_spaces
+from .result_deltas import shift_references
+
+# Границы, на которых можно разрезать текст, в порядке предпочтения:
+# абзац, конец предложения, пробел; группа 1 - пробельные символы границы
+_BOUNDARIES = (
+    re.compile(r"\S(\s*\n[ \t]*\n\s*)"),
+    re.compile(r"[.!?][\"')\]]*(\s+)"),
+    re.compile(r"\S(\s+)")
+)
+
+
+def split_text(text: str, chunk_chars: int) -> List[str]:
+    """
+    Делит текст на части не длиннее chunk_chars символов по границам абзацев,
+    а если их нет - предложений. Части вместе в точности дают исходный текст.
+    """
+    chunks = []
+    start = 0
+    while len(text) - start > chunk_chars:
+        window = text[start:start + chunk_chars]
+        cut = None
+        for boundary in _BOUNDARIES:
+            # Граница ищется во второй половине окна, чтобы части не были слишком короткими
+            starts = [match.start(1) for match in boundary.finditer(window, chunk_chars // 2)]
+            if starts:
+                # Пробельные символы начинают следующую часть, как в разборе целого
+                # текста, кроме одного пробела, который spaCy относит к токену перед ним
+                cut = starts[-1] + (window[starts[-1]] == " ")
+                break
+        if cut is None:
+            cut = chunk_chars
+        chunks.append(window[:cut])
+        start += cut
+    if start < len(text):
+        chunks.append(text[start:])
+    return chunks
+
+
+def _ordered(items: List[Dict[str, Any]], types: tuple) -> List[Dict[str, Any]]:
+    # Для всего документа элементы идут по видам проверок, внутри вида - по тексту
+    order = {name: index for index, name in enumerate(types)}
+    return sorted(items, key=lambda item: order.get(item.get("type"), len(order)))
+
+
+def _shift_sentence(item: Dict[str, Any], offset: int) -> Dict[str, Any]:
+    # Номер предложения в нормализованном ответе отсчитывается от начала документа
+    if not offset or item.get("sentence_index") is None:
+        return item
+    return {**item, "sentence_index": item["sentence_index"] + offset}
+
+
+def merge_chunks(outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Объединяет результаты частей документа (TextAnalyzer.analyze_chunk):
+    номера токенов сдвигаются на количество токенов предыдущих частей,
+    статистика и метрики сложности вычисляются по всему документу.
+    Раздел есть в результате, только если он вычислен для всех частей.
+    """
+    results = [outcome["result"] for outcome in outcomes]
+    if all("conllu" in result for result in results):
+        # Предложения CoNLL-U нумеруют токены с единицы, поэтому части соединяются
+        # без сдвига номеров
+        parts = []
+        for outcome, result in zip(outcomes, results):
+            if parts:
+                parts[-1] = append_conllu_spaces(parts[-1], outcome.get("leading_spaces", ""))
+            parts.append(result["conllu"])
+        return {"conllu": "".join(parts)}
+    merged: Dict[str, Any] = {}
+
+    offset = 0
+    sentence_offset = 0
+    lists: Dict[str, List[Any]] = {}
+    for result in results:
+        for section in ("tokens", "sentences", "grammar_errors", "grammar_constructions", "nested_prepositional_phrases"):
+            if section in result:
+                lists.setdefault(section, []).extend(
+                    _shift_sentence(shift_references(section, item, offset), sentence_offset)
+                    for item in result[section]
+                )
+        tree = result.get("dependency_tree")
+        if tree is not None:
+            lists.setdefault("dependency_nodes", []).extend(
+                shift_references("dependency_nodes", node, offset) for node in tree["nodes"]
+            )
+            lists.setdefault("dependency_edges", []).extend(
+                shift_references("dependency_edges", edge, offset) for edge in tree["edges"]
+            )
+        offset += len(result.get("tokens") or ())
+        sentence_offset += len(result.get("sentences") or ())
+
+    def computed(section: str) -> bool:
+        return all(section in result for result in results)
+
+    for section in ("tokens", "sentences"):
+        if computed(section):
+            merged[section] = lists.get(section, [])
+    if computed("dependency_tree"):
+        nodes = lists.get("dependency_nodes", [])
+        # Как и для целого документа: корень последнего предложения или первый токен
+        roots = [node["id"] for node in nodes if node["dep"] == "ROOT"]
+        merged["dependency_tree"] = {
+            "root": roots[-1] if roots else 0,
+            "nodes": nodes,
+            "edges": lists.get("dependency_edges", [])
+        }
+    if computed("statistics"):
+        statistics: Optional[Dict[str, Any]] = None
+        for result in results:
+            statistics = merge_statistics(statistics, result["statistics"])
+        merged["statistics"] = statistics
+    if computed("grammar_errors"):
+        merged["grammar_errors"] = _ordered(lists.get("grammar_errors", []), GRAMMAR_ERROR_TYPES)
+    if computed("grammar_constructions"):
+        merged["grammar_constructions"] = _ordered(lists.get("grammar_constructions", []), CONSTRUCTION_TYPES)
+    if computed("nested_prepositional_phrases"):
+        merged["nested_prepositional_phrases"] = lists.get("nested_prepositional_phrases", [])
+
+    partial = any(result.get("partial") for result in results)
+    skipped = list(dict.fromkeys(
+        section for result in results for section in result.get("skipped_sections", ())
+    ))
+    if not partial and "complexity_metrics" not in skipped:
+        complexity = None
+        for outcome in outcomes:
+            if outcome["complexity"] is not None:
+                complexity = merge_complexity_summaries(complexity, outcome["complexity"])
+        merged["complexity_metrics"] = complexity_metrics_from_summary(complexity)
+
+    if partial:
+        merged["partial"] = True
+    if skipped:
+        merged["skipped_sections"] = skipped
+    splits = sum(result.get("forced_sentence_splits", 0) for result in results)
+    if splits:
+        merged["forced_sentence_splits"] = splits
+    return merged
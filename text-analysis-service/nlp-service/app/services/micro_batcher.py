@@ -0,0 +1,110 @@
+"""
+Динамическое объединение одновременных запросов /analyze в пакеты nlp.pipe
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.analyzer import AnalysisInterrupted
+
+
+class MicroBatcher:
+    """
+    Собирает короткие тексты из одновременных запросов в течение max_wait_ms
+    или до max_batch документов и разбирает их одним вызовом nlp.pipe.
+    Каждый результат возвращается своему ожидающему запросу.
+    Дедлайн запроса передается в пакет и проверяется между этапами анализа
+    его документа.
+    """
+
+    def __init__(self, pool, max_wait_ms: float = 5, max_batch: int = 16, max_chars: int = 1000):
+        self.pool = pool
+        self.max_wait_ms = max_wait_ms
+        self.max_batch = max_batch
+        self.max_chars = max_chars
+        self._pending: List[Tuple[str, Dict[str, Any], Optional[float], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batch_sizes = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch > 1
+
+    async def analyze(self, text: str, options: Dict[str, Any], deadline: Optional[float] = None) -> Dict[str, Any]:
+        # Длинные тексты сами по себе загружают процесс, их не задерживаем;
+        # запросы, которым не хватит времени на ожидание пакета, тоже
+        if (
+            not self.enabled
+            or len(text) > self.max_chars
+            or (deadline is not None and deadline - time.time() <= self.max_wait_ms / 1000)
+        ):
+            return await self.pool.analyze(text, options, deadline)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, options, deadline, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Запросы, клиенты которых уже отключились, не отправляем в пул
+        batch = [entry for entry in self._pending if not entry[3].done()]
+        self._pending = []
+        if not batch:
+            return
+
+        self.batch_sizes[len(batch)] += 1
+        task = asyncio.create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, Dict[str, Any], Optional[float], asyncio.Future]]) -> None:
+        deadlines = [deadline for _, _, deadline, _ in batch]
+        try:
+            outcomes = await self.pool.analyze_batch(
+                [(text, options) for text, options, _, _ in batch],
+                self.max_batch,
+                deadlines=deadlines if any(deadline is not None for deadline in deadlines) else None
+            )
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, _, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if outcome.get("interrupted"):
+                future.set_exception(AnalysisInterrupted(outcome["interrupted"]))
+            elif outcome["error"] is not None:
+                future.set_exception(RuntimeError(outcome["error"]))
+            else:
+                future.set_result(outcome["result"])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Распределение размеров пакетов
+        """
+        batches = sum(self.batch_sizes.values())
+        requests = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "enabled": self.enabled,
+            "max_wait_ms": self.max_wait_ms,
+            "max_batch": self.max_batch,
+            "batches": batches,
+            "requests": requests,
+            "average_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())}
+        }
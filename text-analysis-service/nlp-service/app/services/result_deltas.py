@@ -0,0 +1,149 @@
+"""
+Версии результатов анализа и разница между ними для повторного анализа
+отредактированного текста
+"""
+import copy
+import json
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .result_store import ResultStore
+
+# Поля элементов разделов, содержащие номера токенов документа.
+# После измененного участка номера сдвигаются на одну и ту же величину.
+TOKEN_REFERENCES = {
+    "tokens": (("id",), ("dependency", "head"), ("adverb_classification", "modifies", "id")),
+    "sentences": (("start",), ("end",)),
+    "dependency_nodes": (("id",),),
+    "dependency_edges": (("source",), ("target",)),
+    "grammar_errors": (("token_id",), ("subject_id",)),
+    "grammar_constructions": (("verb_id",), ("sentence_start",), ("sentence_end",)),
+    "nested_prepositional_phrases": ()
+}
+
+
+def _sections(result: Dict[str, Any]) -> Dict[str, List[Any]]:
+    tree = result.get("dependency_tree") or {}
+    return {
+        "tokens": result.get("tokens") or [],
+        "sentences": result.get("sentences") or [],
+        "dependency_nodes": tree.get("nodes") or [],
+        "dependency_edges": tree.get("edges") or [],
+        "grammar_errors": result.get("grammar_errors") or [],
+        "grammar_constructions": result.get("grammar_constructions") or [],
+        "nested_prepositional_phrases": result.get("nested_prepositional_phrases") or []
+    }
+
+
+def shift_references(section: str, item: Dict[str, Any], shift: int) -> Dict[str, Any]:
+    """
+    Копия элемента раздела с номерами токенов, сдвинутыми на shift
+    """
+    if not shift or not TOKEN_REFERENCES[section]:
+        return item
+
+    shifted = copy.deepcopy(item)
+    for path in TOKEN_REFERENCES[section]:
+        container = shifted
+        for key in path[:-1]:
+            container = container.get(key)
+            if not isinstance(container, dict):
+                break
+        else:
+            if isinstance(container.get(path[-1]), int):
+                container[path[-1]] += shift
+    return shifted
+
+
+def splice(section: str, old: List[Any], new: List[Any], shift: int) -> Optional[Dict[str, Any]]:
+    """
+    Замена элементов [start, start + deleted) старого списка на items, после
+    которой список совпадает с новым; номера токенов в элементах после
+    замененного участка сдвигаются на shift. None, если списки совпадают.
+    """
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and shift_references(section, old[len(old) - 1 - suffix], shift) == new[len(new) - 1 - suffix]
+    ):
+        suffix += 1
+
+    if prefix == len(old) == len(new):
+        return None
+    return {
+        "start": prefix,
+        "deleted": len(old) - prefix - suffix,
+        "items": new[prefix:len(new) - suffix]
+    }
+
+
+def diff_results(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Разница между результатами анализа: замены в списочных разделах и
+    изменившиеся статистика, метрики сложности и корень дерева зависимостей
+    """
+    old_sections = _sections(old)
+    new_sections = _sections(new)
+    # Изменения текста сосредоточены в одном участке, поэтому токены после него
+    # сдвигаются на разницу количества токенов
+    shift = len(new_sections["tokens"]) - len(old_sections["tokens"])
+
+    delta: Dict[str, Any] = {"shift": shift}
+    for section in TOKEN_REFERENCES:
+        change = splice(section, old_sections[section], new_sections[section], shift)
+        if change is not None:
+            delta[section] = change
+
+    for name in ("statistics", "complexity_metrics"):
+        if new.get(name) != old.get(name):
+            delta[name] = new.get(name)
+    new_root = (new.get("dependency_tree") or {}).get("root")
+    if new_root != (old.get("dependency_tree") or {}).get("root"):
+        delta["dependency_root"] = new_root
+    return delta
+
+
+class ResultVersions:
+    """
+    Результаты анализа, сохраненные как версии (ResultStore: TTL и лимит памяти),
+    для ответов в виде разницы с предыдущей версией
+    """
+
+    def __init__(self, store: ResultStore):
+        self.store = store
+        self.deltas = 0
+        self.missing_base = 0
+
+    @staticmethod
+    def size(result: Dict[str, Any]) -> int:
+        """
+        Размер результата в байтах (JSON); может выполняться вне event loop
+        """
+        return len(json.dumps(result))
+
+    def put(self, result: Dict[str, Any], size: int) -> Tuple[str, float]:
+        """
+        Сохраняет результат, возвращает идентификатор версии и время истечения
+        """
+        version = uuid.uuid4().hex
+        return version, self.store.put(version, result, size)
+
+    def get(self, version: str) -> Optional[Dict[str, Any]]:
+        result = self.store.get(version)
+        if result is None:
+            self.missing_base += 1
+        else:
+            self.deltas += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.store.stats(),
+            "deltas": self.deltas,
+            "missing_base": self.missing_base
+        }
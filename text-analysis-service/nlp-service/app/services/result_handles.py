@@ -0,0 +1,87 @@
+"""
+Результаты анализа, сохраненные на сервере и выдаваемые по частям
+"""
+import json
+import uuid
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from .result_store import ResultStore
+
+# Разделы, которые выдаются по частям; остальные возвращаются сразу
+PAGED_SECTIONS = (
+    "tokens",
+    "dependency_tree",
+    "grammar_errors",
+    "grammar_constructions",
+    "nested_prepositional_phrases"
+)
+
+
+def split_dependency_tree(tree: Optional[Dict[str, Any]], sentences: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Дерево зависимостей документа по предложениям (ребра не выходят за предложение)
+    """
+    if not tree:
+        return []
+    if not sentences:
+        # Раздел sentences не запрошен (options.sections): дерево не делится
+        return [{"sentence": 0, "root": tree.get("root"), "nodes": tree["nodes"], "edges": tree["edges"]}]
+
+    starts = [sentence["start"] for sentence in sentences]
+    trees = [
+        {"sentence": index, "root": sentence["start"], "nodes": [], "edges": []}
+        for index, sentence in enumerate(sentences)
+    ]
+    for node in tree["nodes"]:
+        sentence_tree = trees[bisect_right(starts, node["id"]) - 1]
+        sentence_tree["nodes"].append(node)
+        if node["dep"] == "ROOT":
+            sentence_tree["root"] = node["id"]
+    for edge in tree["edges"]:
+        trees[bisect_right(starts, edge["source"]) - 1]["edges"].append(edge)
+    return trees
+
+
+class ResultHandles:
+    """
+    Хранит результаты анализа (ResultStore: TTL и лимит памяти) и выдает
+    крупные разделы страницами
+    """
+
+    def __init__(self, store: ResultStore):
+        self.store = store
+
+    @staticmethod
+    def prepare(result: Dict[str, Any]) -> Tuple[Dict[str, List[Any]], int]:
+        """
+        Разделы для хранения и их размер в байтах (JSON); не трогает хранилище,
+        поэтому может выполняться вне event loop
+        """
+        sections = {section: result.get(section) or [] for section in PAGED_SECTIONS}
+        sections["dependency_tree"] = split_dependency_tree(result.get("dependency_tree"), result.get("sentences") or [])
+        return sections, len(json.dumps(sections))
+
+    def put(self, sections: Dict[str, List[Any]], size: int) -> Tuple[str, float]:
+        """
+        Сохраняет разделы, возвращает идентификатор и время истечения (time.time())
+        """
+        result_id = uuid.uuid4().hex
+        return result_id, self.store.put(result_id, sections, size)
+
+    def page(self, result_id: str, section: str, offset: int, limit: int) -> Optional[Dict[str, Any]]:
+        sections = self.store.get(result_id)
+        if sections is None:
+            return None
+        items = sections[section]
+        return {
+            "result_id": result_id,
+            "section": section,
+            "offset": offset,
+            "limit": limit,
+            "total": len(items),
+            "items": items[offset:offset + limit]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
@@ -0,0 +1,80 @@
+"""
+Хранилище результатов анализа в памяти с TTL и ограничением размера
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class _StoredResult:
+    def __init__(self, value: Any, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ResultStore:
+    """
+    Хранит результаты до истечения TTL. Когда суммарный размер превышает
+    max_bytes, вытесняются самые старые записи.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evicted = 0
+        self._entries: "OrderedDict[str, _StoredResult]" = OrderedDict()
+
+    def put(self, key: str, value: Any, size: int) -> float:
+        """
+        Сохраняет результат размером size байт, возвращает время истечения (time.time())
+        """
+        self.discard(key)
+        self._expire()
+
+        expires_at = time.time() + self.ttl_seconds
+        self._entries[key] = _StoredResult(value, size, expires_at)
+        self.size += size
+
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self.discard(oldest)
+            self.evicted += 1
+
+        return expires_at
+
+    def get(self, key: str) -> Optional[Any]:
+        self._expire()
+        entry = self._entries.get(key)
+        return entry.value if entry else None
+
+    def expires_at(self, key: str) -> Optional[float]:
+        entry = self._entries.get(key)
+        return entry.expires_at if entry else None
+
+    def discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def _expire(self) -> None:
+        # TTL одинаков для всех записей, поэтому истекают они в порядке добавления
+        now = time.time()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            self.discard(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire()
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evicted": self.evicted
+        }
@@ -0,0 +1,80 @@
+"""
+Объединение одновременных одинаковых вычислений (single-flight)
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Одновременные запросы с одинаковым ключом выполняются один раз,
+    результат (или ошибка) передается всем ожидающим. Каждый ожидающий
+    ждет результат не дольше своего дедлайна. Вычисление отменяется,
+    только когда ушли все ожидающие.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Ключ вычисления по тексту, опциям и модели
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], deadline: Optional[float] = None) -> Any:
+        """
+        deadline - момент (time.time()), после которого ожидающий получает
+        asyncio.TimeoutError; общее вычисление при этом продолжается
+        для остальных ожидающих
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            if deadline is None:
+                return await asyncio.shield(flight.task)
+            return await asyncio.wait_for(asyncio.shield(flight.task), max(0.0, deadline - time.time()))
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Ошибку получают ожидающие; здесь только помечаем ее полученной
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "executed": self.executed,
+            "saved": self.coalesced
+        }
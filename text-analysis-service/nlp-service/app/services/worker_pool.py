@@ -0,0 +1,403 @@
+"""
+Пул рабочих процессов для CPU-bound анализа текста
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+import structlog
+
+from ..models.analyzer import TextAnalyzer, AnalysisInterrupted
+from ..utils.sentence_guard import MAX_SENTENCE_TOKENS
+from ..utils.markup import OffsetMap
+
+logger = structlog.get_logger()
+
+# Количество одновременно отменяемых запросов (слотов флагов отмены)
+CANCEL_SLOTS = 1024
+
+# Записи потокового анализа, ожидающие отправки клиенту; при заполнении
+# очереди рабочий процесс ждет медленного клиента
+STREAM_QUEUE_SIZE = 16
+# Период проверки отмены и дедлайна при ожидании очереди записей (секунды)
+STREAM_POLL_INTERVAL = 0.2
+
+# Анализатор, загруженный в текущем рабочем процессе
+_worker_analyzer: Optional[TextAnalyzer] = None
+# Флаги отмены запросов в памяти, общей с главным процессом
+_worker_cancel_flags = None
+
+
+def _init_worker(model_name: str, cancel_flags, max_sentence_tokens: int = MAX_SENTENCE_TOKENS) -> None:
+    """
+    Загрузка spaCy модели при старте рабочего процесса
+    """
+    global _worker_analyzer, _worker_cancel_flags
+    _worker_cancel_flags = cancel_flags
+    _worker_analyzer = TextAnalyzer(model_name, max_sentence_tokens)
+
+
+def _make_checkpoint(deadline: Optional[float], cancel_slot: Optional[int]) -> Optional[Callable[[str], None]]:
+    """
+    Проверка между этапами анализа: отмена запроса клиентом и дедлайн
+    """
+    if deadline is None and cancel_slot is None:
+        return None
+
+    def checkpoint(stage: str) -> None:
+        if cancel_slot is not None and _worker_cancel_flags[cancel_slot]:
+            raise AnalysisInterrupted("cancelled")
+        if deadline is not None and time.time() >= deadline:
+            raise AnalysisInterrupted("deadline")
+
+    return checkpoint
+
+
+def _ping() -> int:
+    """
+    Пустая задача для прогрева пула
+    """
+    return os.getpid()
+
+
+def _run_analyze(
+    text: str,
+    options: Dict[str, Any],
+    deadline: Optional[float] = None,
+    cancel_slot: Optional[int] = None
+) -> Dict[str, Any]:
+    return _worker_analyzer.analyze(text, options, _make_checkpoint(deadline, cancel_slot))
+
+
+def _run_analyze_chunk(
+    text: str,
+    options: Dict[str, Any],
+    deadline: Optional[float] = None,
+    cancel_slot: Optional[int] = None,
+    offsets: Optional[OffsetMap] = None
+) -> Dict[str, Any]:
+    return _worker_analyzer.analyze_chunk(text, options, _make_checkpoint(deadline, cancel_slot), offsets)
+
+
+def _run_analyze_parsed(
+    data: Union[bytes, str],
+    input_format: str,
+    options: Dict[str, Any],
+    deadline: Optional[float] = None,
+    cancel_slot: Optional[int] = None
+) -> Dict[str, Any]:
+    return _worker_analyzer.analyze_parsed(data, input_format, options, _make_checkpoint(deadline, cancel_slot))
+
+
+def _run_analyze_stream(
+    text: str,
+    options: Dict[str, Any],
+    records,
+    deadline: Optional[float] = None,
+    cancel_slot: Optional[int] = None
+) -> None:
+    checkpoint = _make_checkpoint(deadline, cancel_slot)
+
+    def emit(record: Dict[str, Any]) -> None:
+        while True:
+            if checkpoint:
+                checkpoint("emit")
+            try:
+                records.put(record, timeout=STREAM_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    _worker_analyzer.analyze_stream(text, options, emit, checkpoint)
+    # Конец потока
+    emit(None)
+
+
+def _run_analyze_sentences(text: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return _worker_analyzer.analyze_sentences(text, options)
+
+
+def _run_analyze_batch(
+    items: List[Tuple[str, Dict[str, Any]]],
+    batch_size: int,
+    n_process: int,
+    deadlines: Optional[List[Optional[float]]] = None
+) -> List[Dict[str, Any]]:
+    checkpoints = [_make_checkpoint(deadline, None) for deadline in deadlines] if deadlines else None
+    return _worker_analyzer.analyze_batch(items, batch_size, n_process, checkpoints)
+
+
+def default_worker_count() -> int:
+    """
+    Количество доступных ядер с учетом CPU affinity и квоты cgroup
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # Лимит CPU в Kubernetes задается квотой cgroup, а не affinity
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return max(1, cpus)
+
+
+class AnalyzerPool:
+    """
+    Пул рабочих процессов, каждый из которых держит свой TextAnalyzer.
+    При workers=0 анализ выполняется в одном потоке текущего процесса.
+    """
+
+    def __init__(self, model_name: str, workers: int, max_sentence_tokens: int = MAX_SENTENCE_TOKENS):
+        self.model_name = model_name
+        self.workers = workers
+        self.max_sentence_tokens = max_sentence_tokens
+        self.ready = False
+        self._executor = None
+        self._warm_up_task = None
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._cancel_flags = None
+        self._free_slots: List[int] = []
+        # Сервер очередей для потоковой передачи записей из рабочих процессов
+        self._manager = None
+        self._manager_lock = asyncio.Lock()
+
+    def start(self) -> None:
+        if self._cancel_flags is None:
+            self._cancel_flags = self._mp_context.RawArray("b", CANCEL_SLOTS)
+            self._free_slots = list(range(CANCEL_SLOTS))
+
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._mp_context,
+                initializer=_init_worker,
+                initargs=(self.model_name, self._cancel_flags, self.max_sentence_tokens)
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                initializer=_init_worker,
+                initargs=(self.model_name, self._cancel_flags, self.max_sentence_tokens)
+            )
+
+    async def warm_up(self) -> None:
+        """
+        Дожидается загрузки модели в рабочих процессах
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _ping)
+            for _ in range(max(1, self.workers))
+        ))
+        self.ready = True
+
+    async def run(self, fn: Callable, *args, cancel_slot: Optional[int] = None) -> Any:
+        """
+        Выполняет функцию в пуле, не блокируя event loop.
+        При отмене ожидающей корутины задача снимается с очереди пула,
+        а уже выполняемой задаче выставляется флаг отмены cancel_slot.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            if cancel_slot is not None:
+                self._free_slots.append(cancel_slot)
+            self._on_broken(executor)
+            raise
+
+        if cancel_slot is not None:
+            # Слот освобождается только после завершения задачи в рабочем процессе
+            future.add_done_callback(lambda _: self._release_slot(loop, cancel_slot))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if cancel_slot is not None:
+                self._cancel_flags[cancel_slot] = 1
+            raise
+        except BrokenProcessPool:
+            self._on_broken(executor)
+            raise
+
+    def _on_broken(self, executor) -> None:
+        # Пул пересоздается один раз, даже если упало несколько запросов
+        if executor is self._executor:
+            self._restart()
+
+    def _restart(self) -> None:
+        """
+        Пересоздает пул после падения рабочего процесса (например, OOM)
+        """
+        logger.error("Worker pool broken, restarting", workers=self.workers)
+        self.ready = False
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.start()
+        self._warm_up_task = asyncio.create_task(self._rewarm())
+
+    async def _rewarm(self) -> None:
+        try:
+            await self.warm_up()
+            logger.info("Worker pool restarted", workers=self.workers)
+        except Exception as e:
+            logger.error("Failed to restart worker pool", error=str(e))
+
+    def _acquire_slot(self) -> Optional[int]:
+        if not self._free_slots:
+            return None
+        slot = self._free_slots.pop()
+        self._cancel_flags[slot] = 0
+        return slot
+
+    def _release_slot(self, loop: asyncio.AbstractEventLoop, slot: int) -> None:
+        try:
+            loop.call_soon_threadsafe(self._free_slots.append, slot)
+        except RuntimeError:
+            # Event loop уже закрыт при остановке сервиса
+            pass
+
+    async def analyze(
+        self,
+        text: str,
+        options: Dict[str, Any],
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Анализ текста с дедлайном (time.time()) и отменой при отключении клиента
+        """
+        slot = self._acquire_slot()
+        return await self.run(_run_analyze, text, options, deadline, slot, cancel_slot=slot)
+
+    async def analyze_chunk(
+        self,
+        text: str,
+        options: Dict[str, Any],
+        deadline: Optional[float] = None,
+        offsets: Optional[OffsetMap] = None
+    ) -> Dict[str, Any]:
+        """
+        Анализ части длинного документа (см. TextAnalyzer.analyze_chunk)
+        """
+        slot = self._acquire_slot()
+        return await self.run(_run_analyze_chunk, text, options, deadline, slot, offsets, cancel_slot=slot)
+
+    async def analyze_parsed(
+        self,
+        data: Union[bytes, str],
+        input_format: str,
+        options: Dict[str, Any],
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Анализ уже разобранного текста: DocBin (bytes) или CoNLL-U (str)
+        """
+        slot = self._acquire_slot()
+        return await self.run(_run_analyze_parsed, data, input_format, options, deadline, slot, cancel_slot=slot)
+
+    async def analyze_stream(
+        self,
+        text: str,
+        options: Dict[str, Any],
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Записи анализа по предложениям по мере их вычисления в рабочем процессе.
+        Если итерация прервана (клиент отключился), анализ отменяется.
+        """
+        records = await self._stream_queue()
+        slot = self._acquire_slot()
+        task = asyncio.ensure_future(
+            self.run(_run_analyze_stream, text, options, records, deadline, slot, cancel_slot=slot)
+        )
+        try:
+            while True:
+                try:
+                    record = await asyncio.to_thread(records.get, True, STREAM_POLL_INTERVAL)
+                except queue.Empty:
+                    if task.done():
+                        # Ошибка анализа; без ошибки поток заканчивается записью None
+                        task.result()
+                        return
+                    continue
+                if record is None:
+                    break
+                yield record
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def analyze_sentences(self, text: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Независимый анализ предложений фрагмента (для инкрементального анализа)
+        """
+        return await self.run(_run_analyze_sentences, text, options)
+
+    async def _stream_queue(self):
+        # Процесс сервера очередей запускается при первом потоковом запросе
+        async with self._manager_lock:
+            if self._manager is None:
+                self._manager = await asyncio.to_thread(self._mp_context.Manager)
+        return await asyncio.to_thread(self._manager.Queue, STREAM_QUEUE_SIZE)
+
+    async def analyze_batch(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]],
+        batch_size: int,
+        n_process: int = 1,
+        deadlines: Optional[List[Optional[float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Пакетный анализ: пакет делится на части по числу рабочих процессов,
+        результаты собираются в исходном порядке. deadlines - дедлайны
+        документов (time.time()), проверяются между этапами их анализа.
+        """
+        chunk_results = await asyncio.gather(*(
+            self.analyze_batch_chunk(items[part], batch_size, n_process, deadlines[part] if deadlines else None)
+            for part in self.batch_chunks(len(items), batch_size)
+        ))
+        return [outcome for chunk_result in chunk_results for outcome in chunk_result]
+
+    def batch_chunks(self, items_count: int, batch_size: int) -> List[slice]:
+        """
+        Деление пакета на части по числу рабочих процессов
+        """
+        if not items_count:
+            return []
+        chunks_count = min(max(1, self.workers), math.ceil(items_count / batch_size))
+        chunk_size = math.ceil(items_count / chunks_count)
+        return [slice(i, i + chunk_size) for i in range(0, items_count, chunk_size)]
+
+    async def analyze_batch_chunk(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]],
+        batch_size: int,
+        n_process: int = 1,
+        deadlines: Optional[List[Optional[float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Пакетный анализ части пакета в одном рабочем процессе
+        """
+        return await self.run(_run_analyze_batch, items, batch_size, n_process, deadlines)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        self.ready = False
@@ -1,136 +1,116 @@
 """
 Анализ синтаксической сложности текста
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import spacy
 import math
 
 
 def calculate_complexity_metrics(doc, tokens: List[Dict[str, Any]], dependency_tree: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Вычисляет метрики синтаксической сложности
+    Вычисляет метрики синтаксической сложности.
+    Глубина и ветвление считаются внутри каждого предложения, поэтому время
+    линейно зависит от длины текста (dependency_tree оставлен для совместимости)
     """
-    sentences = list(doc.sents)
-    
-    metrics = {
-        "average_sentence_length": _calculate_average_sentence_length(sentences),
-        "average_dependency_depth": _calculate_average_dependency_depth(dependency_tree, tokens),
-        "complexity_coefficient": _calculate_complexity_coefficient(sentences, dependency_tree),
-        "lexical_diversity": _calculate_lexical_diversity(tokens),
-        "flesch_kincaid": _calculate_flesch_kincaid(doc, sentences),
-        "readability_level": _determine_readability_level(doc, sentences, tokens),
-        "sentence_count": len(sentences),
-        "word_count": len([t for t in tokens if t.get("pos") not in ["PUNCT", "SYM"]]),
-        "syllable_count": _estimate_syllable_count(doc),
-        "character_count": len(doc.text)
-    }
-    
-    return metrics
+    # Номер первого токена, если doc - часть документа
+    offset = doc[0].i if len(doc) else 0
+    summary = None
+    for sent in doc.sents:
+        sent_tokens = tokens[sent.start - offset:sent.end - offset]
+        summary = merge_complexity_summaries(summary, summarize_complexity(sent, sent_tokens))
+    
+    return complexity_metrics_from_summary(summary)
 
 
-def _calculate_average_sentence_length(sentences) -> float:
+def summarize_complexity(sent, tokens: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Вычисляет среднюю длину предложения (в словах)
+    Слагаемые метрик сложности для одного предложения.
+    Сводки предложений объединяются merge_complexity_summaries, а метрики
+    документа вычисляются из общей сводки complexity_metrics_from_summary
     """
-    if not sentences:
-        return 0.0
+    words = [t for t in tokens if t.get("pos") not in ["PUNCT", "SYM", "SPACE"]]
+    
+    # Глубина - расстояние до корня своего предложения; visited защищает
+    # от циклов в некорректном разборе
+    depth_sum = 0
+    children_count = {}
+    for token in sent:
+        node = token
+        visited = {node.i}
+        while node.head.i != node.i and node.head.i not in visited:
+            node = node.head
+            visited.add(node.i)
+            depth_sum += 1
+        if token.head.i != token.i:
+            children_count[token.head.i] = children_count.get(token.head.i, 0) + 1
     
-    total_words = sum(len([token for token in sent if token.pos_ not in ["PUNCT", "SYM"]]) for sent in sentences)
-    return total_words / len(sentences)
+    return {
+        "sentences": 1,
+        "words": len([t for t in tokens if t.get("pos") not in ["PUNCT", "SYM"]]),
+        "lexical_words": len(words),
+        "lemmas": set(t.get("lemma", "").lower() for t in words if t.get("lemma")),
+        "syllables": _estimate_syllable_count(sent),
+        "characters": len(sent.text_with_ws),
+        "nodes": len(sent),
+        "depth_sum": depth_sum,
+        "max_children": max(children_count.values(), default=0)
+    }
 
 
-def _calculate_average_dependency_depth(dependency_tree: Dict[str, Any], tokens: List[Dict[str, Any]]) -> float:
+def merge_complexity_summaries(first: Optional[Dict[str, Any]], second: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Вычисляет среднюю глубину дерева зависимостей
+    Объединяет сводки соседних частей текста
     """
-    if not dependency_tree or not dependency_tree.get("nodes"):
-        return 0.0
-    
-    depths = []
-    root_id = dependency_tree.get("root")
-    
-    if root_id is None:
-        return 0.0
+    if first is None:
+        return second
     
-    # Строим граф зависимостей
-    children_map = {}
-    for edge in dependency_tree.get("edges", []):
-        parent = edge["target"]
-        child = edge["source"]
-        if parent not in children_map:
-            children_map[parent] = []
-        children_map[parent].append(child)
-    
-    # Вычисляем глубину для каждого узла
-    def get_depth(node_id, visited=None):
-        if visited is None:
-            visited = set()
-        if node_id in visited:
-            return 0
-        visited.add(node_id)
-        
-        if node_id == root_id:
-            return 0
-        
-        # Находим родителя
-        parent = None
-        for edge in dependency_tree.get("edges", []):
-            if edge["source"] == node_id:
-                parent = edge["target"]
-                break
-        
-        if parent is None:
-            return 0
-        
-        return 1 + get_depth(parent, visited)
-    
-    # Вычисляем глубину для всех узлов
-    for node in dependency_tree.get("nodes", []):
-        depth = get_depth(node["id"])
-        depths.append(depth)
-    
-    if not depths:
-        return 0.0
-    
-    return sum(depths) / len(depths)
+    merged = {key: first[key] + second[key] for key in first if key not in ["lemmas", "max_children"]}
+    merged["lemmas"] = first["lemmas"] | second["lemmas"]
+    merged["max_children"] = max(first["max_children"], second["max_children"])
+    return merged
 
 
-def _calculate_complexity_coefficient(sentences, dependency_tree: Dict[str, Any]) -> float:
+def complexity_metrics_from_summary(summary: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Вычисляет коэффициент сложности на основе длины предложений и глубины зависимостей
+    Метрики сложности документа по сводке всех его предложений
     """
-    avg_length = _calculate_average_sentence_length(sentences)
+    if summary is None:
+        summary = {
+            "sentences": 0, "words": 0, "lexical_words": 0, "lemmas": set(), "syllables": 0,
+            "characters": 0, "nodes": 0, "depth_sum": 0, "max_children": 0
+        }
     
-    # Упрощенный расчет глубины
-    if dependency_tree and dependency_tree.get("edges"):
-        max_depth = max(
-            len([e for e in dependency_tree["edges"] if e["target"] == node["id"]])
-            for node in dependency_tree.get("nodes", [])
-        ) if dependency_tree.get("nodes") else 0
-    else:
-        max_depth = 0
+    average_sentence_length = summary["words"] / summary["sentences"] if summary["sentences"] else 0.0
+    lexical_diversity = _lexical_diversity(len(summary["lemmas"]), summary["lexical_words"])
+    flesch_kincaid = _flesch_kincaid(summary["sentences"], summary["lexical_words"], summary["syllables"])
     
+    return {
+        "average_sentence_length": average_sentence_length,
+        "average_dependency_depth": summary["depth_sum"] / summary["nodes"] if summary["nodes"] else 0.0,
+        "complexity_coefficient": _complexity_coefficient(average_sentence_length, summary["max_children"]),
+        "lexical_diversity": lexical_diversity,
+        "flesch_kincaid": flesch_kincaid,
+        "readability_level": _readability_level(
+            average_sentence_length, lexical_diversity.get("ttr", 0), flesch_kincaid.get("score", 0)
+        ),
+        "sentence_count": summary["sentences"],
+        "word_count": summary["words"],
+        "syllable_count": summary["syllables"],
+        "character_count": summary["characters"]
+    }
+
+
+def _complexity_coefficient(avg_length: float, max_depth: int) -> float:
     # Коэффициент сложности = средняя длина * максимальная глубина / 10
     complexity = (avg_length * max_depth) / 10.0 if max_depth > 0 else avg_length / 10.0
     
     return round(complexity, 2)
 
 
-def _calculate_lexical_diversity(tokens: List[Dict[str, Any]]) -> Dict[str, float]:
-    """
-    Вычисляет лексическое разнообразие (TTR - Type-Token Ratio)
-    """
-    # Фильтруем только слова (исключаем пунктуацию)
-    words = [t for t in tokens if t.get("pos") not in ["PUNCT", "SYM", "SPACE"]]
-    
-    if not words:
+def _lexical_diversity(unique_words: int, total_words: int) -> Dict[str, float]:
+    if not total_words:
         return {"ttr": 0.0, "unique_words": 0, "total_words": 0}
     
-    # Уникальные слова (леммы)
-    unique_lemmas = set(t.get("lemma", "").lower() for t in words if t.get("lemma"))
-    unique_words = len(unique_lemmas)
-    total_words = len(words)
-    
     # TTR = количество уникальных слов / общее количество слов
     ttr = unique_words / total_words if total_words > 0 else 0.0
     
@@ -187,17 +167,7 @@ def _count_syllables(word: str) -> int:
     return max(1, syllable_count)
 
 
-def _calculate_flesch_kincaid(doc, sentences) -> Dict[str, float]:
-    """
-    Вычисляет индекс читаемости Flesch-Kincaid
-    """
-    if not sentences:
-        return {"score": 0.0, "grade_level": 0.0, "readability": "unknown"}
-    
-    total_sentences = len(sentences)
-    total_words = len([token for token in doc if token.pos_ not in ["PUNCT", "SYM", "SPACE"]])
-    total_syllables = _estimate_syllable_count(doc)
-    
+def _flesch_kincaid(total_sentences: int, total_words: int, total_syllables: int) -> Dict[str, float]:
     if total_words == 0 or total_sentences == 0:
         return {"score": 0.0, "grade_level": 0.0, "readability": "unknown"}
     
@@ -243,19 +213,7 @@ def _interpret_flesch_score(score: float) -> str:
         return "very_difficult"
 
 
-def _determine_readability_level(doc, sentences, tokens: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """
-    Определяет уровень сложности текста (A1-C2 по CEFR)
-    """
-    # Вычисляем различные метрики
-    avg_sentence_length = _calculate_average_sentence_length(sentences)
-    lexical_diversity = _calculate_lexical_diversity(tokens)
-    flesch = _calculate_flesch_kincaid(doc, sentences)
-    
-    # Критерии для определения уровня
-    ttr = lexical_diversity.get("ttr", 0)
-    flesch_score = flesch.get("score", 0)
-    
+def _readability_level(avg_sentence_length: float, ttr: float, flesch_score: float) -> Dict[str, Any]:
     # Определение уровня на основе метрик
     level = "B1"  # По умолчанию средний уровень
     
@@ -4,10 +4,16 @@
 from typing import List, Dict, Any, Optional
 import spacy
 
+from .sentence_refs import sentence_reference
 
-def check_grammar(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# Виды ошибок в порядке проверок check_grammar
+GRAMMAR_ERROR_TYPES = ("subject_verb_agreement", "article_usage", "tense_consistency")
+
+
+def check_grammar(doc, tokens: List[Dict[str, Any]], normalized: bool = False) -> List[Dict[str, Any]]:
     """
-    Выполняет проверку грамматики и возвращает список ошибок и предупреждений
+    Выполняет проверку грамматики и возвращает список ошибок и предупреждений.
+    Если normalized, ошибки ссылаются на предложение номером sentence_index.
     """
     errors = []
     
@@ -18,7 +24,7 @@ def check_grammar(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     errors.extend(check_article_usage(doc, tokens))
     
     # Проверка согласованности времен
-    errors.extend(check_tense_consistency(doc, tokens))
+    errors.extend(check_tense_consistency(doc, tokens, normalized))
     
     return errors
 
@@ -87,7 +93,7 @@ def check_article_usage(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any
     return errors
 
 
-def check_tense_consistency(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def check_tense_consistency(doc, tokens: List[Dict[str, Any]], normalized: bool = False) -> List[Dict[str, Any]]:
     """
     Проверка согласованности времен в предложении
     """
@@ -98,7 +104,7 @@ def check_tense_consistency(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str,
     # Создаем словарь для быстрого доступа к данным токенов
     tokens_dict = {t["id"]: t for t in tokens}
     
-    for sent in sentences:
+    for index, sent in enumerate(sentences):
         verbs = [token for token in sent if token.pos_ == "VERB"]
         if len(verbs) < 2:
             continue
@@ -123,7 +129,7 @@ def check_tense_consistency(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str,
                     "type": "tense_consistency",
                     "severity": "warning",
                     "message": f"Mixed tenses in sentence: past and present tenses found",
-                    "sentence": sent.text,
+                    **sentence_reference(sent, index, normalized),
                     "suggestion": "Check if tense consistency is intentional"
                 })
     
@@ -5,29 +5,36 @@ from typing import List, Dict, Any, Optional
 import spacy
 import re
 
+from .sentence_refs import sentence_reference
 
-def analyze_grammar_constructions(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# Виды конструкций в порядке анализа analyze_grammar_constructions
+CONSTRUCTION_TYPES = ("tense", "conditional", "reported_speech", "passive_voice")
+
+
+def analyze_grammar_constructions(doc, tokens: List[Dict[str, Any]], normalized: bool = False) -> List[Dict[str, Any]]:
     """
-    Анализирует грамматические конструкции в тексте
+    Анализирует грамматические конструкции в тексте.
+    Если normalized, конструкции ссылаются на предложение номером sentence_index
+    вместо его текста.
     """
     constructions = []
     
     # Анализ временных конструкций
-    constructions.extend(analyze_tenses(doc, tokens))
+    constructions.extend(analyze_tenses(doc, tokens, normalized))
     
     # Анализ условных предложений
-    constructions.extend(analyze_conditionals(doc, tokens))
+    constructions.extend(analyze_conditionals(doc, tokens, normalized))
     
     # Анализ косвенной речи
-    constructions.extend(analyze_reported_speech(doc, tokens))
+    constructions.extend(analyze_reported_speech(doc, tokens, normalized))
     
     # Анализ пассивного залога
-    constructions.extend(analyze_passive_voice(doc, tokens))
+    constructions.extend(analyze_passive_voice(doc, tokens, normalized))
     
     return constructions
 
 
-def analyze_tenses(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def analyze_tenses(doc, tokens: List[Dict[str, Any]], normalized: bool = False) -> List[Dict[str, Any]]:
     """
     Анализирует временные конструкции (12 времен)
     """
@@ -37,7 +44,7 @@ def analyze_tenses(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Создаем словарь для быстрого доступа
     tokens_dict = {t["id"]: t for t in tokens}
     
-    for sent in sentences:
+    for index, sent in enumerate(sentences):
         sent_verbs = [token for token in sent if token.pos_ == "VERB"]
         
         for verb in sent_verbs:
@@ -82,7 +89,7 @@ def analyze_tenses(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
                 "voice": voice or "active",
                 "verb": verb.text,
                 "verb_id": verb.i,
-                "sentence": sent.text,
+                **sentence_reference(sent, index, normalized),
                 "sentence_start": sent.start,
                 "sentence_end": sent.end
             })
@@ -191,7 +198,7 @@ def _get_full_tense_name(tense: str, aspect: str, voice: str) -> str:
     return tense_map.get(key, f"{tense.title()} {aspect.title()}")
 
 
-def analyze_conditionals(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def analyze_conditionals(doc, tokens: List[Dict[str, Any]], normalized: bool = False) -> List[Dict[str, Any]]:
     """
     Анализирует условные предложения (Type 1, 2, 3)
     """
@@ -200,7 +207,7 @@ def analyze_conditionals(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, An
     
     conditional_markers = ["if", "unless", "provided", "supposing", "as long as"]
     
-    for sent in sentences:
+    for index, sent in enumerate(sentences):
         sent_text = sent.text.lower()
         
         # Проверяем наличие маркеров условных предложений
@@ -220,7 +227,7 @@ def analyze_conditionals(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, An
             constructions.append({
                 "type": "conditional",
                 "conditional_type": conditional_type,
-                "sentence": sent.text,
+                **sentence_reference(sent, index, normalized),
                 "sentence_start": sent.start,
                 "sentence_end": sent.end
             })
@@ -257,7 +264,7 @@ def _determine_conditional_type(sent, verbs: List, tokens: List[Dict[str, Any]])
     return None
 
 
-def analyze_reported_speech(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def analyze_reported_speech(doc, tokens: List[Dict[str, Any]], normalized: bool = False) -> List[Dict[str, Any]]:
     """
     Анализирует косвенную речь
     """
@@ -266,7 +273,7 @@ def analyze_reported_speech(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str,
     
     reporting_verbs = ["say", "tell", "ask", "reply", "answer", "explain", "suggest", "claim", "report"]
     
-    for sent in sentences:
+    for index, sent in enumerate(sentences):
         # Ищем глаголы сообщения
         reporting_verb = None
         for token in sent:
@@ -287,7 +294,7 @@ def analyze_reported_speech(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str,
                 "type": "reported_speech",
                 "reporting_verb": reporting_verb.text,
                 "verb_id": reporting_verb.i,
-                "sentence": sent.text,
+                **sentence_reference(sent, index, normalized),
                 "sentence_start": sent.start,
                 "sentence_end": sent.end
             })
@@ -295,14 +302,14 @@ def analyze_reported_speech(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str,
     return constructions
 
 
-def analyze_passive_voice(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def analyze_passive_voice(doc, tokens: List[Dict[str, Any]], normalized: bool = False) -> List[Dict[str, Any]]:
     """
     Анализирует пассивный залог
     """
     constructions = []
     sentences = list(doc.sents)
     
-    for sent in sentences:
+    for index, sent in enumerate(sentences):
         verbs = [token for token in sent if token.pos_ == "VERB"]
         
         for verb in verbs:
@@ -323,7 +330,7 @@ def analyze_passive_voice(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, A
                     "verb_id": verb.i,
                     "tense": grammar.get("tense"),
                     "aspect": grammar.get("aspect"),
-                    "sentence": sent.text,
+                    **sentence_reference(sent, index, normalized),
                     "sentence_start": sent.start,
                     "sentence_end": sent.end
                 })
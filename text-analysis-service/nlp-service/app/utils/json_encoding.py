@@ -0,0 +1,71 @@
+"""
+Кодирование результатов анализа в JSON без повторной проверки схемами pydantic
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type, Union, get_args, get_origin
+
+import orjson
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+
+
+def dumps(value: Any) -> bytes:
+    """
+    JSON в UTF-8; ключи-числа (распределения в статистике) становятся строками
+    """
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    # Модель внутри Optional[...] и List[...]; объединения нескольких моделей не разбираются
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    if get_origin(annotation) in (Union, list, List):
+        models = {model for model in map(_nested_model, get_args(annotation)) if model is not None}
+        if len(models) == 1:
+            return models.pop()
+    return None
+
+
+@lru_cache(maxsize=None)
+def _plan(model: Type[BaseModel]) -> Tuple[List[Tuple[str, FieldInfo]], List[Tuple[str, Type[BaseModel]]]]:
+    # Необязательные поля модели и поля с вложенными моделями
+    defaults = [] if getattr(model, "sparse_fields", False) else [
+        (name, field) for name, field in model.model_fields.items() if not field.is_required()
+    ]
+    nested = [
+        (name, nested_model) for name, field in model.model_fields.items()
+        if (nested_model := _nested_model(field.annotation)) is not None
+    ]
+    return defaults, nested
+
+
+def _fill(model: Type[BaseModel], value: Any) -> Any:
+    if isinstance(value, dict):
+        return with_defaults(model, value)
+    if isinstance(value, list):
+        filled = [_fill(model, item) for item in value]
+        return value if all(new is old for new, old in zip(filled, value)) else filled
+    return value
+
+
+def with_defaults(model: Type[BaseModel], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Поля модели и вложенных моделей, которых нет в payload, со значениями
+    по умолчанию - чтобы ответ имел тот же набор полей, что и после pydantic.
+    Поля моделей с sparse_fields (токены, options.token_fields) не дополняются.
+    Payload не изменяется; если дополнять нечего, он и возвращается.
+    """
+    defaults, nested = _plan(model)
+    filled = {
+        name: field.get_default(call_default_factory=True)
+        for name, field in defaults
+        if name not in payload
+    }
+    for name, nested_model in nested:
+        value = payload.get(name)
+        if value is not None:
+            new = _fill(nested_model, value)
+            if new is not value:
+                filled[name] = new
+    return {**payload, **filled} if filled else payload
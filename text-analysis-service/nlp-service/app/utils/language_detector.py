@@ -0,0 +1,96 @@
+"""
+Быстрая проверка языка текста до разбора: английский текст, текст на другом
+языке или бинарный мусор
+"""
+import importlib
+import re
+import unicodedata
+from typing import Any, Dict, FrozenSet, Optional
+
+# Языки, с которыми сравнивается английский; профили строятся из стоп-слов spaCy
+COMPARED_LANGUAGES = ("de", "es", "fr", "it", "pt", "nl", "pl", "tr", "sv", "ro", "cs", "fi", "id")
+
+# Проверяется начало текста такой длины (символы)
+SAMPLE_CHARS = 2000
+# Меньше букв или слов - решение не принимается
+MIN_LETTERS = 20
+MIN_WORDS = 5
+# Слова короче учитываются только в доле латиницы: однобуквенные и
+# двухбуквенные стоп-слова часто совпадают в разных языках
+MIN_WORD_LETTERS = 3
+# Язык определяется, только если стоп-слов не меньше MIN_STOP_WORDS
+# и не меньше доли MIN_STOP_WORD_SHARE слов текста
+MIN_STOP_WORDS = 3
+MIN_STOP_WORD_SHARE = 0.05
+# Доля непечатаемых символов, начиная с которой текст считается мусором
+MAX_GARBAGE_RATIO = 0.05
+
+_WORD = re.compile(r"[^\W\d_]+")
+_VOWELS = frozenset("aeiouy")
+_GARBAGE_CATEGORIES = frozenset(("Cc", "Co", "Cn", "Cs"))
+
+_profiles: Optional[Dict[str, FrozenSet[str]]] = None
+
+
+def load_language_profiles() -> Dict[str, FrozenSet[str]]:
+    """
+    Наборы стоп-слов языков; загружаются один раз (около секунды на импорт
+    модулей spaCy), поэтому сервис загружает их при запуске
+    """
+    global _profiles
+    if _profiles is None:
+        profiles = {}
+        for language in ("en",) + COMPARED_LANGUAGES:
+            stop_words = importlib.import_module(f"spacy.lang.{language}.stop_words").STOP_WORDS
+            profiles[language] = frozenset(word.lower() for word in stop_words)
+        _profiles = profiles
+    return _profiles
+
+
+def detect_language(text: str) -> Dict[str, Any]:
+    """
+    Оценка того, что текст английский (english_score от 0 до 1), и
+    предполагаемый язык: код языка, non_latin (другая письменность)
+    или garbage (непечатаемые символы, слова без гласных). Если текста
+    слишком мало для решения, language равен None, а english_score - 1.
+    """
+    sample = text[:SAMPLE_CHARS]
+
+    garbage = sum(
+        1 for char in sample
+        if char == "�" or (unicodedata.category(char) in _GARBAGE_CATEGORIES and char not in "\t\n\r")
+    )
+    if sample and garbage / len(sample) > MAX_GARBAGE_RATIO:
+        return {"language": "garbage", "english_score": 0.0}
+
+    letters = [char for char in sample if char.isalpha()]
+    if len(letters) < MIN_LETTERS:
+        return {"language": None, "english_score": 1.0}
+    latin_ratio = sum(1 for char in letters if "a" <= char.lower() <= "z") / len(letters)
+    if latin_ratio < 0.5:
+        return {"language": "non_latin", "english_score": round(latin_ratio, 3)}
+
+    words = [word for word in _WORD.findall(sample) if len(word) >= MIN_WORD_LETTERS]
+    if len(words) < MIN_WORDS:
+        return {"language": None, "english_score": 1.0}
+    # Аббревиатуры (API, HTTP, SQL) часто без гласных, мусором их не считаем
+    lowercase = [word for word in words if not word.isupper()]
+    if lowercase and sum(1 for word in lowercase if _VOWELS.isdisjoint(word.lower())) / len(lowercase) > 0.5:
+        return {"language": "garbage", "english_score": 0.0}
+
+    # Количество стоп-слов каждого языка среди слов текста
+    words = [word.lower() for word in words]
+    hits = {
+        language: sum(1 for word in words if word in stop_words)
+        for language, stop_words in load_language_profiles().items()
+    }
+    other = max(COMPARED_LANGUAGES, key=lambda language: hits[language])
+    if max(hits["en"], hits[other]) < max(MIN_STOP_WORDS, MIN_STOP_WORD_SHARE * len(words)):
+        # Слишком мало стоп-слов (списки, термины, настройки): язык не определен
+        return {"language": None, "english_score": 1.0}
+
+    english_share = hits["en"] / (hits["en"] + hits[other])
+    return {
+        "language": "en" if hits["en"] >= hits[other] else other,
+        "english_score": round(latin_ratio * english_share, 3)
+    }
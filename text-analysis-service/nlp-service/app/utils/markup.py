@@ -0,0 +1,140 @@
+"""
+Очистка HTML и Markdown перед разбором с сохранением соответствия позиций
+очищенного текста позициям исходного
+"""
+import html
+import re
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+MARKUP_FORMATS = ("html", "markdown")
+
+# Правила: шаблон и замена. Замена None - сохраняется группа keep
+# (текст ссылки), остальное удаляется; entity - символ HTML-сущности.
+# Правила проверяются по порядку.
+_URL = r"https?://[^\s<>\"]*[^\s<>\".,;:!?')\]]"
+_HTML_RULES = [
+    (r"<!--.*?-->", " "),
+    (r"<(?P<block>script|style|pre)\b[^>]*>.*?</(?P=block)\s*>", "\n"),
+    (r"<code\b[^>]*>.*?</code\s*>", " "),
+    (r"</?(?:p|div|br|hr|li|ul|ol|h[1-6]|tr|td|th|table|blockquote|section|article|header|footer)\b[^>]*>", "\n"),
+    (r"<[a-zA-Z/!][^>]*>", ""),
+    (r"&(?:#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+\d*);", "entity"),
+    (_URL, " ")
+]
+_MARKDOWN_RULES = [
+    (r"^(?P<fence>```|~~~).*?^(?P=fence)[^\n]*$", "\n"),
+    (r"`[^`\n]+`", " "),
+    (r"!\[[^\]\n]*\]\([^)\n]*\)", " "),
+    (r"\[(?P<keep>[^\]\n]+)\]\([^)\n]*\)", None),
+    (r"^[ \t]*(?:#{1,6}|>|[-*+]|\d+[.)])[ \t]+", ""),
+    (r"^[ \t]*(?:[-*_][ \t]*){3,}$", "\n"),
+    (r"(?<!\w)(?:\*\*|__|\*|_|~~)(?=\S)|(?<=\S)(?:\*\*|__|\*|_|~~)(?!\w)", "")
+] + _HTML_RULES
+
+
+# Имя группы внутри правила: (?P<name> или (?P=name)
+_GROUP_NAME = re.compile(r"\(\?P([<=])(\w+)")
+
+
+def _compile(rules) -> Tuple["re.Pattern", List[Optional[str]]]:
+    # Одно регулярное выражение с группой на каждое правило: текст проходится один раз.
+    # Имена групп внутри правил получают номер правила, чтобы не совпадать.
+    alternatives = []
+    for index, (rule, _) in enumerate(rules):
+        rule = _GROUP_NAME.sub(lambda match: f"(?P{match.group(1)}{match.group(2)}{index}", rule)
+        alternatives.append(f"(?P<r{index}>{rule})")
+    pattern = re.compile("|".join(alternatives), re.DOTALL | re.MULTILINE | re.IGNORECASE)
+    return pattern, [replacement for _, replacement in rules]
+
+
+_COMPILED = {
+    "html": _compile(_HTML_RULES),
+    "markdown": _compile(_MARKDOWN_RULES)
+}
+
+
+class OffsetMap:
+    """
+    Соответствие позиций очищенного текста позициям исходного: участки,
+    скопированные без изменений, и замены разметки
+    """
+
+    def __init__(self):
+        self._starts: List[int] = []
+        # (начало в очищенном тексте, конец, начало в исходном, конец, скопирован без изменений)
+        self._segments: List[Tuple[int, int, int, int, bool]] = []
+        self.length = 0
+
+    def add(self, original_start: int, original_end: int, length: int, exact: bool) -> None:
+        if length <= 0:
+            return
+        self._starts.append(self.length)
+        self._segments.append((self.length, self.length + length, original_start, original_end, exact))
+        self.length += length
+
+    def _segment(self, position: int) -> Tuple[int, int, int, int, bool]:
+        return self._segments[bisect_right(self._starts, position) - 1]
+
+    def start(self, position: int) -> int:
+        """
+        Позиция в исходном тексте для начала участка очищенного текста
+        """
+        start, _, original_start, _, exact = self._segment(position)
+        return original_start + (position - start) if exact else original_start
+
+    def end(self, position: int) -> int:
+        """
+        Позиция в исходном тексте для конца участка (не включая position)
+        """
+        start, _, original_start, original_end, exact = self._segment(position - 1)
+        return original_start + (position - start) if exact else original_end
+
+    def slice(self, start: int, end: int) -> "OffsetMap":
+        """
+        Соответствие для участка [start, end) очищенного текста: позиции
+        участка отсчитываются от его начала, позиции исходного текста не меняются
+        """
+        part = OffsetMap()
+        index = max(0, bisect_right(self._starts, start) - 1)
+        for segment_start, segment_end, original_start, original_end, exact in self._segments[index:]:
+            if segment_start >= end:
+                break
+            clipped_start, clipped_end = max(segment_start, start), min(segment_end, end)
+            if exact:
+                shift = original_start - segment_start
+                part.add(clipped_start + shift, clipped_end + shift, clipped_end - clipped_start, True)
+            else:
+                part.add(original_start, original_end, clipped_end - clipped_start, False)
+        return part
+
+
+def strip_markup(text: str, markup: str) -> Tuple[str, OffsetMap]:
+    """
+    Удаляет разметку за один проход: теги, код, адреса ссылок и служебные
+    символы Markdown; блочные элементы заменяются переводом строки
+    """
+    pattern, replacements = _COMPILED[markup]
+    parts = []
+    offsets = OffsetMap()
+
+    def copy(start: int, end: int) -> None:
+        parts.append(text[start:end])
+        offsets.add(start, end, end - start, True)
+
+    position = 0
+    for match in pattern.finditer(text):
+        copy(position, match.start())
+        index = int(match.lastgroup[1:])
+        replacement = replacements[index]
+        if replacement is None:
+            copy(match.start(f"keep{index}"), match.end(f"keep{index}"))
+        else:
+            if replacement == "entity":
+                replacement = html.unescape(match.group())
+            parts.append(replacement)
+            offsets.add(match.start(), match.end(), len(replacement), False)
+        position = match.end()
+    copy(position, len(text))
+
+    return "".join(parts), offsets
@@ -0,0 +1,89 @@
+"""
+Форматы ответа анализа по заголовку Accept и сжатие по Accept-Encoding
+"""
+import gzip
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .json_encoding import dumps
+
+try:
+    import msgpack
+except ImportError:  # MessagePack предлагается, только если пакет установлен
+    msgpack = None
+
+# Формат ответа по типу содержимого; CoNLL-U строит анализатор из документа spaCy
+OUTPUT_FORMATS = {
+    "application/json": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "text/x-conllu": "conllu"
+}
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    # Для текстовых типов кодировка UTF-8 добавляется к Content-Type автоматически
+    "conllu": "text/x-conllu"
+}
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+# Кодировщики разобранного ответа; ключи словарей-чисел (колоночный формат)
+# в MessagePack остаются числами
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {"json": dumps}
+if msgpack is not None:
+    ENCODERS["msgpack"] = _msgpack_dumps
+
+
+def _preferences(header: str) -> List[Tuple[str, float]]:
+    # Значения заголовка с весами q, в порядке убывания веса
+    values = []
+    for position, part in enumerate(header.split(",")):
+        value, *params = (item.strip() for item in part.split(";"))
+        if not value:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(number)
+                except ValueError:
+                    weight = 0.0
+        values.append((value.lower(), weight, position))
+    values.sort(key=lambda item: (-item[1], item[2]))
+    return [(value, weight) for value, weight, _ in values]
+
+
+def negotiate_format(accept: Optional[str], available: Tuple[str, ...]) -> Optional[str]:
+    """
+    Формат ответа по заголовку Accept из доступных; без заголовка - JSON.
+    None, если ни один доступный формат не подходит.
+    """
+    if not accept:
+        return "json"
+    for media_type, weight in _preferences(accept):
+        if weight <= 0:
+            continue
+        if media_type in ("*/*", "application/*"):
+            return "json"
+        output_format = OUTPUT_FORMATS.get(media_type)
+        if output_format in available:
+            return output_format
+    return None
+
+
+def compress(body: bytes, accept_encoding: Optional[str], min_bytes: int, level: int) -> Tuple[bytes, Optional[str]]:
+    """
+    Сжатие gzip тела не меньше min_bytes байт, если клиент его принимает.
+    Возвращает тело и значение Content-Encoding.
+    """
+    if len(body) < min_bytes or not accept_encoding:
+        return body, None
+    for encoding, weight in _preferences(accept_encoding):
+        if weight > 0 and encoding in ("gzip", "*"):
+            return gzip.compress(body, compresslevel=level), "gzip"
+    return body, None
@@ -0,0 +1,207 @@
+"""
+Разобранные документы spaCy: восстановление из DocBin и CoNLL-U и запись в CoNLL-U
+"""
+import re
+from typing import Dict, List
+
+from spacy.tokens import Doc, DocBin, Token
+from spacy.vocab import Vocab
+
+# Экранирование пробельных символов в SpacesAfter (как в UDPipe)
+_SPACES_ESCAPES = {" ": "\\s", "\t": "\\t", "\n": "\\n", "\r": "\\r", "|": "\\p", "\\": "\\\\"}
+_SPACES_UNESCAPES = {escape: char for char, escape in _SPACES_ESCAPES.items()}
+_SPACES_ESCAPE = re.compile(r"\\[stnrp\\]")
+
+# Форматы разобранного текста по Content-Type
+PARSED_FORMATS = {
+    "application/x-spacy-docbin": "docbin",
+    "text/x-conllu": "conllu"
+}
+
+
+class InvalidParsedInput(ValueError):
+    """
+    Данные не удалось прочитать как разобранный текст
+    """
+
+
+def doc_from_docbin(vocab: Vocab, data: bytes) -> Doc:
+    """
+    Документ из DocBin; несколько документов объединяются в один
+    """
+    try:
+        docs = list(DocBin().from_bytes(data).get_docs(vocab))
+    except Exception as e:
+        raise InvalidParsedInput(f"Invalid DocBin: {e}")
+    return _combine(docs)
+
+
+def doc_from_conllu(vocab: Vocab, text: str) -> Doc:
+    """
+    Документ из предложений CoNLL-U. Составные токены (1-2) и пустые узлы (1.1)
+    пропускаются; метка root заменяется на ROOT, как в моделях spaCy.
+    """
+    docs = []
+    rows: List[List[str]] = []
+    for number, line in enumerate(text.splitlines() + [""], start=1):
+        line = line.strip("\r")
+        if line.startswith("#"):
+            continue
+        if not line.strip():
+            if rows:
+                docs.append(_conllu_sentence(vocab, rows))
+                rows = []
+            continue
+        columns = line.split("\t")
+        if len(columns) != 10:
+            raise InvalidParsedInput(f"Line {number}: expected 10 tab-separated columns")
+        if "-" in columns[0] or "." in columns[0]:
+            continue
+        columns.append(str(number))
+        rows.append(columns)
+    return _combine(docs)
+
+
+def _conllu_sentence(vocab: Vocab, rows: List[List[str]]) -> Doc:
+    words, spaces, lemmas, pos, tags, morphs, heads, deps = [], [], [], [], [], [], [], []
+    for index, (token_id, form, lemma, upos, xpos, feats, head, deprel, _, misc, number) in enumerate(rows):
+        try:
+            token_id, head = int(token_id), int(head)
+        except ValueError:
+            raise InvalidParsedInput(f"Line {number}: ID and HEAD must be integers")
+        if token_id != index + 1 or not 0 <= head <= len(rows):
+            raise InvalidParsedInput(f"Line {number}: token ids must be consecutive and heads must point into the sentence")
+        words.append(form)
+        spaces.append("SpaceAfter=No" not in misc.split("|"))
+        lemmas.append(lemma if lemma != "_" else form)
+        pos.append(upos if upos != "_" else "X")
+        tags.append(xpos if xpos != "_" else upos)
+        morphs.append(feats if feats != "_" else "")
+        # HEAD 0 - корень предложения, в spaCy корень указывает сам на себя
+        heads.append(head - 1 if head else index)
+        deps.append("ROOT" if deprel.lower() == "root" or not head else deprel)
+    try:
+        return Doc(
+            vocab, words=words, spaces=spaces, lemmas=lemmas, pos=pos, tags=tags,
+            morphs=morphs, heads=heads, deps=deps
+        )
+    except Exception as e:
+        raise InvalidParsedInput(f"Invalid sentence ending at line {rows[-1][-1]}: {e}")
+
+
+def _combine(docs: List[Doc]) -> Doc:
+    if not docs:
+        raise InvalidParsedInput("Input contains no documents")
+    doc = docs[0] if len(docs) == 1 else Doc.from_docs(docs)
+    if not doc.has_annotation("DEP"):
+        raise InvalidParsedInput("Input has no dependency parse")
+    _check_tree(doc)
+    return doc
+
+
+def _check_tree(doc: Doc) -> None:
+    # Дерево зависимостей без циклов, с одним корнем в каждом предложении:
+    # анализаторы поднимаются по вершинам до корня
+    heads = [token.head.i for token in doc]
+    # 0 - не проверен, 1 - на текущем пути, 2 - путь доходит до корня
+    state = [0] * len(heads)
+    for start in range(len(heads)):
+        path = []
+        index = start
+        while state[index] == 0:
+            state[index] = 1
+            path.append(index)
+            if heads[index] == index:
+                break
+            index = heads[index]
+        else:
+            if state[index] == 1:
+                raise InvalidParsedInput(f"Dependency heads form a cycle at token {index + 1}")
+        for index in path:
+            state[index] = 2
+    for number, sent in enumerate(doc.sents, start=1):
+        roots = sum(1 for token in sent if token.head.i == token.i)
+        if roots != 1:
+            raise InvalidParsedInput(f"Sentence {number} must have exactly one root, found {roots}")
+
+
+def doc_to_conllu(doc: Doc) -> str:
+    """
+    Предложения документа в CoNLL-U: токены, леммы, теги, морфология и
+    зависимости берутся прямо из документа. Пробельные токены spaCy не
+    выводятся, их текст попадает в SpacesAfter предыдущего токена.
+    """
+    lines = []
+    for sent in doc.sents:
+        words = [token for token in sent if not token.is_space]
+        if not words:
+            continue
+        numbers = {token.i: number for number, token in enumerate(words, start=1)}
+        lines.append("# text = " + " ".join(sent.text.split()))
+        for number, token in enumerate(words, start=1):
+            head = _conllu_head(token, numbers)
+            lines.append("\t".join((
+                str(number),
+                token.text,
+                token.lemma_ or token.text,
+                token.pos_ or "_",
+                token.tag_ or "_",
+                str(token.morph) or "_",
+                str(head),
+                "root" if head == 0 else (token.dep_ or "dep"),
+                "_",
+                _conllu_misc(token)
+            )))
+        lines.append("")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _conllu_head(token: Token, numbers: Dict[int, int]) -> int:
+    # Вершина - ближайший непробельный токен вверх по дереву; 0 - корень.
+    # Подъем ограничен длиной документа на случай цикла в разборе
+    head = token
+    for _ in range(len(token.doc)):
+        if head.head.i == head.i:
+            break
+        head = head.head
+        if head.i in numbers:
+            return numbers[head.i]
+    return 0
+
+
+def _conllu_misc(token: Token) -> str:
+    spaces = token.whitespace_
+    following = token.i + 1
+    while following < len(token.doc) and token.doc[following].is_space:
+        spaces += token.doc[following].text_with_ws
+        following += 1
+    return _spaces_misc(spaces)
+
+
+def _spaces_misc(spaces: str) -> str:
+    if spaces == " ":
+        return "_"
+    if not spaces:
+        return "SpaceAfter=No"
+    return "SpacesAfter=" + spaces.translate(str.maketrans(_SPACES_ESCAPES))
+
+
+def append_conllu_spaces(conllu: str, spaces: str) -> str:
+    """
+    Добавляет пробельные символы после последнего токена CoNLL-U: при
+    соединении частей документа пробелы в начале следующей части
+    """
+    lines = conllu.rstrip("\n").split("\n")
+    if not spaces or not lines[-1] or lines[-1].startswith("#"):
+        return conllu
+    columns = lines[-1].split("\t")
+    misc = columns[9]
+    if misc == "_":
+        before = " "
+    elif misc.startswith("SpacesAfter="):
+        before = _SPACES_ESCAPE.sub(lambda match: _SPACES_UNESCAPES[match.group()], misc[len("SpacesAfter="):])
+    else:
+        before = ""
+    columns[9] = _spaces_misc(before + spaces)
+    lines[-1] = "\t".join(columns)
+    return "\n".join(lines) + "\n\n"
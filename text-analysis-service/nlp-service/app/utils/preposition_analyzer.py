@@ -4,6 +4,8 @@
 from typing import Optional, Dict, Any, List
 import spacy
 
+from .sentence_refs import sentence_reference
+
 
 # Классификация предлогов по значению
 PREPOSITION_TYPES = {
@@ -164,11 +166,13 @@ def _get_multiword_preposition(token, doc) -> Optional[str]:
     return None
 
 
-def find_nested_prepositional_phrases(doc, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def find_nested_prepositional_phrases(doc, tokens: List[Dict[str, Any]], normalized: bool = False) -> List[Dict[str, Any]]:
     """
-    Находит вложенные предложные фразы
+    Находит вложенные предложные фразы.
+    Если normalized, фразы ссылаются на предложение номером sentence_index.
     """
     nested_phrases = []
+    sentence_indices = {sent.start: index for index, sent in enumerate(doc.sents)} if normalized else {}
     prepositions = [token for token in doc if token.pos_ == "ADP"]
     
     for prep in prepositions:
@@ -191,7 +195,7 @@ def find_nested_prepositional_phrases(doc, tokens: List[Dict[str, Any]]) -> List
                     "outer_object": obj.text,
                     "inner_preposition": child.text,
                     "inner_object": None,
-                    "sentence": prep.sent.text
+                    **sentence_reference(prep.sent, sentence_indices.get(prep.sent.start), normalized)
                 })
                 
                 # Находим объект внутреннего предлога
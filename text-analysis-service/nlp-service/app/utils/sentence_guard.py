@@ -0,0 +1,59 @@
+"""
+Ограничение длины предложений: принудительные границы в длинных сегментах
+без знаков конца предложения (логи, списки, текст после OCR)
+"""
+from spacy.language import Language
+from spacy.tokens import Doc
+
+# Предельная длина предложения по умолчанию (токены)
+MAX_SENTENCE_TOKENS = 250
+
+# Знаки, после которых начинается новое предложение
+SENTENCE_END_CHARS = ".!?…"
+
+# Количество принудительно добавленных границ предложений
+if not Doc.has_extension("forced_sentence_splits"):
+    Doc.set_extension("forced_sentence_splits", default=0)
+
+
+class SentenceGuard:
+    """
+    Компонент конвейера spaCy перед парсером: сегмент между концами предложений
+    длиннее max_tokens токенов делится по переводам строк, а если их нет -
+    каждые max_tokens токенов. Парсер не объединяет предложения через
+    выставленные границы, поэтому время разбора и анализа предложения ограничено.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+
+    def __call__(self, doc: Doc) -> Doc:
+        splits = 0
+        start = 0
+        for i in range(1, len(doc)):
+            previous = doc[i - 1]
+            if doc[i].is_sent_start or (previous.is_punct and previous.text[-1] in SENTENCE_END_CHARS):
+                splits += self._split(doc, start, i)
+                start = i
+        splits += self._split(doc, start, len(doc))
+        doc._.forced_sentence_splits = splits
+        return doc
+
+    def _split(self, doc: Doc, start: int, end: int) -> int:
+        splits = 0
+        while end - start > self.max_tokens:
+            cut = start + self.max_tokens
+            # Последний перевод строки, после которого часть не длиннее max_tokens
+            for i in range(start + self.max_tokens, start, -1):
+                if doc[i - 1].is_space and "\n" in doc[i - 1].text:
+                    cut = i
+                    break
+            doc[cut].is_sent_start = True
+            splits += 1
+            start = cut
+        return splits
+
+
+@Language.factory("sentence_guard", default_config={"max_tokens": MAX_SENTENCE_TOKENS})
+def create_sentence_guard(nlp: Language, name: str, max_tokens: int) -> SentenceGuard:
+    return SentenceGuard(max_tokens)
@@ -0,0 +1,13 @@
+"""
+Ссылки элементов анализа (конструкций, ошибок, предложных фраз) на предложения
+"""
+from typing import Any, Dict
+
+
+def sentence_reference(sent, index: int, normalized: bool) -> Dict[str, Any]:
+    """
+    Текст предложения или, в нормализованном ответе, его номер в разделе sentences
+    """
+    if normalized:
+        return {"sentence_index": index}
+    return {"sentence": sent.text}
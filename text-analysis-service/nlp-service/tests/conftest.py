@@ -0,0 +1,29 @@
+"""
+Общие фикстуры тестов
+"""
+from pathlib import Path
+
+import pytest
+import spacy
+from app.models.analyzer import TextAnalyzer
+
+
+@pytest.fixture
+def analyzer():
+    """Создание экземпляра анализатора"""
+    try:
+        return TextAnalyzer("en_core_web_sm")
+    except OSError:
+        pytest.skip("spaCy model not installed")
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Клиент сервиса с запущенным пулом анализаторов"""
+    from fastapi.testclient import TestClient
+    from app import main
+    
+    if not (spacy.util.is_package(main.model_name) or Path(main.model_name).exists()):
+        pytest.skip("spaCy model not installed")
+    with TestClient(main.app) as client:
+        yield client
@@ -0,0 +1,49 @@
+"""
+Тесты для контроля допуска запросов
+"""
+import pytest
+from app.services.admission import AdmissionController, Overloaded
+
+
+def test_admit_within_budget():
+    """Тест допуска работы в пределах бюджета"""
+    controller = AdmissionController(max_cost=1000, request_overhead=0)
+    
+    with controller.admit(400):
+        with controller.admit(600):
+            assert controller.in_flight == 1000
+    
+    assert controller.in_flight == 0
+    assert controller.admitted == 2
+
+
+def test_reject_over_budget():
+    """Тест отклонения работы сверх бюджета с Retry-After"""
+    controller = AdmissionController(max_cost=1000, request_overhead=0, default_drain_rate=100)
+    
+    with controller.admit(800):
+        with pytest.raises(Overloaded) as exc_info:
+            controller.admit(500)
+    
+    # Нужно освободить 300 единиц при скорости 100 в секунду
+    assert exc_info.value.retry_after == 3
+    assert controller.rejected == 1
+
+
+def test_retry_after_is_capped():
+    """Тест ограничения Retry-After сверху"""
+    controller = AdmissionController(max_cost=10, request_overhead=0, default_drain_rate=1, max_retry_after=5)
+    
+    with controller.admit(10):
+        with pytest.raises(Overloaded) as exc_info:
+            controller.admit(1000)
+    
+    assert exc_info.value.retry_after == 5
+
+
+def test_oversized_work_admitted_when_idle():
+    """Тест что работа больше бюджета допускается на простаивающий сервис"""
+    controller = AdmissionController(max_cost=100, request_overhead=0)
+    
+    with controller.admit(500):
+        assert controller.in_flight == 500
@@ -2,16 +2,7 @@
 Тесты для основного модуля анализатора
 """
 import pytest
-from app.models.analyzer import TextAnalyzer
-
-
-@pytest.fixture
-def analyzer():
-    """Создание экземпляра анализатора"""
-    try:
-        return TextAnalyzer("en_core_web_sm")
-    except OSError:
-        pytest.skip("spaCy model not installed")
+from app.models.analyzer import AnalysisInterrupted
 
 
 def test_analyze_basic(analyzer):
@@ -81,3 +72,100 @@ def test_sentences_extraction(analyzer):
     assert result["sentences"][0]["text"].strip() == "The cat sat."
     assert result["sentences"][1]["text"].strip() == "The dog ran."
 
+
+
+def test_analyze_batch_order(analyzer):
+    """Тест пакетного анализа: порядок результатов совпадает с порядком текстов"""
+    items = [
+        ("The cat sat.", {}),
+        ("The dog ran. The bird flew.", {}),
+        ("Hello.", {"max_length": 100})
+    ]
+    
+    outcomes = analyzer.analyze_batch(items, batch_size=2)
+    
+    assert len(outcomes) == 3
+    assert all(outcome["error"] is None for outcome in outcomes)
+    assert len(outcomes[1]["result"]["sentences"]) == 2
+    assert outcomes[2]["result"]["tokens"][0]["text"] == "Hello"
+
+
+def test_analyze_batch_matches_single(analyzer):
+    """Тест что пакетный анализ совпадает с анализом по одному тексту"""
+    text = "The cat sat on the mat."
+    
+    outcome = analyzer.analyze_batch([(text, {})])[0]
+    
+    assert outcome["result"] == analyzer.analyze(text, {})
+
+
+def test_checkpoint_interrupts_analysis(analyzer):
+    """Тест прерывания анализа между этапами"""
+    def checkpoint(stage):
+        if stage == "statistics":
+            raise AnalysisInterrupted("deadline")
+    
+    with pytest.raises(AnalysisInterrupted):
+        analyzer.analyze("The cat sat on the mat.", {}, checkpoint)
+
+
+def test_partial_results_on_deadline(analyzer):
+    """Тест частичного результата при истечении дедлайна"""
+    def checkpoint(stage):
+        if stage == "grammar_errors":
+            raise AnalysisInterrupted("deadline")
+    
+    result = analyzer.analyze("The cat sat on the mat.", {"partial_results": True}, checkpoint)
+    
+    assert result["partial"] is True
+    assert len(result["tokens"]) > 0
+    assert "statistics" in result
+    assert "grammar_errors" not in result
+    assert "complexity_metrics" not in result
+
+
+def test_cancelled_analysis_has_no_partial_result(analyzer):
+    """Тест что отмененный запрос не возвращает частичный результат"""
+    def checkpoint(stage):
+        if stage == "statistics":
+            raise AnalysisInterrupted("cancelled")
+    
+    with pytest.raises(AnalysisInterrupted):
+        analyzer.analyze("The cat sat.", {"partial_results": True}, checkpoint)
+
+
+def test_skip_sections(analyzer):
+    """Тест пропуска необязательных этапов"""
+    options = {"skip_sections": ["grammar_constructions", "morphology"]}
+    result = analyzer.analyze("The cat sat on the mat.", options)
+    
+    assert result["skipped_sections"] == ["morphology", "grammar_constructions"]
+    assert "grammar_constructions" not in result
+    assert "grammar_errors" in result
+    assert all(token["morphology"] is None for token in result["tokens"])
+
+
+def test_analyze_stream_matches_analyze(analyzer):
+    """Тест что потоковый анализ дает те же токены и показатели документа"""
+    text = "The cat sat on the mat. Dogs bark loudly at night. She has been reading a book."
+    records = []
+    analyzer.analyze_stream(text, {}, records.append)
+    result = analyzer.analyze(text, {})
+    
+    sentences = [record for record in records if record["type"] == "sentence"]
+    summary = records[-1]
+    
+    assert len(sentences) == len(result["sentences"])
+    assert [token for record in sentences for token in record["tokens"]] == result["tokens"]
+    assert summary["type"] == "summary"
+    assert summary["statistics"] == result["statistics"]
+    assert summary["complexity_metrics"] == result["complexity_metrics"]
+
+
+def test_analyze_sentences_local_ids(analyzer):
+    """Тест независимого анализа предложений фрагмента"""
+    text = "The cat sat on the mat. Dogs bark loudly. "
+    items = analyzer.analyze_sentences(text, {})
+    
+    assert "".join(item["text"] for item in items) == text
+    assert [item["record"]["tokens"][0]["id"] for item in items] == [0, 0]
@@ -0,0 +1,96 @@
+"""
+Тесты для колоночного формата ответа
+"""
+import json
+
+from app.schemas.models import ColumnarAnalysisResponse
+from app.services.columnar import from_columnar, to_columnar
+from app.utils.json_encoding import dumps, with_defaults
+
+
+def _token(i, text, pos, dep, head, **analyses):
+    token = {
+        "id": i, "text": text, "lemma": text.lower(), "pos": pos, "tag": pos,
+        "dependency": {"dep": dep, "head": head, "head_text": None},
+        "morphology": None, "grammar": None, "verb_type": None, "participle": None,
+        "adverb_classification": None, "adjective_analysis": None, "preposition_analysis": None
+    }
+    token.update(analyses)
+    return token
+
+
+def _result():
+    tokens = [
+        _token(0, "Dogs", "NOUN", "nsubj", 1, morphology={"Number": "Plur"}),
+        _token(1, "bark", "VERB", "ROOT", None, grammar={"tense": "present", "aspect": "simple", "voice": "active"}),
+        _token(2, ".", "PUNCT", "punct", 1)
+    ]
+    for token in tokens:
+        head = token["dependency"]["head"]
+        token["dependency"]["head_text"] = None if head is None else tokens[head]["text"]
+    return {
+        "tokens": tokens,
+        "sentences": [{"start": 0, "end": 3, "text": "Dogs bark."}],
+        "dependency_tree": {
+            "root": 1,
+            "nodes": [{"id": t["id"], "text": t["text"], "pos": t["pos"], "dep": t["dependency"]["dep"]} for t in tokens],
+            "edges": [{"source": 0, "target": 1, "relation": "nsubj"}, {"source": 2, "target": 1, "relation": "punct"}]
+        },
+        "complexity_metrics": None
+    }
+
+
+def test_columns():
+    """Тест параллельных массивов, таблицы меток и разреженных анализов"""
+    columnar = to_columnar(_result())
+    tokens = columnar["tokens"]
+    
+    assert tokens["count"] == 3
+    assert tokens["text"] == ["Dogs", "bark", "."]
+    assert [columnar["labels"][i] for i in tokens["dep"]] == ["nsubj", "ROOT", "punct"]
+    assert tokens["head"] == [1, -1, 1]
+    assert tokens["morphology"] == {0: {"Number": "Plur"}}
+    assert tokens["participle"] == {}
+    assert columnar["dependency_tree"] == {"root": 1}
+    assert len(columnar["labels"]) == len(set(columnar["labels"]))
+
+
+def test_full_tree_without_head_and_dep():
+    """Тест что дерево зависимостей остается полным, если массивы head и dep не выбраны"""
+    result = _result()
+    result["tokens"] = [{"id": t["id"], "text": t["text"], "pos": t["pos"]} for t in result["tokens"]]
+    
+    columnar = to_columnar(result)
+    
+    assert "head" not in columnar["tokens"]
+    assert columnar["dependency_tree"] == result["dependency_tree"]
+    assert with_defaults(ColumnarAnalysisResponse, columnar)["dependency_tree"] == result["dependency_tree"]
+    assert from_columnar(json.loads(dumps(columnar)))["dependency_tree"] == result["dependency_tree"]
+
+
+def test_round_trip_through_json():
+    """Тест что обычный формат восстанавливается после кодирования в JSON"""
+    result = _result()
+    
+    decoded = json.loads(dumps(to_columnar(result)))
+    
+    assert from_columnar(decoded) == result
+
+
+def test_without_tokens():
+    """Тест результата без токенов (частичный результат)"""
+    result = {"partial": True, "sentences": []}
+    
+    assert to_columnar(result) is result
+
+
+def test_smaller_than_objects(analyzer):
+    """Тест размера и соответствия схеме на результате анализатора"""
+    text = "The children were playing in the garden when it started to rain. " * 20
+    result = analyzer.analyze(text, {"max_length": 10000})
+    
+    columnar = to_columnar(result)
+    ColumnarAnalysisResponse(**with_defaults(ColumnarAnalysisResponse, columnar))
+    
+    assert len(dumps(columnar)) * 2 < len(dumps(result))
+    assert from_columnar(json.loads(dumps(columnar)))["tokens"] == result["tokens"]
@@ -0,0 +1,80 @@
+"""
+Тесты для метрик синтаксической сложности
+"""
+import spacy
+from spacy.tokens import Doc
+from app.utils.complexity_analyzer import (
+    calculate_complexity_metrics, summarize_complexity, merge_complexity_summaries,
+    complexity_metrics_from_summary
+)
+
+
+def _parsed_doc():
+    """Документ с заданным разбором, без загрузки модели"""
+    nlp = spacy.blank("en")
+    words = ["The", "big", "cat", "sat", "on", "the", "mat", ".", "Dogs", "bark", "loudly", "."]
+    return Doc(
+        nlp.vocab,
+        words=words,
+        heads=[2, 2, 3, 3, 3, 6, 4, 3, 9, 9, 9, 9],
+        deps=["det", "amod", "nsubj", "ROOT", "prep", "det", "pobj", "punct", "nsubj", "ROOT", "advmod", "punct"],
+        pos=["DET", "ADJ", "NOUN", "VERB", "ADP", "DET", "NOUN", "PUNCT", "NOUN", "VERB", "ADV", "PUNCT"],
+        lemmas=[word.lower() for word in words],
+        sent_starts=[True] + [False] * 7 + [True] + [False] * 3
+    )
+
+
+def _tokens(doc):
+    return [{"id": token.i, "pos": token.pos_, "lemma": token.lemma_} for token in doc]
+
+
+def _tree(doc):
+    return {
+        "root": 3,
+        "nodes": [{"id": token.i} for token in doc],
+        "edges": [{"source": token.i, "target": token.head.i} for token in doc if token.head.i != token.i]
+    }
+
+
+def test_summaries_match_document_metrics():
+    """Тест что метрики из сводок предложений совпадают с метриками документа"""
+    doc = _parsed_doc()
+    tokens = _tokens(doc)
+    
+    summary = None
+    for sent in doc.sents:
+        sent_tokens = [token for token in tokens if sent.start <= token["id"] < sent.end]
+        summary = merge_complexity_summaries(summary, summarize_complexity(sent, sent_tokens))
+    
+    assert complexity_metrics_from_summary(summary) == calculate_complexity_metrics(doc, tokens, _tree(doc))
+
+
+def test_document_metrics():
+    """Тест глубины зависимостей и коэффициента сложности документа"""
+    doc = _parsed_doc()
+    
+    metrics = calculate_complexity_metrics(doc, _tokens(doc), _tree(doc))
+    
+    # Глубины: 2, 2, 1, 0, 1, 3, 2, 1 и 1, 0, 1, 1; не больше 3 зависимых у корней
+    assert metrics["average_dependency_depth"] == 15 / 12
+    assert metrics["average_sentence_length"] == 5.0
+    assert metrics["complexity_coefficient"] == 1.5
+    assert metrics["sentence_count"] == 2
+
+
+def test_empty_summary():
+    """Тест метрик пустого документа"""
+    doc = spacy.blank("en")("")
+    
+    assert complexity_metrics_from_summary(None) == calculate_complexity_metrics(doc, [], {"root": None, "nodes": [], "edges": []})
+
+
+def test_cyclic_parse():
+    """Тест что цикл в некорректном разборе не приводит к зацикливанию"""
+    nlp = spacy.blank("en")
+    doc = Doc(nlp.vocab, words=["a", "b", "c"], heads=[1, 0, 2], deps=["dep", "dep", "ROOT"])
+    
+    summary = summarize_complexity(doc[:], _tokens(doc))
+    
+    assert summary["depth_sum"] == 2
+    assert summary["nodes"] == 3
@@ -0,0 +1,76 @@
+"""
+Тесты для облегченного анализа под нагрузкой
+"""
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.services.degradation import Degradation
+
+
+def _admin_request(token=None):
+    headers = [(b"x-admin-token", token.encode())] if token else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_no_degradation_without_queue_wait():
+    """Тест что без ожидания в очереди этапы не пропускаются"""
+    degradation = Degradation({"grammar_constructions": 0.5})
+    
+    degradation.observe(0.01)
+    
+    assert degradation.skipped_sections() == []
+
+
+def test_stages_skipped_past_thresholds():
+    """Тест пропуска этапов, порог которых превышен"""
+    degradation = Degradation({"grammar_constructions": 0.5, "morphology": 2.0})
+    
+    for _ in range(10):
+        degradation.observe(1.0)
+    
+    assert degradation.skipped_sections() == ["grammar_constructions"]
+    assert degradation.stats()["degraded_requests"] == 1
+
+
+def test_old_waits_leave_window():
+    """Тест что ожидание за пределами окна не учитывается"""
+    degradation = Degradation({"grammar_constructions": 0.5}, window_seconds=0)
+    
+    degradation.observe(1.0)
+    
+    assert degradation.skipped_sections() == []
+
+
+def test_disabled_stages():
+    """Тест ручного отключения этапов"""
+    degradation = Degradation({})
+    
+    degradation.set_disabled(["grammar_errors"])
+    
+    assert degradation.skipped_sections() == ["grammar_errors"]
+    assert degradation.stats()["disabled"] == ["grammar_errors"]
+
+
+def test_admin_endpoints_closed_without_token(monkeypatch):
+    """Тест что без NLP_ADMIN_TOKEN эндпоинты администратора закрыты"""
+    from app import main
+    
+    monkeypatch.setattr(main, "admin_token", None)
+    
+    with pytest.raises(HTTPException) as error:
+        main._check_admin(_admin_request("anything"))
+    
+    assert error.value.status_code == 403
+
+
+def test_admin_token_checked(monkeypatch):
+    """Тест проверки токена администратора"""
+    from app import main
+    
+    monkeypatch.setattr(main, "admin_token", "secret")
+    
+    main._check_admin(_admin_request("secret"))
+    for token in (None, "wrong"):
+        with pytest.raises(HTTPException) as error:
+            main._check_admin(_admin_request(token))
+        assert error.value.status_code == 403
@@ -0,0 +1,97 @@
+"""
+Тесты для сессий инкрементального анализа
+"""
+import re
+from app.services.edit_sessions import EditSession, EditSessions
+
+
+def _analyze(fragment):
+    """Имитация анализа фрагмента: предложения до точки включительно с пробелами"""
+    items = []
+    for text in re.findall(r"[^.]*\.?\s*", fragment):
+        if not text:
+            continue
+        words = text.split()
+        items.append({
+            "text": text,
+            "record": {"text": text.strip()},
+            "statistics": {"words": len(words)},
+            "complexity": {
+                "sentences": 1, "words": len(words), "lexical_words": len(words),
+                "lemmas": set(words), "syllables": len(words), "characters": len(text),
+                "nodes": len(words), "depth_sum": 0, "max_children": 0
+            }
+        })
+    return items
+
+
+def _edit(session, text):
+    plan = session.plan(text)
+    if plan is None:
+        return None
+    first, last, fragment = plan
+    return session.apply(first, last, _analyze(fragment))
+
+
+def test_only_changed_sentences_are_reanalyzed():
+    """Тест что правка заново анализирует измененное предложение и его соседей"""
+    session = EditSession("s")
+    text = "One cat. Two dogs. Three birds. Four fish. Five cows."
+    
+    first = _edit(session, text)
+    update = _edit(session, text.replace("Three", "3"))
+    
+    assert first["reset"] is True
+    assert len(first["sentences"]) == 5
+    assert (update["start"], update["deleted"]) == (1, 3)
+    assert [s["text"] for s in update["sentences"]] == ["Two dogs.", "3 birds.", "Four fish."]
+    assert "".join(sentence.text for sentence in session.sentences) == text.replace("Three", "3")
+
+
+def test_unchanged_text_has_no_update():
+    """Тест что повтор того же текста не вызывает анализа"""
+    session = EditSession("s")
+    _edit(session, "One cat. Two dogs.")
+    
+    assert session.plan("One cat. Two dogs.") is None
+
+
+def test_aggregates_follow_edits():
+    """Тест пересчета показателей документа после правки"""
+    session = EditSession("s")
+    _edit(session, "One cat. Two dogs.")
+    
+    update = _edit(session, "One cat. Two big dogs.")
+    
+    assert update["statistics"] == {"words": 5}
+    assert update["complexity_metrics"]["word_count"] == 5
+
+
+def test_idle_session_evicted_over_budget():
+    """Тест вытеснения результатов давно не использованной сессии"""
+    sessions = EditSessions(max_bytes=1, idle_timeout=600)
+    idle = sessions.open()
+    active = sessions.open()
+    
+    _edit(idle, "One cat.")
+    sessions.touch(idle)
+    _edit(active, "Two dogs.")
+    sessions.touch(active)
+    
+    assert idle.sentences == []
+    assert active.sentences
+    assert sessions.stats()["evicted"] == 1
+    # После вытеснения следующая правка анализирует весь текст
+    assert _edit(idle, "One cat.")["reset"] is True
+
+
+def test_binary_frame_gets_error_reply():
+    """Тест что бинарный кадр получает ответ с ошибкой и не закрывает сессию"""
+    from fastapi.testclient import TestClient
+    from app import main
+    
+    with TestClient(main.app).websocket_connect("/analyze/session") as websocket:
+        websocket.send_bytes(b"\x00\x01")
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_text("not json")
+        assert websocket.receive_json() == {"type": "error", "error": "Invalid JSON"}
@@ -0,0 +1,201 @@
+"""
+Тесты для справедливой очереди между клиентами
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.services.fair_scheduler import FairScheduler, interactive_reservation
+
+
+async def _submit(scheduler, order, client_id, cost, name):
+    async with scheduler.slot(client_id, cost):
+        order.append(name)
+        await asyncio.sleep(0.01)
+
+
+async def _submit_lane(scheduler, order, name, lane):
+    async with scheduler.slot(name, 100, lane=lane):
+        order.append(name)
+        await asyncio.sleep(0.01)
+
+
+def test_light_client_overtakes_heavy_backlog():
+    """Тест что клиент с коротким текстом не ждет всю очередь тяжелого клиента"""
+    scheduler = FairScheduler(capacity=1)
+    order = []
+
+    async def run():
+        # Тяжелый клиент занимает слот и ставит в очередь еще три больших текста
+        tasks = [asyncio.create_task(_submit(scheduler, order, "heavy", 100000, f"heavy-{i}")) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(_submit(scheduler, order, "light", 100, "light")))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert order[:2] == ["heavy-0", "light"]
+
+
+def test_client_concurrency_cap():
+    """Тест ограничения одновременных запросов одного клиента"""
+    scheduler = FairScheduler(capacity=4, client_concurrency=1)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with scheduler.slot("tenant", 10):
+            peak = max(peak, scheduler.stats()["clients"]["tenant"]["running"])
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(work() for _ in range(3)))
+
+    asyncio.run(run())
+
+    assert peak == 1
+    assert scheduler.running == 0
+
+
+def test_client_throughput_cap():
+    """Тест ограничения пропускной способности клиента (символов в секунду)"""
+    scheduler = FairScheduler(capacity=4, client_chars_per_second=1000)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(2):
+            async with scheduler.slot("tenant", 1000):
+                pass
+        return loop.time() - started
+
+    elapsed = asyncio.run(run())
+
+    # Второй запрос ждет восполнения bucket примерно одну секунду
+    assert elapsed >= 0.9
+
+
+def test_cancelled_waiter_leaves_queue():
+    """Тест что отмененный запрос удаляется из очереди"""
+    scheduler = FairScheduler(capacity=1)
+
+    async def run():
+        async with scheduler.slot("a", 10):
+            waiter = asyncio.create_task(_submit(scheduler, [], "b", 10, "b"))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            assert scheduler.stats()["queued"] == 0
+
+    asyncio.run(run())
+
+    assert scheduler.running == 0
+
+
+def test_timed_out_request_is_not_charged():
+    """Тест что запрос, не дождавшийся слота, не отодвигает следующие запросы клиента"""
+    scheduler = FairScheduler(capacity=1)
+    order = []
+
+    async def timed_out():
+        async with scheduler.slot("a", 1000, timeout=0.01):
+            pass
+
+    async def run():
+        async with scheduler.slot("x", 10):
+            try:
+                await timed_out()
+            except asyncio.TimeoutError:
+                pass
+            tasks = [asyncio.create_task(_submit(scheduler, order, "a", 100, "a"))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(_submit(scheduler, order, "b", 100, "b")))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert order == ["a", "b"]
+
+
+def test_bulk_lane_leaves_reserved_capacity():
+    """Тест что фоновая полоса не занимает зарезервированные слоты"""
+    scheduler = FairScheduler(capacity=2, interactive_reserved=1)
+    order = []
+
+    async def run():
+        tasks = [
+            asyncio.create_task(_submit_lane(scheduler, order, f"bulk-{i}", "bulk"))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats()["lanes"]["bulk"]["running"] == 1
+        tasks.append(asyncio.create_task(_submit_lane(scheduler, order, "ui", "interactive")))
+        await asyncio.sleep(0)
+        # Интерактивный запрос сразу получает зарезервированный слот
+        assert order[:2] == ["bulk-0", "ui"]
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    lanes = scheduler.stats()["lanes"]
+    assert lanes["bulk"]["dispatched"] == 3
+    assert lanes["interactive"]["dispatched"] == 1
+    assert lanes["bulk"]["queued"] == 0
+    assert scheduler.running == 0
+
+
+def test_interactive_lane_overtakes_queued_bulk():
+    """Тест что интерактивные запросы выполняются раньше ожидающих фоновых"""
+    scheduler = FairScheduler(capacity=1)
+    order = []
+
+    async def run():
+        async with scheduler.slot("a", 10):
+            tasks = [asyncio.create_task(_submit_lane(scheduler, order, "bulk", "bulk"))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(_submit_lane(scheduler, order, "ui", "interactive")))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert order == ["ui", "bulk"]
+
+
+def test_interactive_reservation():
+    """Тест что фоновой полосе остаются не все рабочие процессы"""
+    assert interactive_reservation(16, 4) == 13
+    assert interactive_reservation(8, 2) == 7
+    assert interactive_reservation(4, 1) == 3
+
+
+def test_interactive_request_overtakes_bulk_in_worker_queue():
+    """Тест что интерактивный запрос не ждет фоновые в очереди пула процессов"""
+    workers = 2
+    capacity = workers * 4
+    scheduler = FairScheduler(capacity=capacity, interactive_reserved=interactive_reservation(capacity, workers))
+    executor = ThreadPoolExecutor(workers)
+    finished = []
+
+    async def submit(name, lane, seconds):
+        async with scheduler.slot(name, 100, lane=lane):
+            await asyncio.get_running_loop().run_in_executor(executor, time.sleep, seconds)
+            finished.append(name)
+
+    async def run():
+        tasks = [asyncio.create_task(submit(f"bulk-{i}", "bulk", 0.1)) for i in range(6)]
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        await submit("ui", "interactive", 0.01)
+        elapsed = time.monotonic() - started
+        await asyncio.gather(*tasks)
+        return elapsed
+
+    try:
+        elapsed = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    # Интерактивный запрос выполняется на свободном процессе, не дожидаясь фоновых
+    assert elapsed < 0.08
+    assert finished[0] == "ui"
@@ -0,0 +1,74 @@
+"""
+Тесты для выбора разделов ответа и полей токенов
+"""
+from app.models.analyzer import requested_sections, select_fields, token_fields
+from app.services.columnar import from_columnar, to_columnar
+
+
+TEXT = "The children were playing in the garden when it started to rain."
+
+
+def test_requested_sections():
+    """Тест раскрытия набора summary и порядка разделов"""
+    assert requested_sections({}) is None
+    assert requested_sections({"sections": "summary"}) == ("statistics", "complexity_metrics")
+    assert requested_sections({"sections": "grammar_errors, tokens"}) == ("tokens", "grammar_errors")
+
+
+def test_token_fields():
+    """Тест полей токенов, нужных запрошенным разделам"""
+    assert token_fields({}) is None
+    assert token_fields({"sections": "tokens", "token_fields": "lemma,text"}) == ("id", "text", "lemma")
+    assert "grammar" in token_fields({"token_fields": "text"})
+    assert token_fields({"sections": "grammar_errors"}) == ("id", "grammar")
+    assert token_fields({"sections": "sentences"}) == ("id",)
+
+
+def test_select_fields():
+    """Тест удаления лишних разделов и полей токенов"""
+    result = {
+        "tokens": [{"id": 0, "text": "Hi", "lemma": "hi", "pos": "INTJ", "start_char": 0, "end_char": 2}],
+        "sentences": [{"start": 0, "end": 1, "text": "Hi"}],
+        "statistics": {"pos_distribution": {"INTJ": 1}},
+        "partial": False
+    }
+    
+    selected = select_fields(result, {"sections": "tokens", "token_fields": "pos"})
+    
+    assert selected == {
+        "tokens": [{"id": 0, "pos": "INTJ", "start_char": 0, "end_char": 2}],
+        "partial": False
+    }
+
+
+def test_columnar_with_selected_fields():
+    """Тест колоночного формата без части полей токенов"""
+    result = {"tokens": [{"id": 0, "text": "Hi", "pos": "INTJ"}, {"id": 1, "text": "!", "pos": "PUNCT"}]}
+    
+    columnar = to_columnar(result)
+    
+    assert set(columnar["tokens"]) == {"count", "text", "pos"}
+    assert from_columnar(columnar) == result
+
+
+def test_summary_only(analyzer):
+    """Тест что summary возвращает только статистику и метрики сложности"""
+    full = analyzer.analyze(TEXT, {"max_length": 10000})
+    result = analyzer.analyze(TEXT, {"max_length": 10000, "sections": "summary"})
+    
+    assert "tokens" not in result
+    assert "sentences" not in result
+    assert result["statistics"] == full["statistics"]
+    assert result["complexity_metrics"] == full["complexity_metrics"]
+
+
+def test_selected_token_fields(analyzer):
+    """Тест что выбранные поля токенов совпадают с полным анализом"""
+    full = analyzer.analyze(TEXT, {"max_length": 10000})
+    result = analyzer.analyze(TEXT, {"max_length": 10000, "token_fields": "text,lemma,pos"})
+    
+    assert result["tokens"] == [
+        {"id": t["id"], "text": t["text"], "lemma": t["lemma"], "pos": t["pos"]} for t in full["tokens"]
+    ]
+    assert result["statistics"] == full["statistics"]
+    assert result["grammar_constructions"] == full["grammar_constructions"]
@@ -0,0 +1,96 @@
+"""
+Тесты для асинхронных задач и хранилища результатов
+"""
+import asyncio
+import json
+import pytest
+from app.services.job_manager import JobManager, QueueFull, IdempotencyConflict
+from app.services.result_store import ResultStore
+
+
+async def _echo_runner(text, options, client_id):
+    return {"text": text}
+
+
+def test_result_store_evicts_oldest_over_memory_cap():
+    """Тест вытеснения старых результатов при превышении лимита памяти"""
+    store = ResultStore(ttl_seconds=60, max_bytes=100)
+    
+    store.put("a", b"a" * 60, 60)
+    store.put("b", b"b" * 60, 60)
+    
+    assert store.get("a") is None
+    assert store.get("b") == b"b" * 60
+    assert store.stats()["evicted"] == 1
+
+
+def test_result_store_ttl():
+    """Тест истечения результатов по TTL"""
+    store = ResultStore(ttl_seconds=0, max_bytes=100)
+    
+    store.put("a", b"a", 1)
+    
+    assert store.get("a") is None
+    assert store.size == 0
+
+
+def test_job_completes_with_result():
+    """Тест выполнения задачи и сохранения результата"""
+    manager = JobManager(_echo_runner, ResultStore(60, 1024), concurrency=1, max_queued=10)
+    
+    async def run():
+        manager.start()
+        job, created = manager.submit("The cat sat.", {}, "client")
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        return job, created
+    
+    job, created = asyncio.run(run())
+    
+    assert created
+    assert manager.get(job.job_id).status == "completed"
+    assert json.loads(manager.result(job.job_id)) == {"text": "The cat sat."}
+
+
+def test_result_evicted_after_status_check():
+    """Тест что результат, вытесненный после проверки статуса, помечает задачу expired"""
+    store = ResultStore(60, 100)
+    manager = JobManager(_echo_runner, store, concurrency=1, max_queued=10)
+    
+    async def run():
+        manager.start()
+        job, _ = manager.submit("The cat sat.", {}, "client")
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        return job
+    
+    job = asyncio.run(run())
+    assert manager.get(job.job_id).status == "completed"
+    
+    store.put("other", b"x" * 90, 90)
+    
+    assert manager.result(job.job_id) is None
+    assert job.status == "expired"
+
+
+def test_idempotency_key_returns_same_job():
+    """Тест что повторный запрос с тем же ключом получает ту же задачу"""
+    manager = JobManager(_echo_runner, ResultStore(60, 1024), concurrency=1, max_queued=10)
+    
+    first, _ = manager.submit("text", {}, "client", "key-1")
+    second, created = manager.submit("text", {}, "client", "key-1")
+    
+    assert second is first
+    assert not created
+    with pytest.raises(IdempotencyConflict):
+        manager.submit("other text", {}, "client", "key-1")
+
+
+def test_queue_is_bounded():
+    """Тест ограничения очереди задач"""
+    manager = JobManager(_echo_runner, ResultStore(60, 1024), concurrency=1, max_queued=1)
+    
+    manager.submit("first", {}, "client")
+    
+    with pytest.raises(QueueFull):
+        manager.submit("second", {}, "client")
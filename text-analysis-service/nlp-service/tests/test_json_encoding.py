@@ -0,0 +1,65 @@
+"""
+Тесты для кодирования ответов без pydantic
+"""
+import json
+
+from app.schemas.models import AnalysisResponse, BatchItemResult
+from app.utils.json_encoding import dumps, with_defaults
+
+
+def test_dumps_numeric_keys():
+    """Тест что числовые ключи кодируются строками, как в json.dumps"""
+    value = {"lengths": {3: 2, 10: 1}, "text": "naïve"}
+    
+    assert json.loads(dumps(value)) == json.loads(json.dumps(value))
+
+
+def test_with_defaults():
+    """Тест заполнения отсутствующих полей значениями по умолчанию"""
+    payload = with_defaults(AnalysisResponse, {"tokens": [], "partial": True})
+    
+    assert payload["partial"] is True
+    assert payload["skipped_sections"] == []
+    assert payload["forced_sentence_splits"] == 0
+    assert payload["version"] is None
+    assert payload["language_check"] is None
+
+
+def test_with_defaults_fills_nested_models():
+    """Тест заполнения необязательных полей вложенных моделей, кроме полей токенов"""
+    error = {"type": "agreement", "severity": "error", "message": "Subject and verb disagree"}
+    tokens = [{"id": 0, "text": "Dogs"}, {"id": 1, "text": "bark", "verb_type": {"type": "regular"}}]
+    
+    payload = with_defaults(AnalysisResponse, {"tokens": tokens, "grammar_errors": [error]})
+    
+    assert payload["grammar_errors"][0]["subject_id"] is None
+    assert payload["grammar_errors"][0]["sentence"] is None
+    assert payload["tokens"][0] is tokens[0]
+    assert payload["tokens"][1]["verb_type"]["auxiliary_type"] is None
+    assert "lemma" not in payload["tokens"][1]
+    assert "subject_id" not in error and "auxiliary_type" not in tokens[1]["verb_type"]
+
+
+def test_with_defaults_keeps_required_fields_missing():
+    """Тест что обязательные поля не подставляются"""
+    assert with_defaults(BatchItemResult, {"index": 1, "error": "failed"}) == {
+        "index": 1, "error": "failed", "result": None
+    }
+
+
+def test_analyzer_output_matches_schema(analyzer):
+    """Тест что результат анализатора проходит проверку схемой и кодируется так же"""
+    text = "The children were playing in the garden when it started to rain. If I had known, I would have come."
+    result = analyzer.analyze(text, {"max_length": 10000})
+    payload = with_defaults(AnalysisResponse, result)
+    
+    validated = AnalysisResponse(**payload)
+    
+    encoded = json.loads(dumps(payload))
+    dumped = validated.model_dump(mode="json")
+    # Поля токенов, которых нет в результате (options.token_fields), не дополняются
+    dumped["tokens"] = [
+        {name: value for name, value in token.items() if name in original}
+        for token, original in zip(dumped["tokens"], encoded["tokens"])
+    ]
+    assert encoded == dumped
@@ -0,0 +1,93 @@
+"""
+Тесты для проверки языка перед разбором
+"""
+import pytest
+
+from app.services.language_filter import LanguageFilter
+from app.utils.language_detector import detect_language
+
+ENGLISH = "The quick brown fox jumps over the lazy dog while the farmer watches from his porch."
+GERMAN = "Der schnelle braune Fuchs springt über den faulen Hund, während der Bauer von seiner Veranda aus zuschaut."
+RUSSIAN = "Быстрая коричневая лиса прыгает через ленивую собаку, пока фермер смотрит с крыльца."
+
+
+def test_english_detected():
+    """Тест что английский текст получает высокую оценку"""
+    detection = detect_language(ENGLISH)
+    
+    assert detection["language"] == "en"
+    assert detection["english_score"] > 0.5
+
+
+def test_technical_english_detected():
+    """Тест английского текста с терминами"""
+    detection = detect_language("Configure the Kubernetes deployment using Helm charts, then verify pod readiness with kubectl.")
+    
+    assert detection["language"] == "en"
+    assert detection["english_score"] > 0.5
+
+
+@pytest.mark.parametrize("text,language", [
+    (GERMAN, "de"),
+    (RUSSIAN, "non_latin"),
+    ("\x00\x01\x02\x03data\x04\x05\x06\x07\x08\x0b\x0c\x0e\x0f" * 5, "garbage"),
+    ("xkcd qwrt zxcv bnm plk trsd grmph vbnm qwrt zxcv", "garbage")
+])
+def test_non_english_detected(text, language):
+    """Тест другого языка, другой письменности и мусора"""
+    detection = detect_language(text)
+    
+    assert detection["language"] == language
+    assert detection["english_score"] < 0.3
+
+
+@pytest.mark.parametrize("text", [
+    "Config: timeout=30s retries=5 host=db01 port=5432 user=admin mode=fast cache=on",
+    "API HTTP JSON SQL CSS HTML REST XML YAML TCP DNS SSH"
+])
+def test_few_stop_words_undetermined(text):
+    """Тест что настройки и списки аббревиатур не считаются другим языком или мусором"""
+    assert detect_language(text) == {"language": None, "english_score": 1.0}
+
+
+def test_short_text_undetermined():
+    """Тест что по короткому тексту решение не принимается"""
+    assert detect_language("Hallo Welt") == {"language": None, "english_score": 1.0}
+
+
+def test_flag_mode_counts():
+    """Тест режима flag: текст помечается, но не отклоняется"""
+    language_filter = LanguageFilter("flag", threshold=0.3)
+    
+    assert language_filter.check(ENGLISH)["is_english"]
+    assert not language_filter.check(GERMAN)["is_english"]
+    assert not language_filter.rejects
+    
+    stats = language_filter.stats()
+    assert stats["checked"] == 2
+    assert stats["flagged"] == 1
+    assert stats["rejected"] == 0
+    assert stats["detect_ms_p99"] >= stats["detect_ms_avg"] > 0
+
+
+def test_reject_mode_counts():
+    """Тест режима reject"""
+    language_filter = LanguageFilter("reject")
+    
+    assert not language_filter.check(RUSSIAN)["is_english"]
+    assert language_filter.rejects
+    assert language_filter.stats()["rejected"] == 1
+
+
+def test_off_mode():
+    """Тест выключенной проверки"""
+    language_filter = LanguageFilter("off")
+    
+    assert language_filter.check(GERMAN) is None
+    assert language_filter.stats()["checked"] == 0
+
+
+def test_unknown_mode():
+    """Тест неизвестного режима"""
+    with pytest.raises(ValueError):
+        LanguageFilter("strict")
@@ -0,0 +1,97 @@
+"""
+Тесты для анализа длинных документов по частям
+"""
+import asyncio
+from app.services.long_documents import merge_chunks, split_text
+
+
+def test_split_text_at_paragraphs():
+    """Тест разбиения по границам абзацев без потери символов"""
+    text = "\n\n".join("The cat sat on the mat. The dog ran away." for _ in range(10))
+    
+    chunks = split_text(text, 100)
+    
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.endswith("away.") for chunk in chunks[:-1])
+
+
+def test_split_text_at_sentences():
+    """Тест разбиения по концам предложений, если абзацев нет"""
+    text = " ".join("The cat sat on the mat." for _ in range(10))
+    
+    chunks = split_text(text, 60)
+    
+    assert "".join(chunks) == text
+    assert all(chunk.endswith("mat. ") for chunk in chunks[:-1])
+
+
+def test_split_short_text():
+    """Тест что короткий текст не разбивается"""
+    assert split_text("Short text.", 100) == ["Short text."]
+
+
+def test_merged_chunks_match_whole_document(analyzer):
+    """Тест что объединенный результат частей совпадает с анализом всего текста"""
+    text = "\n\n".join("The cat sat on the mat. The dogs runs in the park." for _ in range(6))
+    
+    whole = analyzer.analyze(text, {"max_length": len(text)})
+    merged = merge_chunks([analyzer.analyze_chunk(chunk, {}) for chunk in split_text(text, 120)])
+    
+    assert merged["tokens"] == whole["tokens"]
+    assert merged["statistics"] == whole["statistics"]
+    assert merged["complexity_metrics"] == whole["complexity_metrics"]
+    assert len(merged["grammar_errors"]) == len(whole["grammar_errors"])
+
+
+def test_merged_chunks_shift_sentence_indices(analyzer):
+    """Тест что номера предложений нормализованного ответа отсчитываются от начала документа"""
+    text = "\n\n".join("The cat sat on the mat. The dogs were walked by the boy." for _ in range(6))
+    options = {"normalized": True}
+    
+    whole = analyzer.analyze(text, {"max_length": len(text), **options})
+    merged = merge_chunks([analyzer.analyze_chunk(chunk, options) for chunk in split_text(text, 120)])
+    
+    assert merged["sentences"] == whole["sentences"]
+    assert merged["grammar_constructions"] == whole["grammar_constructions"]
+
+
+def test_merge_shifts_sentence_index():
+    """Тест сдвига номеров предложений при объединении частей"""
+    def outcome(sentence_count):
+        return {
+            "result": {
+                "sentences": [{"start": i, "end": i + 1, "text": "Hi."} for i in range(sentence_count)],
+                "grammar_constructions": [{"type": "tense", "sentence_index": sentence_count - 1}],
+                "skipped_sections": ["complexity_metrics"]
+            },
+            "complexity": None
+        }
+    
+    merged = merge_chunks([outcome(2), outcome(3)])
+    
+    assert [item["sentence_index"] for item in merged["grammar_constructions"]] == [1, 4]
+    assert len(merged["sentences"]) == 5
+
+
+def test_markup_stripped_before_split(analyzer, monkeypatch):
+    """Тест что граница части не разрезает блок кода Markdown"""
+    from app import main
+
+    class ChunkPool:
+        async def analyze_chunk(self, text, options, deadline=None, offsets=None):
+            return analyzer.analyze_chunk(text, options, None, offsets)
+
+    monkeypatch.setattr(main, "pool", ChunkPool())
+    monkeypatch.setattr(main, "long_document_chunk_chars", 80)
+    code = "\n".join(f"value_{i} = compute(x, y)" for i in range(8))
+    text = f"The cat sat on the mat.\n\n```python\n{code}\n```\n\nThe dog ran away. It was fast."
+    options = {"markup": "markdown", "long_document": True}
+
+    whole = analyzer.analyze(text, {"max_length": len(text), "markup": "markdown"})
+    merged = asyncio.run(main._execute_long_document(text, options, "client", None, "bulk"))
+
+    assert not any("compute" in token["text"] or "`" in token["text"] for token in merged["tokens"])
+    assert merged["tokens"] == whole["tokens"]
+    words = [token for token in merged["tokens"] if token["text"].isalpha()]
+    assert all(text[token["start_char"]:token["end_char"]] == token["text"] for token in words)
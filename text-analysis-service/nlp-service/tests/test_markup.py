@@ -0,0 +1,54 @@
+"""
+Тесты для очистки разметки с сохранением позиций
+"""
+from app.utils.markup import strip_markup
+
+
+def _original(text, prose, offsets, word):
+    """Фрагмент исходного текста, соответствующий слову очищенного"""
+    start = prose.index(word)
+    return text[offsets.start(start):offsets.end(start + len(word))]
+
+
+def test_strip_html():
+    """Тест удаления тегов, кода и адресов из HTML"""
+    text = '<p>The <b>cat</b> sat &amp; slept.</p><script>var x = 1;</script><p>See https://example.com now.</p>'
+    
+    prose, offsets = strip_markup(text, "html")
+    
+    assert "<" not in prose and "var x" not in prose and "https" not in prose
+    assert "The cat sat & slept." in prose
+    assert _original(text, prose, offsets, "cat") == "cat"
+    assert _original(text, prose, offsets, "&") == "&amp;"
+
+
+def test_strip_markdown():
+    """Тест удаления служебных символов Markdown с сохранением текста ссылок"""
+    text = "# Title\n\nSome **bold** text, `code` and [a link](http://x.y).\n\n```\nx = 1\n```\n- item\n"
+    
+    prose, offsets = strip_markup(text, "markdown")
+    
+    assert "#" not in prose and "*" not in prose and "x = 1" not in prose and "http" not in prose
+    assert "Some bold text" in prose
+    assert _original(text, prose, offsets, "a link") == "a link"
+    assert _original(text, prose, offsets, "item") == "item"
+
+
+def test_text_without_markup():
+    """Тест что текст без разметки не меняется"""
+    prose, offsets = strip_markup("Plain text.", "html")
+    
+    assert prose == "Plain text."
+    assert offsets.start(6) == 6 and offsets.end(11) == 11
+
+
+def test_offset_map_slice():
+    """Тест соответствия позиций для участка очищенного текста"""
+    text = "<p>One <b>two</b> three.</p>"
+    prose, offsets = strip_markup(text, "html")
+    start = prose.index("two")
+    
+    part = offsets.slice(start, len(prose))
+    
+    assert text[part.start(0):part.end(3)] == "two"
+    assert text[part.start(4):part.end(10)] == "three."
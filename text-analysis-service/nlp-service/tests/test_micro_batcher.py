@@ -0,0 +1,139 @@
+"""
+Тесты для объединения запросов в пакеты
+"""
+import asyncio
+import time
+from app.models.analyzer import AnalysisInterrupted
+from app.services.micro_batcher import MicroBatcher
+
+
+class RecordingPool:
+    """Пул, записывающий размеры пакетов вместо разбора текста"""
+
+    def __init__(self):
+        self.batches = []
+        self.deadlines = []
+
+    async def analyze(self, text, options, deadline=None):
+        self.batches.append([text])
+        self.deadlines.append([deadline])
+        return {"text": text}
+
+    async def analyze_batch(self, items, batch_size, n_process=1, deadlines=None):
+        self.batches.append([text for text, _ in items])
+        self.deadlines.append(deadlines)
+        return [
+            {"result": None, "error": "empty text"} if not text
+            else {"result": None, "error": "deadline", "interrupted": "deadline"} if text == "slow"
+            else {"result": {"text": text}, "error": None}
+            for text, _ in items
+        ]
+
+
+def test_concurrent_requests_are_batched():
+    """Тест что одновременные запросы объединяются в один пакет"""
+    pool = RecordingPool()
+    batcher = MicroBatcher(pool, max_wait_ms=50, max_batch=8)
+
+    async def run():
+        return await asyncio.gather(*(batcher.analyze(f"text {i}", {}) for i in range(5)))
+
+    results = asyncio.run(run())
+
+    assert [r["text"] for r in results] == [f"text {i}" for i in range(5)]
+    assert pool.batches == [[f"text {i}" for i in range(5)]]
+    assert batcher.stats()["batch_size_histogram"] == {"5": 1}
+
+
+def test_batch_flushed_at_max_size():
+    """Тест что пакет отправляется при достижении max_batch"""
+    pool = RecordingPool()
+    batcher = MicroBatcher(pool, max_wait_ms=1000, max_batch=4)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.analyze(f"text {i}", {}) for i in range(8))),
+            timeout=0.5
+        )
+
+    asyncio.run(run())
+
+    assert [len(batch) for batch in pool.batches] == [4, 4]
+
+
+def test_long_text_bypasses_batching():
+    """Тест что длинные тексты не ждут пакета"""
+    pool = RecordingPool()
+    batcher = MicroBatcher(pool, max_wait_ms=1000, max_batch=4, max_chars=10)
+
+    result = asyncio.run(batcher.analyze("a long text over the limit", {}))
+
+    assert result == {"text": "a long text over the limit"}
+    assert batcher.stats()["batches"] == 0
+
+
+def test_item_error_goes_to_its_caller():
+    """Тест что ошибка документа возвращается только его запросу"""
+    pool = RecordingPool()
+    batcher = MicroBatcher(pool, max_wait_ms=10, max_batch=4)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.analyze("ok", {}),
+            batcher.analyze("", {}),
+            return_exceptions=True
+        )
+
+    ok, failed = asyncio.run(run())
+
+    assert ok == {"text": "ok"}
+    assert isinstance(failed, RuntimeError)
+
+
+def test_requests_with_deadline_are_batched():
+    """Тест что запросы с дедлайном объединяются в пакет вместе с дедлайнами"""
+    pool = RecordingPool()
+    batcher = MicroBatcher(pool, max_wait_ms=20, max_batch=8)
+    deadline = time.time() + 30
+
+    async def run():
+        return await asyncio.gather(
+            batcher.analyze("first", {}, deadline),
+            batcher.analyze("second", {})
+        )
+
+    asyncio.run(run())
+
+    assert pool.batches == [["first", "second"]]
+    assert pool.deadlines == [[deadline, None]]
+
+
+def test_short_deadline_bypasses_batching():
+    """Тест что запрос, которому не хватит времени на ожидание пакета, идет в пул сразу"""
+    pool = RecordingPool()
+    batcher = MicroBatcher(pool, max_wait_ms=1000, max_batch=8)
+    deadline = time.time() + 0.5
+
+    result = asyncio.run(batcher.analyze("urgent", {}, deadline))
+
+    assert result == {"text": "urgent"}
+    assert pool.deadlines == [[deadline]]
+    assert batcher.stats()["batches"] == 0
+
+
+def test_interrupted_item_raises_analysis_interrupted():
+    """Тест что прерванный по дедлайну документ возвращает AnalysisInterrupted"""
+    pool = RecordingPool()
+    batcher = MicroBatcher(pool, max_wait_ms=10, max_batch=4)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.analyze("ok", {}, time.time() + 30),
+            batcher.analyze("slow", {}, time.time() + 30),
+            return_exceptions=True
+        )
+
+    ok, slow = asyncio.run(run())
+
+    assert ok == {"text": "ok"}
+    assert isinstance(slow, AnalysisInterrupted)
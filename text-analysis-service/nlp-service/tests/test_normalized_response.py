@@ -0,0 +1,53 @@
+"""
+Тесты для нормализованного ответа: ссылки на предложения номерами
+"""
+from app.models.analyzer import requested_sections
+from app.utils.sentence_refs import sentence_reference
+
+
+TEXT = (
+    "The children were playing in the garden when it started to rain. "
+    "The letter was written by the teacher of the class in the school. "
+    "She said that she walks to work and he was tired."
+)
+
+SECTIONS = ("grammar_errors", "grammar_constructions", "nested_prepositional_phrases")
+
+
+def test_sentence_reference():
+    """Тест ссылки на предложение текстом и номером"""
+    class Sent:
+        text = "Dogs bark."
+    
+    assert sentence_reference(Sent(), 3, False) == {"sentence": "Dogs bark."}
+    assert sentence_reference(Sent(), 3, True) == {"sentence_index": 3}
+
+
+def test_sections_include_sentences():
+    """Тест что к разделам со ссылками на предложения добавляется sentences"""
+    assert requested_sections({"sections": "grammar_errors", "normalized": True}) == ("sentences", "grammar_errors")
+    assert requested_sections({"sections": "summary", "normalized": True}) == ("statistics", "complexity_metrics")
+
+
+def test_indices_match_sentence_text(analyzer):
+    """Тест что номера предложений указывают на тот же текст, что и в обычном ответе"""
+    full = analyzer.analyze(TEXT, {"max_length": 10000})
+    normalized = analyzer.analyze(TEXT, {"max_length": 10000, "normalized": True})
+    
+    for section in SECTIONS:
+        assert len(normalized[section]) == len(full[section])
+        for plain, item in zip(full[section], normalized[section]):
+            assert "sentence" not in item or plain.get("sentence") is None
+            if plain.get("sentence") is not None:
+                assert normalized["sentences"][item["sentence_index"]]["text"] == plain["sentence"]
+
+
+def test_stream_keeps_sentence_text(analyzer):
+    """Тест что записи предложений потока сохраняют текст предложения"""
+    records = []
+    analyzer.analyze_stream(TEXT, {"max_length": 10000, "normalized": True}, records.append)
+    
+    for record in records[:-1]:
+        for item in record["grammar_constructions"]:
+            assert item["sentence"] == record["text"]
+            assert "sentence_index" not in item
@@ -0,0 +1,52 @@
+"""
+Тесты для выбора формата ответа и сжатия
+"""
+import gzip
+
+import pytest
+from app.utils.output_formats import ENCODERS, compress, negotiate_format
+
+AVAILABLE = ("json", "msgpack", "conllu")
+
+
+@pytest.mark.parametrize("accept,expected", [
+    (None, "json"),
+    ("*/*", "json"),
+    ("application/json", "json"),
+    ("text/x-conllu", "conllu"),
+    ("application/x-msgpack", "msgpack"),
+    ("application/json;q=0.5, application/msgpack", "msgpack"),
+    ("text/html, text/x-conllu;q=0.1", "conllu"),
+    ("text/html", None),
+    ("application/msgpack;q=0", None)
+])
+def test_negotiate_format(accept, expected):
+    """Тест выбора формата по заголовку Accept"""
+    assert negotiate_format(accept, AVAILABLE) == expected
+
+
+def test_unavailable_format_skipped():
+    """Тест что недоступный формат не выбирается"""
+    assert negotiate_format("application/msgpack, application/json;q=0.5", ("json",)) == "json"
+
+
+def test_compress_above_threshold():
+    """Тест сжатия только крупных ответов и только для gzip"""
+    body = b'{"tokens": []}' * 1000
+    
+    compressed, encoding = compress(body, "br;q=1.0, gzip;q=0.8", 1024, 6)
+    assert encoding == "gzip"
+    assert gzip.decompress(compressed) == body
+    
+    assert compress(body[:100], "gzip", 1024, 6) == (body[:100], None)
+    assert compress(body, "br", 1024, 6) == (body, None)
+    assert compress(body, None, 1024, 6) == (body, None)
+
+
+def test_msgpack_keeps_integer_keys():
+    """Тест кодирования MessagePack"""
+    msgpack = pytest.importorskip("msgpack")
+    
+    value = {"tokens": {"morphology": {0: {"Number": "Plur"}}}}
+    
+    assert msgpack.unpackb(ENCODERS["msgpack"](value), strict_map_key=False) == value
@@ -0,0 +1,129 @@
+"""
+Тесты для чтения разобранных документов из DocBin и CoNLL-U и записи в CoNLL-U
+"""
+import pytest
+import spacy
+from spacy.tokens import Doc, DocBin
+from app.utils.parsed_input import (
+    InvalidParsedInput, append_conllu_spaces, doc_from_conllu, doc_from_docbin, doc_to_conllu
+)
+
+CONLLU = (
+    "# text = The cat sat.\n"
+    "1\tThe\tthe\tDET\tDT\tDefinite=Def\t2\tdet\t_\t_\n"
+    "2\tcat\tcat\tNOUN\tNN\tNumber=Sing\t3\tnsubj\t_\t_\n"
+    "3\tsat\tsit\tVERB\tVBD\tTense=Past\t0\troot\t_\tSpaceAfter=No\n"
+    "4\t.\t.\tPUNCT\t.\t_\t3\tpunct\t_\t_\n"
+    "\n"
+    "1\tDogs\tdog\tNOUN\tNNS\tNumber=Plur\t2\tnsubj\t_\t_\n"
+    "2-3\tdon't\t_\t_\t_\t_\t_\t_\t_\t_\n"
+    "2\tbark\tbark\tVERB\tVBP\t_\t0\troot\t_\t_\n"
+)
+
+
+@pytest.fixture
+def vocab():
+    return spacy.blank("en").vocab
+
+
+def test_doc_from_conllu(vocab):
+    """Тест чтения предложений CoNLL-U"""
+    doc = doc_from_conllu(vocab, CONLLU)
+    
+    assert [sent.text for sent in doc.sents] == ["The cat sat.", "Dogs bark"]
+    assert [token.dep_ for token in doc] == ["det", "nsubj", "ROOT", "punct", "nsubj", "ROOT"]
+    assert doc[0].head.i == 1
+    assert doc[2].lemma_ == "sit"
+    assert str(doc[1].morph) == "Number=Sing"
+
+
+def test_doc_from_docbin(vocab):
+    """Тест чтения нескольких документов DocBin как одного"""
+    parsed = doc_from_conllu(vocab, CONLLU)
+    
+    doc = doc_from_docbin(vocab, DocBin(docs=[parsed, parsed]).to_bytes())
+    
+    assert len(doc) == 2 * len(parsed)
+    assert len(list(doc.sents)) == 4
+
+
+def test_invalid_input(vocab):
+    """Тест ошибок чтения"""
+    with pytest.raises(InvalidParsedInput):
+        doc_from_conllu(vocab, "1\tThe\tthe\n")
+    with pytest.raises(InvalidParsedInput):
+        doc_from_conllu(vocab, "1\tThe\tthe\tDET\tDT\t_\t7\tdet\t_\t_\n")
+    with pytest.raises(InvalidParsedInput):
+        doc_from_docbin(vocab, b"not a docbin")
+    with pytest.raises(InvalidParsedInput):
+        doc_from_docbin(vocab, DocBin(docs=[spacy.blank("en")("No parse")]).to_bytes())
+
+
+def test_doc_to_conllu_round_trip(vocab):
+    """Тест записи в CoNLL-U и повторного чтения"""
+    doc = doc_from_conllu(vocab, CONLLU)
+    
+    restored = doc_from_conllu(vocab, doc_to_conllu(doc))
+    
+    assert restored.text == doc.text
+    assert [(t.lemma_, t.tag_, t.dep_, t.head.i, str(t.morph)) for t in restored] == [
+        (t.lemma_, t.tag_, t.dep_, t.head.i, str(t.morph)) for t in doc
+    ]
+
+
+def test_doc_to_conllu_whitespace_tokens(vocab):
+    """Тест что пробельные токены не выводятся, а попадают в SpacesAfter"""
+    doc = Doc(
+        vocab,
+        words=["Hi", ".", "\n\n", "Bye"],
+        spaces=[False, False, False, False],
+        heads=[0, 0, 1, 3],
+        deps=["ROOT", "punct", "dep", "ROOT"],
+        sent_starts=[True, False, False, True]
+    )
+    
+    lines = doc_to_conllu(doc).splitlines()
+    
+    assert lines[2].split("\t")[9] == "SpacesAfter=\\n\\n"
+    assert [line.split("\t")[1] for line in lines if line and not line.startswith("#")] == ["Hi", ".", "Bye"]
+
+
+def test_append_conllu_spaces():
+    """Тест переноса пробелов из начала следующей части документа"""
+    conllu = "1\tHi\thi\tINTJ\tUH\t_\t0\troot\t_\tSpaceAfter=No\n\n"
+    
+    appended = append_conllu_spaces(append_conllu_spaces(conllu, "\n"), "\n")
+    
+    assert appended.splitlines()[0].split("\t")[9] == "SpacesAfter=\\n\\n"
+    assert appended.endswith("\n\n")
+    assert append_conllu_spaces(conllu, "") == conllu
+
+
+def test_doc_to_conllu_cyclic_parse(vocab):
+    """Тест записи в CoNLL-U документа с циклом в разборе"""
+    doc = Doc(vocab, words=["a", "b", "c"], heads=[1, 0, 2], deps=["dep", "dep", "ROOT"])
+    
+    conllu = doc_to_conllu(doc)
+    
+    assert len([line for line in conllu.splitlines() if line and not line.startswith("#")]) == 3
+
+
+def test_cyclic_conllu(vocab):
+    """Тест отклонения CoNLL-U с циклом в дереве зависимостей"""
+    conllu = (
+        "1\ta\ta\tX\tX\t_\t2\tdep\t_\t_\n"
+        "2\tb\tb\tX\tX\t_\t1\tdep\t_\t_\n"
+        "3\tc\tc\tX\tX\t_\t0\troot\t_\t_\n"
+    )
+    
+    with pytest.raises(InvalidParsedInput, match="cycle"):
+        doc_from_conllu(vocab, conllu)
+
+
+def test_cyclic_docbin(vocab):
+    """Тест отклонения DocBin с циклом в дереве зависимостей"""
+    doc = Doc(vocab, words=["a", "b", "c"], heads=[1, 0, 2], deps=["dep", "dep", "ROOT"])
+    
+    with pytest.raises(InvalidParsedInput, match="cycle"):
+        doc_from_docbin(vocab, DocBin(docs=[doc]).to_bytes())
+
@@ -0,0 +1,55 @@
+"""
+Тесты для ответов в виде разницы между версиями результата
+"""
+from app.services.result_deltas import diff_results, shift_references, splice
+
+
+def _result(words):
+    return {
+        "tokens": [
+            {"id": i, "text": word, "dependency": {"dep": "dep", "head": i - 1 if i else None}}
+            for i, word in enumerate(words)
+        ],
+        "sentences": [{"start": 0, "end": len(words), "text": " ".join(words)}],
+        "dependency_tree": {"root": 0, "nodes": [], "edges": []},
+        "statistics": {"pos_distribution": {"X": len(words)}}
+    }
+
+
+def _apply(section, old, change, shift):
+    if change is None:
+        return old
+    start, deleted = change["start"], change["deleted"]
+    return old[:start] + change["items"] + [shift_references(section, item, shift) for item in old[start + deleted:]]
+
+
+def test_splice_shifts_following_items():
+    """Тест замены участка со сдвигом номеров токенов после него"""
+    old = _result(["a", "b", "c", "d"])["tokens"]
+    new = _result(["a", "x", "y", "c", "d"])["tokens"]
+    
+    change = splice("tokens", old, new, 1)
+    
+    assert (change["start"], change["deleted"], len(change["items"])) == (1, 1, 2)
+    assert _apply("tokens", old, change, 1) == new
+
+
+def test_splice_unchanged():
+    """Тест что для совпадающих списков замена не нужна"""
+    tokens = _result(["a", "b"])["tokens"]
+    
+    assert splice("tokens", tokens, tokens, 0) is None
+
+
+def test_diff_results():
+    """Тест разницы между результатами"""
+    old = _result(["a", "b", "c"])
+    new = _result(["a", "c"])
+    
+    delta = diff_results(old, new)
+    
+    assert delta["shift"] == -1
+    assert _apply("tokens", old["tokens"], delta["tokens"], -1) == new["tokens"]
+    assert delta["sentences"]["items"] == new["sentences"]
+    assert delta["statistics"] == new["statistics"]
+    assert "dependency_root" not in delta
@@ -0,0 +1,72 @@
+"""
+Тесты для результатов, сохраненных на сервере
+"""
+from app.services.result_handles import ResultHandles, split_dependency_tree
+from app.services.result_store import ResultStore
+
+
+def _result():
+    return {
+        "tokens": [{"id": i, "text": f"w{i}"} for i in range(5)],
+        "sentences": [{"text": "w0 w1 w2", "start": 0, "end": 3}, {"text": "w3 w4", "start": 3, "end": 5}],
+        "dependency_tree": {
+            "nodes": [
+                {"id": 0, "text": "w0", "dep": "nsubj"},
+                {"id": 1, "text": "w1", "dep": "ROOT"},
+                {"id": 2, "text": "w2", "dep": "dobj"},
+                {"id": 3, "text": "w3", "dep": "ROOT"},
+                {"id": 4, "text": "w4", "dep": "punct"}
+            ],
+            "edges": [
+                {"source": 1, "target": 0, "label": "nsubj"},
+                {"source": 1, "target": 2, "label": "dobj"},
+                {"source": 3, "target": 4, "label": "punct"}
+            ]
+        },
+        "grammar_errors": []
+    }
+
+
+def test_split_dependency_tree():
+    """Тест разделения дерева зависимостей по предложениям"""
+    result = _result()
+    
+    trees = split_dependency_tree(result["dependency_tree"], result["sentences"])
+    
+    assert [tree["root"] for tree in trees] == [1, 3]
+    assert [len(tree["nodes"]) for tree in trees] == [3, 2]
+    assert [len(tree["edges"]) for tree in trees] == [2, 1]
+
+
+def test_split_dependency_tree_without_sentences():
+    """Тест сохранения дерева зависимостей без раздела sentences (options.sections)"""
+    result = _result()
+    del result["sentences"]
+    
+    sections, _ = ResultHandles.prepare(result)
+    
+    assert len(sections["dependency_tree"]) == 1
+    assert len(sections["dependency_tree"][0]["nodes"]) == 5
+    assert len(sections["dependency_tree"][0]["edges"]) == 3
+
+
+def test_pages():
+    """Тест выдачи разделов страницами"""
+    handles = ResultHandles(ResultStore(ttl_seconds=60, max_bytes=1024 * 1024))
+    sections, size = ResultHandles.prepare(_result())
+    result_id, _ = handles.put(sections, size)
+    
+    page = handles.page(result_id, "tokens", 3, 10)
+    
+    assert page["total"] == 5
+    assert [token["id"] for token in page["items"]] == [3, 4]
+    assert handles.page(result_id, "grammar_constructions", 0, 10)["items"] == []
+    assert handles.page("missing", "tokens", 0, 10) is None
+
+
+def test_expired_result():
+    """Тест что результат недоступен после истечения TTL"""
+    handles = ResultHandles(ResultStore(ttl_seconds=0, max_bytes=1024 * 1024))
+    result_id, _ = handles.put(*ResultHandles.prepare(_result()))
+    
+    assert handles.page(result_id, "tokens", 0, 10) is None
@@ -0,0 +1,40 @@
+"""
+Тесты для ограничения длины предложений
+"""
+import spacy
+import app.utils.sentence_guard  # noqa: F401 - регистрация компонента sentence_guard
+
+
+def _nlp(max_tokens):
+    """Конвейер без модели: деление на предложения и ограничение их длины"""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    nlp.add_pipe("sentence_guard", config={"max_tokens": max_tokens})
+    return nlp
+
+
+def test_short_sentences_unchanged():
+    """Тест что обычные предложения не делятся"""
+    doc = _nlp(10)("The cat sat on the mat. The dog ran.")
+    
+    assert len(list(doc.sents)) == 2
+    assert doc._.forced_sentence_splits == 0
+
+
+def test_split_at_newlines():
+    """Тест деления длинного сегмента по переводам строк"""
+    doc = _nlp(10)("\n".join("error in module number five" for _ in range(6)))
+    
+    sentences = list(doc.sents)
+    
+    assert all(len(sent) <= 10 for sent in sentences)
+    assert all(sent[-1].text == "\n" for sent in sentences[:-1])
+    assert doc._.forced_sentence_splits == len(sentences) - 1
+
+
+def test_split_at_token_limit():
+    """Тест деления сегмента без переводов строк каждые max_tokens токенов"""
+    doc = _nlp(10)(" ".join(f"word{i}" for i in range(35)))
+    
+    assert [len(sent) for sent in doc.sents] == [10, 10, 10, 5]
+    assert doc._.forced_sentence_splits == 3
@@ -0,0 +1,194 @@
+"""
+Тесты для объединения одинаковых вычислений
+"""
+import asyncio
+import time
+import pytest
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_result():
+    """Тест что одинаковые одновременные вызовы выполняются один раз"""
+    flights = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"tokens": []}
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", compute) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "saved": 4}
+
+
+def test_error_is_shared():
+    """Тест что ошибку вычисления получают все ожидающие"""
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_computation_survives_one_cancelled_waiter():
+    """Тест что отключение одного клиента не отменяет общее вычисление"""
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flights.do("key", compute))
+        second = asyncio.create_task(flights.do("key", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_computation_cancelled_when_all_waiters_leave():
+    """Тест отмены вычисления, когда отключились все клиенты"""
+    flights = SingleFlight()
+    cancelled = False
+
+    async def compute():
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def run():
+        waiter = asyncio.create_task(flights.do("key", compute))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert cancelled
+
+
+def test_key_depends_on_options():
+    """Тест что разные опции дают разные ключи"""
+    assert SingleFlight.make_key("m", "text", {"a": 1, "b": 2}) == SingleFlight.make_key("m", "text", {"b": 2, "a": 1})
+    assert SingleFlight.make_key("m", "text", {"a": 1}) != SingleFlight.make_key("m", "text", {"a": 2})
+
+
+def test_waiter_deadline_does_not_cancel_shared_computation():
+    """Тест что дедлайн одного ожидающего не прерывает вычисление для остальных"""
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        return await asyncio.gather(
+            flights.do("key", compute, deadline=time.time() + 0.01),
+            flights.do("key", compute),
+            return_exceptions=True
+        )
+
+    short, long = asyncio.run(run())
+
+    assert isinstance(short, asyncio.TimeoutError)
+    assert long == "done"
+    assert flights.stats()["executed"] == 1
+
+
+def test_computation_cancelled_when_all_waiters_time_out():
+    """Тест отмены вычисления, когда истекли дедлайны всех ожидающих"""
+    flights = SingleFlight()
+    cancelled = False
+
+    async def compute():
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await flights.do("key", compute, deadline=time.time() + 0.01)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert cancelled
+
+
+def test_requests_with_different_deadlines_are_shared(monkeypatch):
+    """Тест что запросы с разными дедлайнами объединяются, а вычисление идет без дедлайна"""
+    from app import main
+
+    deadlines = []
+
+    async def execute(text, options, client_id, cost, deadline, lane):
+        deadlines.append(deadline)
+        await asyncio.sleep(0.05)
+        return {"partial": False}
+
+    monkeypatch.setattr(main, "_execute_analysis", execute)
+    short = main.time.time() + 0.01
+
+    async def run():
+        return await asyncio.gather(
+            main._analyze_once("Same text.", {}, "a", short, "interactive"),
+            main._analyze_once("Same text.", {}, "b", None, "interactive"),
+            main._analyze_once("Same text.", {}, "c", main.time.time() + 30, "interactive"),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert deadlines == [None]
+    assert isinstance(results[0], asyncio.TimeoutError)
+    assert results[1:] == [{"partial": False}, {"partial": False}]
+
+
+def test_partial_results_are_shared_only_with_same_deadline(monkeypatch):
+    """Тест что частичный результат не передается запросу с другим дедлайном"""
+    from app import main
+
+    deadlines = []
+
+    async def execute(text, options, client_id, cost, deadline, lane):
+        deadlines.append(deadline)
+        return {"partial": True}
+
+    monkeypatch.setattr(main, "_execute_analysis", execute)
+    options = {"partial_results": True}
+    first = main.time.time() + 30
+    second = first + 1
+
+    async def run():
+        return await asyncio.gather(
+            main._analyze_once("Same text.", options, "a", first, "interactive"),
+            main._analyze_once("Same text.", options, "b", second, "interactive")
+        )
+
+    asyncio.run(run())
+
+    assert sorted(deadlines) == [first, second]
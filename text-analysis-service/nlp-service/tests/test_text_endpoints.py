@@ -0,0 +1,103 @@
+"""
+Тесты для анализа текста из тела запроса (/analyze/text) и файла (/analyze/file)
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from app.main import _charset, _read_text
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def _read(parts, charset="utf-8", max_length=100):
+    return asyncio.run(_read_text(_chunks(*parts), charset, max_length))
+
+
+def test_charset():
+    """Тест кодировки из Content-Type и UTF-8 по умолчанию"""
+    assert _charset(None) == "utf-8"
+    assert _charset("text/plain") == "utf-8"
+    assert _charset("text/plain; charset=latin-1") == "latin-1"
+    assert _charset('text/plain; format=flowed; Charset="cp1251"') == "cp1251"
+    assert _charset("text/plain; charset=") == "utf-8"
+
+
+def test_read_text_across_chunks():
+    """Тест декодирования символа, разделенного между частями тела"""
+    data = "naïve café".encode("utf-8")
+    
+    assert _read([data[:3], data[3:7], data[7:]]) == "naïve café"
+
+
+def test_read_text_stops_at_max_length():
+    """Тест что читается только анализируемая часть текста"""
+    read = []
+    
+    async def chunks():
+        for part in (b"abcdef", b"ghij", b"never read"):
+            read.append(part)
+            yield part
+    
+    assert asyncio.run(_read_text(chunks(), "utf-8", 8)) == "abcdefgh"
+    assert read == [b"abcdef", b"ghij"]
+
+
+def test_read_text_errors():
+    """Тест ошибок чтения: неизвестная кодировка, неверные байты, пустой текст"""
+    with pytest.raises(HTTPException) as error:
+        _read([b"text"], charset="no-such-charset")
+    assert error.value.status_code == 415
+    
+    with pytest.raises(HTTPException) as error:
+        _read([b"\xff\xfe broken"])
+    assert error.value.status_code == 400
+    
+    with pytest.raises(HTTPException) as error:
+        _read([b"\xc3"])
+    assert error.value.status_code == 400
+    
+    with pytest.raises(HTTPException) as error:
+        _read([])
+    assert error.value.status_code == 400
+
+
+def test_analyze_text(client):
+    """Тест анализа тела text/plain с опциями в параметрах запроса"""
+    response = client.post(
+        "/analyze/text?max_length=12",
+        content="Dogs bark loudly at night.".encode("latin-1"),
+        headers={"Content-Type": "text/plain; charset=latin-1"}
+    )
+    
+    assert response.status_code == 200
+    assert "".join(token["text"] for token in response.json()["tokens"]) == "Dogsbarklo"
+
+
+def test_analyze_text_errors(client):
+    """Тест ошибок /analyze/text: тип содержимого, кодировка, пустое тело"""
+    assert client.post("/analyze/text", content=b"Dogs bark.", headers={"Content-Type": "application/json"}).status_code == 415
+    assert client.post("/analyze/text", content=b"Dogs bark.", headers={"Content-Type": "text/plain; charset=x-unknown"}).status_code == 415
+    assert client.post("/analyze/text", content=b"\xff\xfe", headers={"Content-Type": "text/plain"}).status_code == 400
+    assert client.post("/analyze/text", content=b"", headers={"Content-Type": "text/plain"}).status_code == 400
+
+
+def test_analyze_file(client):
+    """Тест анализа загруженного файла в кодировке из его Content-Type"""
+    response = client.post(
+        "/analyze/file",
+        files={"file": ("text.txt", "Café owners smile.".encode("cp1252"), "text/plain; charset=cp1252")}
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["tokens"][0]["text"] == "Café"
+
+
+def test_analyze_file_errors(client):
+    """Тест ошибок /analyze/file: нет поля file, неверные байты"""
+    assert client.post("/analyze/file").status_code == 422
+    assert client.post("/analyze/file", files={"file": ("text.txt", b"\xff\xfe", "text/plain")}).status_code == 400
+    assert client.post("/analyze/file", files={"file": ("text.txt", b"", "text/plain")}).status_code == 400
@@ -0,0 +1,86 @@
+"""
+Тесты для пула рабочих процессов
+"""
+import asyncio
+import pytest
+from app.models.analyzer import TextAnalyzer
+from app.services.worker_pool import AnalyzerPool, default_worker_count
+
+
+@pytest.fixture
+def pool():
+    """Пул в режиме одного потока (workers=0)"""
+    try:
+        TextAnalyzer("en_core_web_sm")
+    except OSError:
+        pytest.skip("spaCy model not installed")
+    pool = AnalyzerPool("en_core_web_sm", 0)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_default_worker_count():
+    """Тест определения количества рабочих процессов"""
+    assert default_worker_count() >= 1
+
+
+def test_pool_analyze(pool):
+    """Тест анализа через пул"""
+    async def run():
+        await pool.warm_up()
+        return await pool.analyze("The cat sat on the mat.", {})
+
+    result = asyncio.run(run())
+
+    assert pool.ready
+    assert len(result["tokens"]) > 0
+    assert len(result["sentences"]) == 1
+
+
+def test_pool_analyze_stream(pool):
+    """Тест потокового анализа через пул"""
+    async def run():
+        await pool.warm_up()
+        return [record async for record in pool.analyze_stream("The cat sat. The dog ran.", {})]
+
+    records = asyncio.run(run())
+
+    assert [record["type"] for record in records] == ["sentence", "sentence", "summary"]
+
+
+def test_batch_chunks_follow_worker_count():
+    """Тест деления пакета на части по числу рабочих процессов"""
+    pool = AnalyzerPool("en_core_web_sm", 4)
+
+    assert pool.batch_chunks(0, 8) == []
+    assert pool.batch_chunks(5, 8) == [slice(0, 5)]
+    assert pool.batch_chunks(100, 10) == [slice(0, 25), slice(25, 50), slice(50, 75), slice(75, 100)]
+
+
+def test_batch_endpoint_takes_slot_per_chunk(monkeypatch):
+    """Тест что каждая часть пакета занимает свое место в очереди клиента"""
+    from contextlib import asynccontextmanager
+    from app import main
+
+    slots = []
+
+    @asynccontextmanager
+    async def slot(client_id, cost, timeout=None, lane="interactive"):
+        slots.append((client_id, cost, lane))
+        yield
+
+    async def analyze_batch_chunk(items, batch_size, n_process=1, deadlines=None):
+        return [{"result": {"text": text}, "error": None} for text, _ in items]
+
+    pool = AnalyzerPool("en_core_web_sm", 2)
+    monkeypatch.setattr(pool, "analyze_batch_chunk", analyze_batch_chunk)
+    monkeypatch.setattr(main, "pool", pool)
+    monkeypatch.setattr(main.scheduler, "slot", slot)
+    texts = [f"text {i}" for i in range(6)]
+
+    outcomes = asyncio.run(main._execute_batch([(text, {}) for text in texts], [10] * 6, 2, "client", "bulk"))
+
+    assert [outcome["result"]["text"] for outcome in outcomes] == texts
+    assert [(client_id, lane) for client_id, _, lane in slots] == [("client", "bulk")] * 2
+    assert [cost for _, cost, _ in slots] == [3 * main.admission.estimate_cost(10)] * 2